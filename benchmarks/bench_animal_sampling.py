@@ -0,0 +1,67 @@
+"""Time to draw one animal group with 50 candidate species, pandas skiprows vs the mmap line index.
+
+Run with: python -m benchmarks.bench_animal_sampling [--draws 200]
+
+The pandas path is the one the animal generator used before the index: it parses a fifth of the
+group file on every draw. The indexed path pays one scan per file on the first draw, reported separately.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from who_knew_it import datasets
+from who_knew_it.animal_question import ANIMALS_FOLDER, AnimalQuestionGenerator
+
+HOW_MANY = 50
+
+
+def _pandas_draw() -> tuple[str, list[str]]:
+    group_file = random.choice([f for f in ANIMALS_FOLDER.iterdir() if f.suffix == ".csv"])
+
+    every_nth = 5
+    residual = random.randint(0, every_nth - 1)
+    df = pd.read_csv(group_file, skiprows=lambda x: x % every_nth != residual, names=["species"])
+    return group_file.stem, df.sample(HOW_MANY)["species"].tolist()
+
+
+def _time_draws(draw, n_draws: int) -> list[float]:
+    durations = []
+    for _ in range(n_draws):
+        start = time.perf_counter()
+        draw()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _report(name: str, durations: list[float]) -> None:
+    print(
+        f"{name:<8} mean {statistics.mean(durations) * 1e3:8.3f} ms"
+        f"  p50 {statistics.median(durations) * 1e3:8.3f} ms"
+        f"  p99 {statistics.quantiles(durations, n=100)[98] * 1e3:8.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--draws", type=int, default=200)
+    args = parser.parse_args()
+
+    _report("pandas", _time_draws(_pandas_draw, args.draws))
+
+    datasets.clear()
+    group_files: list[Path] = sorted(f for f in ANIMALS_FOLDER.iterdir() if f.suffix == ".csv")
+    start = time.perf_counter()
+    for group_file in group_files:
+        datasets.line_index(group_file)
+    print(f"indexing {len(group_files)} files once: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    _report("index", _time_draws(AnimalQuestionGenerator._random_animal_group_and_species, args.draws))
+
+
+if __name__ == "__main__":
+    main()
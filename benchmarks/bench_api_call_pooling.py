@@ -0,0 +1,66 @@
+"""Per-call overhead of api_call.prompt_model with and without a pooled keep-alive session.
+
+Run with: python -m benchmarks.bench_api_call_pooling [--calls 200]
+
+The stub server is plain HTTP on localhost, so the numbers only show the TCP setup
+that pooling saves. Against Gemini every fresh connection also pays a TLS handshake
+over the internet, so the real saving per call is considerably larger.
+"""
+
+import argparse
+import statistics
+import time
+
+import requests
+
+from benchmarks.stub_server import StubLLMServer
+from who_knew_it import api_call
+
+
+def _bare_post(url: str, prompt: str) -> str:
+    response = requests.post(
+        url=url,
+        params={"key": "stub"},
+        headers={"Content-Type": "application/json"},
+        json={"contents": [{"parts": [{"text": prompt}]}]},
+    )
+    response.raise_for_status()
+    return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def _time_calls(call, n_calls: int) -> list[float]:
+    durations = []
+    for i in range(n_calls):
+        start = time.perf_counter()
+        call(f"prompt {i}")
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _report(name: str, durations: list[float], n_connections: int) -> None:
+    print(
+        f"{name:<12} mean {statistics.mean(durations) * 1e3:7.3f} ms"
+        f"  p50 {statistics.median(durations) * 1e3:7.3f} ms"
+        f"  p99 {statistics.quantiles(durations, n=100)[98] * 1e3:7.3f} ms"
+        f"  connections {n_connections}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with StubLLMServer() as server:
+        durations = _time_calls(lambda p: _bare_post(server.url, p), args.calls)
+        _report("unpooled", durations, server.n_connections)
+
+    with StubLLMServer() as server:
+        client = api_call.LLMClient(url=server.url, key="stub")
+        durations = _time_calls(client.prompt, args.calls)
+        client.close()
+        _report("pooled", durations, server.n_connections)
+
+
+if __name__ == "__main__":
+    main()
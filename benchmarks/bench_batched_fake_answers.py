@@ -0,0 +1,108 @@
+"""Wall time and token usage of batched vs one-by-one house fake answers for n=2..4.
+
+Run with: python -m benchmarks.bench_batched_fake_answers
+
+The stub server simulates a model whose latency is a fixed overhead plus a cost per generated token,
+which is roughly how Gemini behaves. Token counts are estimated from characters sent and received.
+"""
+
+import argparse
+import json
+import re
+import time
+
+from benchmarks.stub_server import StubLLMServer
+from who_knew_it import api_call, movie_suggestion, rate_limit, word_definition_question
+
+SYNOPSIS = (
+    "A retired lighthouse keeper discovers that the fog rolling over his island is sentient and lonely. "
+    "He teaches it to play chess, but the fog cheats. When a storm threatens to blow it away, "
+    "the keeper must decide whether to open the lighthouse doors."
+)
+DEFINITION = "A small wooden box used to keep salt dry."
+
+
+def _simulated_model(base_latency: float, seconds_per_token: float):
+    def respond(prompt: str) -> str:
+        if match := re.search(r"a list of the (\d+)", prompt):
+            n = int(match.group(1))
+            text = json.dumps([f"{SYNOPSIS} ({i})" for i in range(n)])
+        else:
+            text = SYNOPSIS
+        time.sleep(base_latency + rate_limit.estimate_tokens(text, expected_output_tokens=0) * seconds_per_token)
+        return text
+
+    return respond
+
+
+def _tokens_sent(server: StubLLMServer) -> int:
+    return sum(
+        rate_limit.estimate_tokens(body["contents"][0]["parts"][0]["text"], expected_output_tokens=0)
+        for body in server.request_bodies
+    )
+
+
+def _run(name: str, write, n: int, base_latency: float, seconds_per_token: float) -> None:
+    with StubLLMServer(respond=_simulated_model(base_latency, seconds_per_token)) as server:
+        client = api_call.LLMClient(url=server.url, key="stub")
+        api_call.get_client = lambda: client  # type: ignore[method-assign]
+
+        start = time.perf_counter()
+        answers = write(n)
+        duration = time.perf_counter() - start
+        assert len(answers) == n
+        print(
+            f"{name:<28} n={n}  calls {server.n_requests}  wall {duration:6.2f} s  prompt tokens {_tokens_sent(server):6d}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-latency", type=float, default=0.4)
+    parser.add_argument("--seconds-per-token", type=float, default=0.004)
+    args = parser.parse_args()
+
+    movie_question = 'What is the plot of the 1987 film "The Fog Keeper"?'
+    word_question = "What's the definition of the old english word 'saltfat'?"
+
+    for n in range(2, 5):
+        _run(
+            "movie one-by-one",
+            lambda n: [
+                movie_suggestion.create_fake_movie_synopsis(movie_question, [SYNOPSIS] + [SYNOPSIS] * i)
+                for i in range(n)
+            ],
+            n,
+            args.base_latency,
+            args.seconds_per_token,
+        )
+        _run(
+            "movie batched",
+            lambda n: movie_suggestion.MovieQuestionGenerator().write_fake_answers(movie_question, SYNOPSIS, n),
+            n,
+            args.base_latency,
+            args.seconds_per_token,
+        )
+        _run(
+            "definition one-by-one",
+            lambda n: [
+                word_definition_question._create_fake_answers(word_question, DEFINITION, [DEFINITION] * i)
+                for i in range(n)
+            ],
+            n,
+            args.base_latency,
+            args.seconds_per_token,
+        )
+        _run(
+            "definition batched",
+            lambda n: word_definition_question.OldEnglishWordDefinitionQuestionGenerator().write_fake_answers(
+                word_question, DEFINITION, n
+            ),
+            n,
+            args.base_latency,
+            args.seconds_per_token,
+        )
+
+
+if __name__ == "__main__":
+    main()
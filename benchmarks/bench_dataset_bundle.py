@@ -0,0 +1,57 @@
+"""Time until every static dataset is loaded, parsing the text sources vs mapping the dataset bundle.
+
+Run with: python -m benchmarks.bench_dataset_bundle [--repeats 20]
+
+Builds the bundle into a temporary file first. The bundle decodes rows on access, so the
+second number also shows the cost of touching one row of every dataset.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from who_knew_it import data_bundle, datasets
+
+
+def _load_all(touch: bool) -> None:
+    datasets.clear()
+    for path, kind in data_bundle.sources():
+        rows = datasets.lines(path) if kind == "lines" else datasets.csv_column(path)
+        if touch:
+            rows[len(rows) // 2]
+
+
+def _time(repeats: int, touch: bool = False) -> list[float]:
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _load_all(touch)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _report(name: str, durations: list[float]) -> None:
+    print(f"{name:<16} mean {statistics.mean(durations) * 1e3:8.3f} ms  min {min(durations) * 1e3:8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_file = Path(tmp) / "datasets.bundle"
+        data_bundle.BUNDLE_FILE = bundle_file
+        _report("text", _time(args.repeats))
+
+        start = time.perf_counter()
+        data_bundle.build(bundle_file)
+        print(f"building the bundle: {(time.perf_counter() - start) * 1e3:.1f} ms")
+        _report("bundle", _time(args.repeats))
+        _report("bundle, one row", _time(args.repeats, touch=True))
+
+
+if __name__ == "__main__":
+    main()
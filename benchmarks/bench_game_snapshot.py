@@ -0,0 +1,79 @@
+"""Database queries and time per rerun of the reveal screen, loading its game snapshot per rerun or sharing it.
+
+Run with: python -m benchmarks.bench_game_snapshot [--players 4] [--reruns 200] [--writes-every 10]
+
+Every browser of a game in the reveal reruns in turn against a temporary database, and every writes_every
+reruns somebody writes to the game. Before the snapshot, a rerun of the reveal made seven reads of its own.
+"""
+
+import argparse
+import contextlib
+import io
+import pathlib
+import tempfile
+import time
+
+from benchmarks.bench_idle_polling import _count_queries
+from who_knew_it import game_events
+from who_knew_it import streamlit_app as app
+
+
+def _set_up_game(n_players: int) -> int:
+    store = app.get_game_store()
+    game_id = app.initialize_new_game_in_db()
+    players = [f"player_{game_id}_{i}" for i in range(n_players)]
+    for i, player_id in enumerate(players):
+        app.register_player_id_and_name(player_id, f"Player {i}")
+    for i, player_id in enumerate([*players, *map(app.get_house_player_id, range(2))]):
+        store.join_game(player_id, game_id, is_host=i == 0, max_players=len(players) + 2)
+    app.initialize_questions(game_id=game_id, n_questions=app.N_QUESTIONS)
+    app.initialize_answers(game_id=game_id)
+    app.add_question_and_correct_answer(game_id, 1, question="What is a quokka?", correct_answer="A small wallaby.")
+    app.add_fake_answers(game_id, 1, ["A fish.", "A dance."])
+    for i, player_id in enumerate(players):
+        store.set_answer(game_id, 1, player_id, f"Answer of {player_id}")
+        store.set_chosen_answer(game_id, 1, player_id, app.CORRECT_ANSWER_ID if i % 2 else app.get_house_player_id(0))
+    app.add_points(game_id, 1, {player_id: 1 for player_id in players})
+    return game_id
+
+
+def _run(game_id: int, n_players: int, reruns: int, writes_every: int, shared: bool) -> str:
+    load = app.get_game_snapshot if shared else app.load_game_snapshot
+    queries = _count_queries()
+    start = time.perf_counter()
+    for rerun in range(reruns):
+        if rerun % writes_every == 0:
+            game_events.bump(game_id)
+        for _browser in range(n_players):
+            snapshot = load(game_id, 1)
+            snapshot.players_who_chose_answers()
+    elapsed = time.perf_counter() - start
+    queries = _count_queries() - queries
+
+    name = "shared" if shared else "per rerun"
+    n = reruns * n_players
+    return f"{name:<10} {queries / n:6.2f} queries per rerun  {elapsed / n * 1e3:8.3f} ms per rerun"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--writes-every", type=int, default=10)
+    args = parser.parse_args()
+
+    app.DB_FILE = pathlib.Path(tempfile.mkdtemp()) / "database" / "file.db"
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.create_tables_if_not_exist()
+        game_id = _set_up_game(args.players)
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the app prints every query
+        results = [
+            _run(game_id, args.players, args.reruns, args.writes_every, shared) for shared in (False, True)
+        ]
+    print(f"{args.players} browsers, a write every {args.writes_every} reruns")
+    print("\n".join(results))
+
+
+if __name__ == "__main__":
+    main()
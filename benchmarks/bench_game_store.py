@@ -0,0 +1,157 @@
+"""Latency per game store operation of each engine, replaying the store calls of recorded games.
+
+Run with: python -m benchmarks.bench_game_store [--games 5] [--players 4] [--polls 2]
+
+Plays games through the functions of the app while recording every call they make to the game store: the
+writes of the players, the host and the generation, and after each write the reads of every browser's
+pollers and screens, polls times. The recording is then replayed against a fresh store of each engine, the
+duckdb one on a temporary file like the app's, and the p50 and p99 per operation are printed. The replay is
+sequential, it measures the cost of an operation and not the contention between sessions.
+"""
+
+import argparse
+import contextlib
+import io
+import pathlib
+import tempfile
+import time
+
+import duckdb
+
+from who_knew_it import dao, game_store
+from who_knew_it import streamlit_app as app
+
+
+class _Recorder:
+    """Passes the calls through to the store and keeps them, with what they returned."""
+
+    def __init__(self, store: game_store.GameStore) -> None:
+        self._store = store
+        self.calls: list[tuple[str, tuple, dict, object]] = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self._store, name)
+
+        def record(*args, **kwargs):
+            result = method(*args, **kwargs)
+            self.calls.append((name, args, kwargs, result))
+            return result
+
+        return record
+
+
+def _poll(game_id: int, question_number: int, players: list[str], polls: int, stage: app.GameStage) -> None:
+    """What the browsers of the game read after a write, see the rerun_if_... fragments and the screens."""
+    for _ in range(polls):
+        for _player_id in players:
+            app.game_stage_changed(game_id, stage)
+            if stage == app.GameStage.answer_writing:
+                app.determine_whether_all_answers_in(game_id, question_number)
+                app.get_generation_progress(game_id)
+            elif stage == app.GameStage.guessing:
+                app.all_players_have_chosen_an_answer(game_id, question_number)
+                app.load_game_snapshot(game_id, question_number)
+            else:
+                app.load_game_snapshot(game_id, question_number)
+                app.question_is_answered(game_id, question_number)
+
+
+def _play_game(n_players: int, polls: int) -> None:
+    store = app.get_game_store()
+    game_id = app.initialize_new_game_in_db()
+    players = [f"player_{game_id}_{i}" for i in range(n_players)]
+    for i, player_id in enumerate(players):
+        app.register_player_id_and_name(player_id, f"Player {i}")
+        app.join_game(player_id, game_id, is_host=i == 0)
+        app.players_changed(game_id, players[:i])
+    app.start_game(game_id, n_questions=app.N_QUESTIONS)
+
+    for question_number in range(1, app.N_QUESTIONS + 1):
+        app.determine_first_unanswered_question_number(game_id)
+        app.get_question_types(game_id)
+        store.assign_question_type(game_id, question_number, "animal")
+        app.add_question_and_correct_answer(game_id, question_number, "What is a quokka?", "A small wallaby.")
+        app.add_fake_answers(game_id, question_number, ["A fish.", "A dance."])
+        for player_id in players:
+            store.set_answer(game_id, question_number, player_id, f"Answer of {player_id}")
+            _poll(game_id, question_number, players, polls, app.GameStage.answer_writing)
+
+        app.set_game_state(game_id, app.GameStage.guessing)
+        for i, player_id in enumerate(players):
+            chosen = players[(i + 1) % n_players] if i % 2 else app.CORRECT_ANSWER_ID
+            app.set_players_chosen_answers_player_id(game_id, question_number, player_id, chosen)
+            _poll(game_id, question_number, players, polls, app.GameStage.guessing)
+
+        app.set_game_state(game_id, app.GameStage.reveal)
+        app.add_points(game_id, question_number, {player_id: i % 3 for i, player_id in enumerate(players)})
+        _poll(game_id, question_number, players, polls, app.GameStage.reveal)
+        app.next_question(game_id, question_number)
+
+    app.set_game_state(game_id, app.GameStage.finished)
+    app.load_game_snapshot(game_id, app.N_QUESTIONS)
+    app.get_player_name(players[0])
+    for player_id in reversed(players):  # the host leaves last, which closes the game
+        app.remove_from_game(player_id, game_id)
+
+
+def _record(n_games: int, n_players: int, polls: int) -> list[tuple[str, tuple, dict, object]]:
+    recorder = _Recorder(game_store.MemoryGameStore())
+    app.get_game_store = lambda: recorder  # type: ignore[assignment]
+    app.create_tables_if_not_exist()
+    for _ in range(n_games):
+        _play_game(n_players, polls)
+    return recorder.calls
+
+
+def _open(engine: str, directory: pathlib.Path) -> game_store.GameStore:
+    con = duckdb.connect(directory / f"{engine}.db")
+    for statement in dao.SCHEMA:
+        dao.run(con, statement)
+    return game_store.open_store(engine, connect=con.cursor, write_attempts=app.JOB_WRITE_ATTEMPTS)
+
+
+def _replay(store: game_store.GameStore, calls: list[tuple[str, tuple, dict, object]]) -> dict[str, list[float]]:
+    seconds: dict[str, list[float]] = {}
+    for name, args, kwargs, recorded in calls:
+        method = getattr(store, name)
+        start = time.perf_counter()
+        result = method(*args, **kwargs)
+        seconds.setdefault(name, []).append(time.perf_counter() - start)
+        if name == "create_game" and result != recorded:
+            raise ValueError(f"The replay created game {result} where the recording created game {recorded}.")
+    return seconds
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--polls", type=int, default=2)
+    args = parser.parse_args()
+
+    directory = pathlib.Path(tempfile.mkdtemp())
+    app.DB_FILE = directory / "database" / "file.db"  # the jobs stay in the app's database
+    with contextlib.redirect_stdout(io.StringIO()):  # the app prints what it writes
+        calls = _record(args.games, args.players, args.polls)
+    results = {engine: _replay(_open(engine, directory), calls) for engine in game_store.ENGINES}
+
+    print(f"{len(calls)} store calls of {args.games} games with {args.players} players, replayed per engine")
+    header = "".join(f" {engine + ' p50':>12} {engine + ' p99':>12}" for engine in results)
+    print(f"{'operation':<38} {'calls':>6}{header}   (ms)")
+    for name in sorted(results[game_store.ENGINES[0]]):
+        row = "".join(
+            f" {_percentile(seconds[name], 0.5) * 1e3:12.3f} {_percentile(seconds[name], 0.99) * 1e3:12.3f}"
+            for seconds in results.values()
+        )
+        print(f"{name:<38} {len(results[game_store.ENGINES[0]][name]):>6}{row}")
+    for engine, seconds in results.items():
+        print(f"{engine}: {sum(map(sum, seconds.values())) * 1e3:.1f} ms in total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Database queries per second of the lobby pollers with idle games, with and without the per-game change counter.
+
+Run with: python -m benchmarks.bench_idle_polling [--games 50] [--players 4] [--seconds 20]
+
+Every browser runs the check of rerun_if_game_stage_or_players_changed once per simulated second, against
+a temporary database. Nobody writes, which is what most games look like most of the time: players reading
+the question, thinking about an answer or waiting for the host.
+"""
+
+import argparse
+import contextlib
+import io
+import pathlib
+import tempfile
+import time
+
+from who_knew_it import dao, game_events
+from who_knew_it import streamlit_app as app
+
+
+def _count_queries() -> int:
+    """All statements the app ran so far, whichever engine keeps the games."""
+    return sum(stats.executions for stats in dao.get_stats().values())
+
+
+def _set_up_games(n_games: int, n_players: int) -> dict[int, list[str]]:
+    players_per_game = {}
+    for _ in range(n_games):
+        game_id = app.initialize_new_game_in_db()
+        players = [f"player_{game_id}_{i}" for i in range(n_players)]
+        for i, player_id in enumerate(players):
+            app.register_player_id_and_name(player_id, f"Player {i}")
+        for i, player_id in enumerate(players):
+            app.get_game_store().join_game(player_id, game_id, is_host=i == 0, max_players=n_players)
+        game_events.bump(game_id)
+        players_per_game[game_id] = players
+    return players_per_game
+
+
+def _poll(game_id: int, players: list[str], session: dict | None) -> None:
+    if session is not None and not game_events.changed(game_id, seen=session, poller="game_stage_or_players"):
+        return
+    app.game_stage_changed(game_id, app.GameStage.game_open)
+    app.players_changed(game_id, players)
+
+
+def _run(players_per_game: dict[int, list[str]], seconds: int, use_versions: bool) -> str:
+    """The first second is left out, in it every browser looks at the database once either way."""
+    sessions = {(g, p): {} for g, players in players_per_game.items() for p in players}
+    for second in range(seconds + 1):
+        if second == 1:
+            queries = _count_queries()
+            start = time.perf_counter()
+        for (game_id, _player_id), session in sessions.items():
+            _poll(game_id, players_per_game[game_id], session if use_versions else None)
+    elapsed = time.perf_counter() - start
+    queries = _count_queries() - queries
+
+    name = "versions" if use_versions else "polling"
+    return f"{name:<9} {queries / seconds:8.1f} queries/s  {elapsed / seconds * 1e3:8.1f} ms per second"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seconds", type=int, default=20)
+    args = parser.parse_args()
+
+    app.DB_FILE = pathlib.Path(tempfile.mkdtemp()) / "database" / "file.db"
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.create_tables_if_not_exist()
+        players_per_game = _set_up_games(args.games, args.players)
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the app prints every query
+        results = [_run(players_per_game, args.seconds, use_versions) for use_versions in (False, True)]
+    print(f"{args.games} idle games with {args.players} browsers each")
+    print("\n".join(results))
+
+
+if __name__ == "__main__":
+    main()
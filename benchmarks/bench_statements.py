@@ -0,0 +1,58 @@
+"""Latency per database statement of a game's reads, and what formatting the values into the text cost.
+
+Run with: python -m benchmarks.bench_statements [--players 4] [--reads 500]
+
+Reads the game snapshot and the questions of a game repeatedly against a temporary database and prints the
+timings dao collected per statement. Then runs get_question once with its values as $parameters and once
+with them formatted into the text, the way the app built its queries before.
+"""
+
+import argparse
+import contextlib
+import io
+import pathlib
+import tempfile
+import time
+
+from benchmarks.bench_game_snapshot import _set_up_game
+from who_knew_it import dao
+from who_knew_it import streamlit_app as app
+
+
+def _time(reads: int, read) -> float:
+    start = time.perf_counter()
+    for _ in range(reads):
+        read()
+    return (time.perf_counter() - start) / reads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+
+    app.DB_FILE = pathlib.Path(tempfile.mkdtemp()) / "database" / "file.db"
+    with contextlib.redirect_stdout(io.StringIO()):  # the app prints what it writes
+        app.create_tables_if_not_exist()
+        game_id = _set_up_game(args.players)
+        for _ in range(args.reads):
+            app.load_game_snapshot(game_id, 1)
+            app.get_generation_progress(game_id)
+            app.get_question_types(game_id)
+
+    print(f"{'statement':<34} {'executions':>10} {'mean ms':>8} {'max ms':>8}")
+    for name, stats in sorted(dao.get_stats().items()):
+        print(f"{name:<34} {stats.executions:>10} {(stats.mean_seconds or 0) * 1e3:8.3f} {stats.max_seconds * 1e3:8.3f}")
+
+    with app.get_cursor() as con:
+        parameterized = _time(
+            args.reads, lambda: dao.run(con, dao.GET_QUESTION, game_id=game_id, question_number=1)
+        )
+        formatted_text = dao.GET_QUESTION.sql.replace("$game_id", str(game_id)).replace("$question_number", "1")
+        formatted = _time(args.reads, lambda: con.execute(formatted_text).fetchall())
+    print(f"\nget_question with $parameters {parameterized * 1e3:.3f} ms, formatted into the text {formatted * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""A local stand-in for the Gemini generateContent endpoint, used by benchmarks and tests."""
+
+import json
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def echo(prompt: str) -> str:
+    return f"echo: {prompt[:20]}"
+
+
+class StubLLMServer:
+    def __init__(
+        self,
+        respond: Callable[[str], str] = echo,
+        latency: float = 0.0,
+    ) -> None:
+        self.respond = respond
+        self.latency = latency
+        self.status_codes: list[int] = []  # consumed one per request before answering with 200
+        self.n_requests = 0
+        self.n_connections = 0
+        self.request_bodies: list[dict] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1beta/models/stub:generateContent"
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # allows keep-alive
+            disable_nagle_algorithm = True  # otherwise delayed ACKs dominate keep-alive timings
+
+            def setup(self) -> None:
+                super().setup()
+                with stub._lock:
+                    stub.n_connections += 1
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.n_requests += 1
+                    stub.request_bodies.append(body)
+                    status = stub.status_codes.pop(0) if stub.status_codes else 200
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if status == 200:
+                    prompt = body["contents"][0]["parts"][0]["text"]
+                    payload = {"candidates": [{"content": {"parts": [{"text": stub.respond(prompt)}]}}]}
+                else:
+                    payload = {"error": {"code": status}}
+
+                encoded = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "StubLLMServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
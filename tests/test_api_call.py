@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from benchmarks.stub_server import StubLLMServer
+from who_knew_it import api_call, llm_cache, rate_limit
+
+
+class TestLLMClient:
+    def test_prompt_returns_text(self):
+        with StubLLMServer(respond=lambda prompt: prompt.upper()) as server:
+            client = api_call.LLMClient(url=server.url, key="stub")
+            assert client.prompt("hello") == "HELLO"
+
+    def test_connection_is_reused(self):
+        with StubLLMServer() as server:
+            client = api_call.LLMClient(url=server.url, key="stub")
+            for i in range(5):
+                client.prompt(f"prompt {i}")
+
+            assert server.n_requests == 5
+            assert server.n_connections == 1
+
+    def test_no_keep_alive_opens_new_connections(self):
+        with StubLLMServer() as server:
+            client = api_call.LLMClient(url=server.url, key="stub", keep_alive=False)
+            for i in range(3):
+                client.prompt(f"prompt {i}")
+
+            assert server.n_connections == 3
+
+
+def test_prompt_model_async_overlaps_requests(monkeypatch):
+    with StubLLMServer(latency=0.2) as server:
+        client = api_call.LLMClient(url=server.url, key="stub")
+        monkeypatch.setattr(api_call, "get_client", lambda: client)
+
+        async def prompt_many() -> list[str]:
+            return await asyncio.gather(*(api_call.prompt_model_async(f"prompt {i}") for i in range(4)))
+
+        start = time.perf_counter()
+        answers = asyncio.run(prompt_many())
+        assert len(answers) == 4
+        assert time.perf_counter() - start < 0.6
+
+
+def test_prompt_model_only_caches_with_ttl(monkeypatch, tmp_path):
+    with StubLLMServer() as server:
+        client = api_call.LLMClient(url=server.url, key="stub")
+        monkeypatch.setattr(api_call, "get_client", lambda: client)
+        monkeypatch.setattr(api_call, "get_cache", lambda: llm_cache.ResponseCache(directory=tmp_path))
+
+        for _ in range(3):
+            api_call.prompt_model("deterministic", cache_ttl=60)
+        assert server.n_requests == 1
+
+        for _ in range(3):
+            api_call.prompt_model("creative")
+        assert server.n_requests == 4
+
+
+class TestRetries:
+    def test_retries_on_server_errors(self, monkeypatch):
+        monkeypatch.setattr(api_call, "BACKOFF_BASE", 0.01)
+        with StubLLMServer() as server:
+            server.status_codes = [503, 429]
+            client = api_call.LLMClient(url=server.url, key="stub")
+            assert client.prompt("hello") == "echo: hello"
+            assert server.n_requests == 3
+
+    def test_gives_up_after_max_attempts(self, monkeypatch):
+        monkeypatch.setattr(api_call, "BACKOFF_BASE", 0.01)
+        with StubLLMServer() as server:
+            server.status_codes = [500] * 10
+            client = api_call.LLMClient(url=server.url, key="stub", max_attempts=3)
+            with pytest.raises(api_call.LLMError):
+                client.prompt("hello")
+            assert server.n_requests == 3
+
+    def test_client_errors_are_not_retried(self):
+        with StubLLMServer() as server:
+            server.status_codes = [400]
+            client = api_call.LLMClient(url=server.url, key="stub")
+            with pytest.raises(requests.HTTPError):
+                client.prompt("hello")
+            assert server.n_requests == 1
+
+    def test_deadline_bounds_slow_requests(self):
+        with StubLLMServer(latency=1.0) as server:
+            client = api_call.LLMClient(url=server.url, key="stub", max_attempts=10)
+            start = time.perf_counter()
+            with pytest.raises(api_call.LLMError), api_call.deadline(0.3):
+                client.prompt("hello")
+            assert time.perf_counter() - start < 1.0
+
+    def test_nested_deadline_cannot_extend(self):
+        with api_call.deadline(1.0) as outer, api_call.deadline(100.0) as inner:
+            assert inner is outer
+
+
+class TestCircuitBreaker:
+    def test_opens_after_failures_and_fails_fast(self, monkeypatch):
+        monkeypatch.setattr(api_call, "BACKOFF_BASE", 0.0)
+        with StubLLMServer() as server:
+            server.status_codes = [500] * 10
+            breaker = api_call.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+            client = api_call.LLMClient(url=server.url, key="stub", circuit_breaker=breaker)
+
+            with pytest.raises(api_call.CircuitOpenError):
+                client.prompt("hello")
+            assert server.n_requests == 2
+            assert breaker.state == api_call.CircuitState.open
+
+    def test_half_open_trial_closes_on_success(self):
+        breaker = api_call.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        with pytest.raises(api_call.CircuitOpenError):
+            breaker.before_call()
+
+        time.sleep(0.06)
+        breaker.before_call()
+        assert breaker.state == api_call.CircuitState.half_open
+        with pytest.raises(api_call.CircuitOpenError):
+            breaker.before_call()  # only one trial at a time
+
+        breaker.record_success()
+        assert breaker.state == api_call.CircuitState.closed
+
+    def test_deadline_before_sending_ends_the_trial(self):
+        with StubLLMServer() as server:
+            breaker = api_call.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+            client = api_call.LLMClient(url=server.url, key="stub", circuit_breaker=breaker)
+            breaker.record_failure()
+            time.sleep(0.06)
+
+            with pytest.raises(api_call.DeadlineExceeded), api_call.deadline(0):
+                client.prompt("hello")
+            assert server.n_requests == 0
+            assert client.prompt("hello") == "echo: hello"  # the next call gets the trial
+            assert breaker.state == api_call.CircuitState.closed
+
+    def test_malformed_response_ends_the_trial(self, monkeypatch):
+        class Malformed:
+            status_code = 200
+
+            def json(self):
+                return {"candidates": []}
+
+        breaker = api_call.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        client = api_call.LLMClient(url="http://localhost", key="stub", circuit_breaker=breaker)
+        monkeypatch.setattr(client.session, "post", lambda **kwargs: Malformed())
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        with pytest.raises(IndexError):
+            client.prompt("hello")
+        assert breaker.state == api_call.CircuitState.open
+
+        time.sleep(0.06)
+        breaker.before_call()  # a new trial after the reset timeout, not wedged half open
+        assert breaker.state == api_call.CircuitState.half_open
+
+    def test_rate_limit_wait_takes_no_trial(self, tmp_path):
+        limiter = rate_limit.TokenBucketLimiter(
+            state_file=tmp_path / "rate_limit.json", requests_per_minute=1, tokens_per_minute=10_000
+        )
+        assert limiter.acquire(tokens=1)
+        with StubLLMServer() as server:
+            breaker = api_call.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+            client = api_call.LLMClient(url=server.url, key="stub", circuit_breaker=breaker, rate_limiter=limiter)
+            breaker.record_failure()
+            time.sleep(0.06)
+
+            with pytest.raises(api_call.DeadlineExceeded), api_call.deadline(0.1):
+                client.prompt("hello")
+            assert server.n_requests == 0
+            assert breaker.state == api_call.CircuitState.open  # still free for the next call's trial
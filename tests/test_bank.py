@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from who_knew_it import bank, inventory
+
+
+def _bundle(answer: str, n_fake_answers: int = 2) -> inventory.QuestionBundle:
+    return inventory.QuestionBundle(
+        question="What's a real species of bird?",
+        correct_answer=answer,
+        fake_answers=[f"fake\t{i}\nof {answer}" for i in range(n_fake_answers)],
+    )
+
+
+_counter = iter(range(10**6))
+
+
+def _fake_generate(question_type: str, n_fake_answers: int) -> tuple[inventory.QuestionBundle, float]:
+    # runs in the worker processes, the pid keeps answers unique across them
+    return _bundle(f"{question_type} {os.getpid()} {next(_counter)}", n_fake_answers), 0.01
+
+
+def _duplicate_generate(question_type: str, n_fake_answers: int) -> tuple[inventory.QuestionBundle, float]:
+    return _bundle("always the same", n_fake_answers), 0.01
+
+
+class TestBankFile:
+    def test_roundtrip_and_dedupe(self, tmp_path):
+        path = tmp_path / "questions.bank"
+        writer = bank.BankWriter(path)
+        assert writer.append("animal", _bundle("Kea"))
+        assert not writer.append("animal", _bundle(" kea "))  # same answer, normalized
+        assert writer.append("pokemon", _bundle("Kea"))  # other type
+        writer.close()
+
+        question_bank = bank.QuestionBank(path)
+        assert question_bank.counts() == {"animal": 1, "pokemon": 1}
+        sampled = question_bank.sample("animal", n_fake_answers=1)
+        assert sampled == inventory.QuestionBundle(
+            question="What's a real species of bird?", correct_answer="Kea", fake_answers=["fake\t0\nof Kea"]
+        )
+        assert question_bank.sample("animal", n_fake_answers=3) is None
+        assert question_bank.sample("movie", n_fake_answers=1) is None
+        question_bank.close()
+
+    def test_reader_picks_up_appended_entries(self, tmp_path):
+        path = tmp_path / "questions.bank"
+        writer = bank.BankWriter(path)
+        question_bank = bank.QuestionBank(path)
+        assert question_bank.count("animal") == 0
+
+        writer.append("animal", _bundle("Kea"))
+        assert question_bank.count("animal") == 1
+        writer.append("animal", _bundle("Kakapo"))
+        assert question_bank.count("animal") == 2
+        writer.close()
+        question_bank.close()
+
+    def test_resume_drops_cut_off_entry_and_keeps_dedupe_keys(self, tmp_path):
+        path = tmp_path / "questions.bank"
+        writer = bank.BankWriter(path)
+        writer.append("animal", _bundle("Kea"))
+        writer.close()
+        with open(path, "ab") as f:
+            f.write(b"animal\tabc\t{\"question\": \"cut")
+
+        writer = bank.BankWriter(path)
+        assert writer.counts == {"animal": 1}
+        assert not writer.append("animal", _bundle("Kea"))
+        assert writer.append("animal", _bundle("Kakapo"))
+        writer.close()
+        assert bank.QuestionBank(path).count("animal") == 2
+
+    def test_rejects_other_versions(self, tmp_path):
+        path = tmp_path / "questions.bank"
+        path.write_bytes(b"who-knew-it question bank v0\n")
+        with pytest.raises(bank.BankFormatError):
+            bank.BankWriter(path)
+        with pytest.raises(bank.BankFormatError):
+            bank.QuestionBank(path).count("animal")
+
+
+class TestBuild:
+    def test_builds_up_to_count_and_resumes(self, tmp_path):
+        path = tmp_path / "questions.bank"
+        stats = bank.build(["animal", "pokemon"], count=5, workers=2, path=path, generate=_fake_generate)
+        assert stats["animal"].banked == 5
+        assert bank.QuestionBank(path).counts() == {"animal": 5, "pokemon": 5}
+
+        stats = bank.build(["animal", "pokemon"], count=7, workers=2, path=path, generate=_fake_generate)
+        assert stats["animal"].banked == 2  # only the missing ones
+        assert bank.QuestionBank(path).counts() == {"animal": 7, "pokemon": 7}
+
+    def test_gives_up_on_exhausted_type(self, tmp_path):
+        path = tmp_path / "questions.bank"
+        stats = bank.build(["animal"], count=3, workers=1, path=path, generate=_duplicate_generate)
+        assert stats["animal"].banked == 1
+        assert stats["animal"].duplicates == bank.MAX_CONSECUTIVE_MISSES
+        assert bank.QuestionBank(path).count("animal") == 1
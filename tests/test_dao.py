@@ -0,0 +1,65 @@
+import duckdb
+import pytest
+
+from who_knew_it import dao
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    for statement in dao.SCHEMA:
+        dao.run(con, statement)
+    for player_id in ("house_0", "house_1"):
+        dao.run(con, dao.ADD_PLAYER, player_id=player_id, player_name="The House", is_house=True)
+    yield con
+    con.close()
+
+
+class TestDao:
+    def test_game_round_trip(self, con):
+        [(game_id,)] = dao.run(con, dao.CREATE_GAME, game_stage=1)
+        dao.run(con, dao.ADD_PLAYER, player_id="p1", player_name="O'Brien", is_house=False)  # quotes need no escaping
+        for player_id in ("p1", "house_0", "house_1"):
+            dao.run(con, dao.JOIN_GAME, player_id=player_id, game_id=game_id, is_host=player_id == "p1", max_players=5)
+        dao.run(con, dao.ADD_QUESTIONS, game_id=game_id, n_questions=3)
+        dao.run(con, dao.ADD_ANSWERS, game_id=game_id)
+        dao.run(
+            con,
+            dao.SET_FAKE_ANSWERS,
+            game_id=game_id,
+            question_number=1,
+            player_ids=["house_0", "house_1"],
+            answer_texts=["A fish.", "A dance."],
+        )
+        dao.run(con, dao.SET_POINTS, game_id=game_id, question_number=1, player_ids=["p1", "house_0"], points=[2, 1])
+
+        assert dict(dao.run(con, dao.GET_PLAYERS_IN_GAME, game_id=game_id))["p1"] == "O'Brien"
+        assert dao.run(con, dao.GET_GENERATION_PROGRESS, game_id=game_id) == [(1, False), (2, False), (3, False)]
+        assert [
+            (res[0], res[1], res[4]) for res in dao.run(con, dao.GET_ANSWERS, game_id=game_id, question_number=1)
+        ] == [("house_0", "A fish.", True), ("house_1", "A dance.", True), ("p1", None, False)]
+        assert sorted(dao.run(con, dao.GET_TOTAL_POINTS, game_id=game_id, question_number=1)) == [
+            ("house_0", 1, True),
+            ("p1", 2, True),
+        ]
+
+    def test_join_game_respects_max_players(self, con):
+        [(game_id,)] = dao.run(con, dao.CREATE_GAME, game_stage=1)
+        for player_id in ("house_0", "house_1"):
+            dao.run(con, dao.JOIN_GAME, player_id=player_id, game_id=game_id, is_host=False, max_players=1)
+        assert dao.run(con, dao.GET_PLAYERS_IN_GAME, game_id=game_id) == [("house_0", "The House")]
+
+    def test_statements_are_timed(self, con):
+        before = dao.get_stats().get("get_game_stage", dao.StatementStats())
+        dao.run(con, dao.GET_GAME_STAGE, game_id=1)
+        with pytest.raises(duckdb.Error):
+            dao.run(con, dao.GET_GAME_STAGE)  # missing parameter
+
+        after = dao.get_stats()["get_game_stage"]
+        assert after.executions == before.executions + 2
+        assert after.failures == before.failures + 1
+        assert after.max_seconds >= after.total_seconds / after.executions > 0
+
+    def test_names_are_unique(self):
+        with pytest.raises(ValueError):
+            dao._statement("get_question", "SELECT 1;")
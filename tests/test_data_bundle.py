@@ -0,0 +1,65 @@
+import os
+
+from who_knew_it import data_bundle, datasets, random_word
+
+
+def _write_sources(root):
+    (root / "animals").mkdir()
+    (root / "words.txt").write_text("alpha\n\nbeta\n")
+    (root / "animals" / "Fish.csv").write_text('Pike\n"Hacha, Hachita"\nÄsche\n')
+    (root / "animals" / "Birds.csv").write_text("Kea\n")
+
+
+class TestDataBundle:
+    def test_roundtrip(self, tmp_path):
+        _write_sources(tmp_path)
+        path = tmp_path / "datasets.bundle"
+        assert data_bundle.build(path, root=tmp_path) == ["words.txt", "animals/Birds.csv", "animals/Fish.csv"]
+
+        bundle = data_bundle.Bundle(path)
+        fish = bundle.table(tmp_path / "animals" / "Fish.csv", "csv_column", root=tmp_path)
+        assert list(fish) == ["Pike", "Hacha, Hachita", "Äsche"]
+        assert fish[-1] == "Äsche" and fish[1:] == ["Hacha, Hachita", "Äsche"]
+        assert list(bundle.table(tmp_path / "words.txt", "lines", root=tmp_path)) == ["alpha", "beta"]
+        assert bundle.table(tmp_path / "words.txt", "csv_column", root=tmp_path) is None
+        assert bundle.table(tmp_path / "other.txt", "lines", root=tmp_path) is None
+
+    def test_rebuilds_only_changed_sources(self, tmp_path):
+        _write_sources(tmp_path)
+        path = tmp_path / "datasets.bundle"
+        data_bundle.build(path, root=tmp_path)
+        assert data_bundle.build(path, root=tmp_path) == []
+
+        words = tmp_path / "words.txt"
+        os.utime(words, ns=(0, words.stat().st_mtime_ns + 1_000_000))  # touched, same content
+        assert data_bundle.build(path, root=tmp_path) == []
+        assert data_bundle.Bundle(path).table(words, "lines", root=tmp_path) is not None
+
+        words.write_text("gamma\n")
+        os.utime(words, ns=(0, words.stat().st_mtime_ns + 2_000_000))
+        stale = data_bundle.Bundle(path)
+        assert stale.table(words, "lines", root=tmp_path) is None  # falls back to the text file
+        assert data_bundle.build(path, root=tmp_path) == ["words.txt"]
+
+        bundle = data_bundle.Bundle(path)
+        assert list(bundle.table(words, "lines", root=tmp_path)) == ["gamma"]
+        assert list(bundle.table(tmp_path / "animals" / "Birds.csv", "csv_column", root=tmp_path)) == ["Kea"]
+        assert list(stale.table(tmp_path / "animals" / "Birds.csv", "csv_column", root=tmp_path)) == ["Kea"]
+
+    def test_ignores_other_versions(self, tmp_path):
+        path = tmp_path / "datasets.bundle"
+        path.write_bytes(data_bundle.HEADER.pack(data_bundle.MAGIC, data_bundle.FORMAT_VERSION + 1, 0, 0))
+        assert data_bundle.open_bundle(path) is None
+        path.write_bytes(b"")
+        assert data_bundle.open_bundle(path) is None
+
+    def test_datasets_read_from_bundle(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(data_bundle, "BUNDLE_FILE", tmp_path / "datasets.bundle")
+        data_bundle.build(data_bundle.BUNDLE_FILE)
+        datasets.clear()
+        try:
+            words = datasets.lines(random_word.WORDS_FILE)
+            assert isinstance(words, data_bundle.StringTable)
+            assert list(words) == list(data_bundle.read_lines(random_word.WORDS_FILE))
+        finally:
+            datasets.clear()
@@ -0,0 +1,56 @@
+import os
+
+from who_knew_it import datasets, name_generation, random_word
+from who_knew_it.animal_question import ANIMALS_FOLDER, AnimalQuestionGenerator
+
+
+class TestDatasets:
+    def test_loads_once(self, tmp_path):
+        path = tmp_path / "words.txt"
+        path.write_text("alpha\n\nbeta\n")
+        first = datasets.lines(path)
+        assert first == ("alpha", "beta")
+
+        path.write_text("gamma\n")
+        assert datasets.lines(path) is first  # not read again
+
+    def test_reloads_on_change_when_enabled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(datasets, "RELOAD_ON_CHANGE", True)
+        path = tmp_path / "words.txt"
+        path.write_text("alpha\n")
+        assert datasets.lines(path) == ("alpha",)
+
+        path.write_text("gamma\n")
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))  # coarse filesystem timestamps
+        assert datasets.lines(path) == ("gamma",)
+
+    def test_csv_column_handles_quotes(self, tmp_path):
+        path = tmp_path / "fish.csv"
+        path.write_text('Pike\n"Hacha, Hachita"\n')
+        assert datasets.csv_column(path) == ("Pike", "Hacha, Hachita")
+
+    def test_shipped_word_lists(self):
+        assert random_word.get_random_word() in datasets.lines(random_word.WORDS_FILE)
+        assert len(datasets.lines(random_word.WORDS_FILE)) == 10000
+        big_word, wet_word = name_generation.generate_player_name().split(" ", 1)
+        assert big_word in name_generation.big_related_words()
+
+    def test_line_index_samples_distinct_rows(self, tmp_path):
+        path = tmp_path / "fish.csv"
+        path.write_bytes(b'Pike\r\n\n"Hacha, Hachita"\nCarp')  # no trailing newline
+        index = datasets.line_index(path)
+        assert len(index) == 3
+        assert [index.line(i) for i in range(3)] == ["Pike", '"Hacha, Hachita"', "Carp"]
+        assert sorted(datasets.sample_csv_column(path, 3)) == ["Carp", "Hacha, Hachita", "Pike"]
+        assert datasets.line_index(path) is index
+
+    def test_line_index_of_empty_file(self, tmp_path):
+        path = tmp_path / "empty.csv"
+        path.write_bytes(b"")
+        assert len(datasets.line_index(path)) == 0
+
+    def test_shipped_animal_groups(self):
+        group, species = AnimalQuestionGenerator._random_animal_group_and_species()
+        group_file = ANIMALS_FOLDER / f"{group.replace(' ', '-')}.csv"
+        assert len(species) == len(set(species)) == 50
+        assert set(species) <= set(datasets.csv_column(group_file))
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from who_knew_it import game_events
+
+
+class TestGameEvents:
+    def test_pollers_only_see_changes_once(self):
+        seen: dict = {}
+        assert game_events.changed(1001, seen, poller="stage")  # a new poller always looks once
+        assert not game_events.changed(1001, seen, poller="stage")
+        assert game_events.changed(1001, seen, poller="players")  # pollers are tracked separately
+
+        game_events.bump(1001)
+        assert game_events.changed(1001, seen, poller="stage")
+        assert not game_events.changed(1001, seen, poller="stage")
+        assert not game_events.changed(1002, {"stage_seen_version_1002": 0}, poller="stage")
+
+    def test_bump_all_and_forget(self):
+        seen: dict = {}
+        game_events.bump(1003)
+        game_events.changed(1003, seen, poller="stage")
+        game_events.bump_all()
+        assert game_events.changed(1003, seen, poller="stage")
+
+        game_events.forget(1003)
+        assert game_events.version(1003) == 0
+        assert game_events.changed(1003, seen, poller="stage")  # closing the game is a change as well
+
+    def test_wait_wakes_on_write(self):
+        written = []
+
+        def write() -> None:
+            time.sleep(0.05)
+            written.append("question")
+            game_events.bump(1004)
+
+        threading.Thread(target=write).start()
+        start = time.monotonic()
+        assert game_events.wait_until(1004, lambda: bool(written), timeout=5)
+        assert time.monotonic() - start < 1
+
+    def test_wait_ignores_unrelated_writes_and_times_out(self):
+        checks = []
+
+        def condition() -> bool:
+            checks.append(1)
+            return False
+
+        threading.Timer(0.05, game_events.bump, args=(1006,)).start()  # another game
+        assert not game_events.wait_until(1005, condition, timeout=0.2)
+        assert len(checks) == 1
+
+    def test_wait_gives_up_when_game_is_closed(self):
+        game_events.bump(1007)
+        threading.Timer(0.05, game_events.forget, args=(1007,)).start()
+        start = time.monotonic()
+        assert not game_events.wait_until(1007, lambda: False, timeout=5)
+        assert time.monotonic() - start < 1
+
+    def test_wait_on_closed_game_returns_right_away(self):
+        game_events.bump(1008)
+        game_events.forget(1008)
+        start = time.monotonic()
+        assert not game_events.wait_until(1008, lambda: False, timeout=5)
+        assert game_events.wait_until(1008, lambda: True, timeout=5)
+        assert time.monotonic() - start < 1
+
+        game_events.bump(1008)  # a job of the closed game finishing late
+        assert 1008 not in game_events._games
@@ -0,0 +1,125 @@
+import duckdb
+import pytest
+
+from who_knew_it import dao, game_store
+
+
+@pytest.fixture(params=game_store.ENGINES)
+def store(request):
+    con = duckdb.connect()
+    for statement in dao.SCHEMA:
+        dao.run(con, statement)
+    store = game_store.open_store(request.param, connect=con.cursor, write_attempts=3)
+    for player_id in ("house_0", "house_1"):
+        store.add_player(player_id, "The House", is_house=True)
+    yield store
+    con.close()
+
+
+def _game(store: game_store.GameStore, players: list[str]) -> int:
+    game_id = store.create_game(game_stage=1)
+    for i, player_id in enumerate(players):
+        store.add_player(player_id, f"Player {i}")
+    for player_id in [*players, "house_0", "house_1"]:
+        store.join_game(player_id, game_id, is_host=player_id == players[0], max_players=5)
+    assert store.add_questions(game_id, n_questions=3) == 3
+    assert store.add_questions(game_id, n_questions=3) == 0
+    store.add_answers(game_id)
+    return game_id
+
+
+class TestGameStore:
+    """Both engines behave the same."""
+
+    def test_players_and_games(self, store):
+        game_id = _game(store, ["p1", "p2"])
+        store.set_player_name("p2", "O'Brien")
+
+        assert store.get_player_name("p2") == "O'Brien"
+        assert store.get_player_name("nobody") is None
+        assert store.get_players_in_game(game_id) == {
+            "p1": "Player 0",
+            "p2": "O'Brien",
+            "house_0": "The House",
+            "house_1": "The House",
+        }
+        assert store.get_games_of_player("p2") == [game_id]
+        assert store.get_hosts(game_id) == ["p1"]
+        assert store.is_host("p1", game_id) and not store.is_host("p2", game_id)
+        assert store.count_human_players(game_id) == 2
+
+        store.set_game_stage(game_id, 2)
+        assert store.get_game_stage(game_id) == 2
+        assert store.get_games_in_stage(2) == [game_id]
+
+    def test_join_game_respects_max_players(self, store):
+        game_id = store.create_game(game_stage=1)
+        for player_id in ("house_0", "house_1"):
+            store.join_game(player_id, game_id, is_host=False, max_players=1)
+        assert list(store.get_players_in_game(game_id)) == ["house_0"]
+
+    def test_questions(self, store):
+        game_id = _game(store, ["p1"])
+        store.set_question(game_id, 1, question="What is a quokka?", correct_answer="A small wallaby.")
+        store.set_fake_answers(game_id, 1, {"house_0": "A fish.", "house_1": "A dance."})
+        store.set_is_answered(game_id, 1)
+
+        question = store.get_question(game_id, 1)
+        assert question is not None
+        assert (question.question, question.correct_answer, question.is_answered) == (
+            "What is a quokka?",
+            "A small wallaby.",
+            True,
+        )
+        assert 0 <= question.correct_answer_rank < 1
+        assert store.get_question(game_id, 4) is None
+        assert store.get_first_unanswered_question_number(game_id) == 2
+        assert store.get_generation_progress(game_id) == {1: True, 2: False, 3: False}
+
+        assert store.assign_question_type(game_id, 2, "animal") == "animal"
+        assert store.assign_question_type(game_id, 2, "movie") == "animal"  # the first assignment counts
+        assert store.get_question_types(game_id) == {1: None, 2: "animal", 3: None}
+
+    def test_answers_and_points(self, store):
+        game_id = _game(store, ["p1", "p2"])
+        store.set_fake_answers(game_id, 1, {"house_0": "A fish.", "house_1": "A dance."})
+        store.set_answer(game_id, 1, "p1", "A bird.")
+        store.set_chosen_answer(game_id, 1, "p1", "house_0")
+        store.set_points(game_id, 1, {"p1": 0, "p2": 1, "house_0": 1})
+        store.set_points(game_id, 1, {"p2": 2})
+        store.set_points(game_id, 2, {"p2": 1})
+
+        answers = store.get_answers(game_id, 1)
+        assert [(a.player_id, a.answer_text, a.player_id_of_chosen_answer, a.is_house) for a in answers] == [
+            ("house_0", "A fish.", None, True),
+            ("house_1", "A dance.", None, True),
+            ("p1", "A bird.", "house_0", False),
+            ("p2", None, None, False),
+        ]
+
+        state = store.read_question_state(game_id, 1)
+        assert state.answers == answers
+        assert state.total_points == {"p1": 0, "p2": 3, "house_0": 1}
+        assert state.points_entered
+        assert not store.read_question_state(game_id, 3).points_entered
+
+    def test_remove_player_and_delete_game(self, store):
+        game_id = _game(store, ["p1", "p2"])
+        store.set_points(game_id, 1, {"p2": 1})
+        store.remove_player("p2", game_id)
+
+        state = store.read_question_state(game_id, 1)
+        assert "p2" not in state.players
+        assert "p2" not in {answer.player_id for answer in state.answers}
+        assert state.total_points == {}
+
+        store.delete_game(game_id)
+        assert store.get_game_stage(game_id) is None
+        assert store.get_games_of_player("p1") == []
+        assert store.read_question_state(game_id, 1) == game_store.QuestionState(
+            question=None, players={}, answers=[], total_points={}, points_entered=False
+        )
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            game_store.open_store("sqlite", connect=duckdb.connect, write_attempts=1)
@@ -0,0 +1,122 @@
+import threading
+import time
+
+from who_knew_it import api_call, generation, rate_limit
+
+
+class _InMemoryQueue:
+    def __init__(self) -> None:
+        self.queued: list[generation.Job] = []
+        self.finished: dict[str, generation.JobStatus] = {}
+        self.finished_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job: generation.Job) -> None:
+        with self._lock:
+            self.queued.append(job)
+
+    def claim(self) -> generation.Job | None:
+        with self._lock:
+            return self.queued.pop(0) if self.queued else None
+
+    def finish(self, job: generation.Job, status: generation.JobStatus, error: str | None) -> None:
+        with self._lock:
+            self.finished[job.key] = status
+        self.finished_event.set()
+
+
+def _job(question_number: int, kind: generation.JobKind = generation.JobKind.question) -> generation.Job:
+    return generation.Job(game_id=1, question_number=question_number, kind=kind, priority=rate_limit.Priority.prefetch)
+
+
+class TestJobWorkers:
+    def test_runs_jobs_and_records_failures(self):
+        queue = _InMemoryQueue()
+        priorities = []
+
+        def run(job: generation.Job) -> None:
+            priorities.append(api_call._current_priority.get())
+            if job.question_number == 2:
+                raise ValueError("generation failed")
+
+        for question_number in range(1, 4):
+            queue.enqueue(_job(question_number))
+
+        workers = generation.JobWorkers(claim=queue.claim, run=run, finish=queue.finish, n_workers=2)
+        workers.start()
+        try:
+            deadline = time.monotonic() + 5
+            while len(queue.finished) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            workers.stop(timeout=5)
+
+        assert queue.finished == {
+            "1:1:question": generation.JobStatus.done,
+            "1:2:question": generation.JobStatus.failed,
+            "1:3:question": generation.JobStatus.done,
+        }
+        assert priorities == [rate_limit.Priority.prefetch] * 3
+
+    def test_notify_wakes_idle_worker_before_poll_interval(self):
+        queue = _InMemoryQueue()
+        workers = generation.JobWorkers(
+            claim=queue.claim, run=lambda job: None, finish=queue.finish, n_workers=1, poll_interval=10
+        )
+        workers.start()
+        try:
+            time.sleep(0.05)  # the worker is waiting now
+            queue.enqueue(_job(1, generation.JobKind.fake_answers))
+            start = time.perf_counter()
+            workers.notify()
+            assert queue.finished_event.wait(timeout=5)
+            assert time.perf_counter() - start < 1
+        finally:
+            workers.stop(timeout=5)
+
+    def test_claim_errors_dont_kill_workers(self):
+        queue = _InMemoryQueue()
+        n_claims = [0]
+
+        def flaky_claim() -> generation.Job | None:
+            n_claims[0] += 1
+            if n_claims[0] == 1:
+                raise RuntimeError("database hiccup")
+            return queue.claim()
+
+        queue.enqueue(_job(1))
+        workers = generation.JobWorkers(
+            claim=flaky_claim, run=lambda job: None, finish=queue.finish, n_workers=1, poll_interval=0.01
+        )
+        workers.start()
+        try:
+            assert queue.finished_event.wait(timeout=5)
+        finally:
+            workers.stop(timeout=5)
+        assert queue.finished == {"1:1:question": generation.JobStatus.done}
+
+    def test_idle_workers_dont_poll_the_queue(self):
+        queue = _InMemoryQueue()
+        n_claims = [0]
+
+        def counting_claim() -> generation.Job | None:
+            n_claims[0] += 1
+            return queue.claim()
+
+        workers = generation.JobWorkers(
+            claim=counting_claim, run=lambda job: None, finish=queue.finish, n_workers=4, poll_interval=10
+        )
+        workers.start()
+        try:
+            time.sleep(0.2)
+            assert n_claims[0] == 1  # one claimer, waiting for a notification
+
+            for question_number in range(1, 7):
+                queue.enqueue(_job(question_number))
+            workers.notify()
+            deadline = time.monotonic() + 5
+            while len(queue.finished) < 6 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            workers.stop(timeout=5)
+        assert len(queue.finished) == 6
@@ -0,0 +1,131 @@
+import threading
+import time
+
+from who_knew_it import inventory
+
+
+class _InMemoryInventory:
+    def __init__(self) -> None:
+        self.bundles: dict[str, list[inventory.QuestionBundle]] = {}
+        self._lock = threading.Lock()
+
+    def count(self, question_type: str) -> int:
+        with self._lock:
+            return len(self.bundles.get(question_type, []))
+
+    def put(self, question_type: str, bundle: inventory.QuestionBundle) -> None:
+        with self._lock:
+            self.bundles.setdefault(question_type, []).append(bundle)
+
+    def claim(self, question_type: str) -> inventory.QuestionBundle | None:
+        with self._lock:
+            bundles = self.bundles.get(question_type, [])
+            return bundles.pop(0) if bundles else None
+
+
+def _generate(question_type: str) -> inventory.QuestionBundle:
+    return inventory.QuestionBundle(question=f"{question_type}?", correct_answer="correct", fake_answers=["a", "b"])
+
+
+def _wait_until(condition, timeout: float = 5) -> bool:
+    give_up_at = time.monotonic() + timeout
+    while not condition() and time.monotonic() < give_up_at:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestRefiller:
+    def test_fills_every_type_up_to_low_water_mark(self):
+        store = _InMemoryInventory()
+        refiller = inventory.Refiller(
+            question_types=["test_fill_a", "test_fill_b"],
+            count=store.count,
+            generate=_generate,
+            put=store.put,
+            low_water_mark=3,
+            poll_interval=10,
+        )
+        refiller.start()
+        try:
+            assert _wait_until(lambda: store.count("test_fill_a") == 3 and store.count("test_fill_b") == 3)
+            time.sleep(0.1)
+            assert store.count("test_fill_a") == 3  # doesn't overfill
+        finally:
+            refiller.stop(timeout=5)
+
+    def test_on_demand_waits_for_the_first_claim(self):
+        store = _InMemoryInventory()
+        refiller = inventory.Refiller(
+            question_types=["test_demand_a", "test_demand_b"],
+            count=store.count,
+            generate=_generate,
+            put=store.put,
+            low_water_mark=2,
+            poll_interval=10,
+            on_demand=True,
+        )
+        refiller.start()
+        try:
+            time.sleep(0.1)
+            assert store.bundles == {}  # a fresh server doesn't generate anything
+
+            assert store.claim("test_demand_a") is None
+            refiller.demand("test_demand_a")
+            assert _wait_until(lambda: store.count("test_demand_a") == 2)
+            assert store.count("test_demand_b") == 0
+        finally:
+            refiller.stop(timeout=5)
+
+    def test_claim_and_notify_refills_and_records_lag(self):
+        store = _InMemoryInventory()
+        refiller = inventory.Refiller(
+            question_types=["test_lag"], count=store.count, generate=_generate, put=store.put, low_water_mark=1,
+            poll_interval=10,
+        )
+        refiller.start()
+        try:
+            assert _wait_until(lambda: store.count("test_lag") == 1)
+            bundle = store.claim("test_lag")
+            inventory.record_claim("test_lag", hit=bundle is not None)
+            inventory.record_claim("test_lag", hit=store.claim("test_lag") is not None)
+            refiller.notify()
+            assert _wait_until(lambda: inventory.get_stats()["test_lag"].n_refill_lags >= 2)
+        finally:
+            refiller.stop(timeout=5)
+
+        stats = inventory.get_stats()["test_lag"]
+        assert stats.hit_rate == 0.5
+        assert stats.mean_refill_lag is not None and stats.mean_refill_lag < 1
+
+    def test_generation_errors_back_off(self):
+        store = _InMemoryInventory()
+        n_calls = [0]
+
+        def failing_generate(question_type: str) -> inventory.QuestionBundle:
+            n_calls[0] += 1
+            raise RuntimeError("model is down")
+
+        refiller = inventory.Refiller(
+            question_types=["test_errors"], count=store.count, generate=failing_generate, put=store.put,
+            low_water_mark=1, error_backoff=10,
+        )
+        refiller.start()
+        try:
+            time.sleep(0.1)
+            refiller.notify()  # claims don't cut the backoff short
+            time.sleep(0.1)
+        finally:
+            refiller.stop(timeout=5)
+
+        assert n_calls[0] == 1
+        assert inventory.get_stats()["test_errors"].refill_errors == 1
+
+    def test_zero_low_water_mark_disables_refilling(self):
+        store = _InMemoryInventory()
+        refiller = inventory.Refiller(
+            question_types=["test_disabled"], count=store.count, generate=_generate, put=store.put, low_water_mark=0
+        )
+        refiller.start()
+        time.sleep(0.05)
+        refiller.stop(timeout=5)
+        assert store.count("test_disabled") == 0
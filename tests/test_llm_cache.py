@@ -0,0 +1,52 @@
+import os
+import time
+
+from who_knew_it import llm_cache
+
+
+class TestResponseCache:
+    def test_miss_then_hit(self, tmp_path):
+        cache = llm_cache.ResponseCache(directory=tmp_path)
+        assert cache.get(model="m", prompt="p", ttl=60) is None
+
+        cache.put(model="m", prompt="p", response="r")
+        assert cache.get(model="m", prompt="p", ttl=60) == "r"
+        assert cache.get(model="other", prompt="p", ttl=60) is None
+
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 2
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        cache = llm_cache.ResponseCache(directory=tmp_path)
+        cache.put(model="m", prompt="p", response="r")
+        time.sleep(0.01)
+
+        assert cache.get(model="m", prompt="p", ttl=0) is None
+        assert cache.stats.expired == 1
+        assert cache.get(model="m", prompt="p", ttl=60) is None  # expired entries are removed
+
+    def test_broken_entry_is_a_miss_and_removed(self, tmp_path):
+        cache = llm_cache.ResponseCache(directory=tmp_path)
+        path = cache._path(llm_cache.cache_key("m", "p"))
+        for broken in ['{"model": "m", "crea', '{"model": "m"}', '["m"]', '{"created": "yesterday", "response": "r"}']:
+            cache.put(model="m", prompt="p", response="r")
+            path.write_text(broken)
+            assert cache.get(model="m", prompt="p", ttl=60) is None
+            assert not path.exists()
+        assert cache.stats.misses == 4
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        cache = llm_cache.ResponseCache(directory=tmp_path, max_bytes=1000)
+        for i in range(4):
+            cache.put(model="m", prompt=f"p{i}", response="x" * 150)
+            path = cache._path(llm_cache.cache_key("m", f"p{i}"))
+            os.utime(path, (i, i))  # deterministic access order
+
+        assert cache.get(model="m", prompt="p0", ttl=1e12) == "x" * 150  # p0 becomes most recently used
+
+        for i in range(4, 6):
+            cache.put(model="m", prompt=f"p{i}", response="x" * 150)
+
+        assert cache.stats.evictions > 0
+        assert cache.get(model="m", prompt="p0", ttl=1e12) is not None
+        assert cache.get(model="m", prompt="p1", ttl=1e12) is None
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+from who_knew_it import question_types, questions
+
+# generator dependencies a fresh server process must not import before the first game needs them
+LAZY_MODULES = {
+    "arxiv",
+    "imdb",
+    "pandas",
+    "who_knew_it.animal_question",
+    "who_knew_it.arxiv_question",
+    "who_knew_it.movie_suggestion",
+    "who_knew_it.podcast_question",
+    "who_knew_it.pokemon_question",
+    "who_knew_it.scoring",
+    "who_knew_it.word_definition_question",
+}
+OWN_IMPORT_TIME_BUDGET = 0.1  # seconds spent in the who_knew_it modules themselves, third party ones excluded
+
+
+def _import_times(module: str) -> dict[str, float]:
+    """Self time in seconds of every module imported by a fresh interpreter importing module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(self_us) / 1e6
+    return times
+
+
+class TestQuestionTypes:
+    def test_every_type_has_a_generator(self):
+        assert set(question_types.GENERATORS) == set(question_types.QuestionType)
+        for question_type in question_types.QuestionType:
+            assert isinstance(question_types.get_generator(question_type), questions.QuestionGenerator)
+
+    def test_rotation(self):
+        assert question_types.question_type_for_number(1) == question_types.QuestionType.animal
+        assert question_types.question_type_for_number(6) == question_types.QuestionType.movie
+
+    def test_app_imports_generators_lazily(self):
+        times = _import_times("who_knew_it.streamlit_app")
+        assert "who_knew_it.streamlit_app" in times
+        assert not LAZY_MODULES & set(times)
+        own_time = sum(t for name, t in times.items() if name.startswith("who_knew_it"))
+        assert own_time < OWN_IMPORT_TIME_BUDGET
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from who_knew_it import api_call, questions
+
+
+class _FixedQuestion(questions.Question):
+    def get_correct_answer(self) -> str:
+        return "correct"
+
+    def question_text(self) -> str:
+        return "question?"
+
+
+class _SlowGenerator(questions.QuestionGenerator):
+    def generate_question_and_correct_answer(self) -> questions.Question:
+        time.sleep(0.2)
+        return _FixedQuestion()
+
+    def write_fake_answers(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
+        time.sleep(0.2)
+        return [f"fake {i}" for i in range(n_fake_answers)]
+
+
+class TestQuestionGeneratorAsync:
+    def test_async_methods_match_sync(self):
+        generator = _SlowGenerator()
+        question = questions.run_sync(generator.generate_question_and_correct_answer_async())
+        fake_answers = questions.run_sync(
+            generator.write_fake_answers_async(question="question?", correct_answer="correct", n_fake_answers=3)
+        )
+        assert question.get_correct_answer() == "correct"
+        assert fake_answers == ["fake 0", "fake 1", "fake 2"]
+
+    def test_async_methods_overlap(self):
+        async def generate_many() -> list[questions.Question]:
+            return await asyncio.gather(
+                *(_SlowGenerator().generate_question_and_correct_answer_async() for _ in range(4))
+            )
+
+        start = time.perf_counter()
+        generated = questions.run_sync(generate_many())
+        assert len(generated) == 4
+        assert time.perf_counter() - start < 0.6
+
+
+def test_run_sync_inside_event_loop_raises():
+    async def nested() -> None:
+        questions.run_sync(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(nested())
+
+
+
+class TestCollectFakeAnswers:
+    def test_tops_up_only_missing_answers(self):
+        responses = [["Real One", "Fakemon", "fakemon", ""], ["Anothermon", "Lastmon"]]
+        requests = []
+
+        def request_answers(n_missing: int, accepted: list[str]) -> list[str] | None:
+            requests.append((n_missing, accepted))
+            return responses.pop(0)
+
+        answers = questions.collect_fake_answers(
+            request_answers,
+            n_fake_answers=3,
+            site="test.top_up",
+            is_valid=lambda answer: answer != "Real One",
+        )
+
+        assert answers == ["Fakemon", "Anothermon", "Lastmon"]
+        assert requests == [(3, []), (2, ["Fakemon"])]
+
+        stats = questions.get_fake_answer_stats()["test.top_up"]
+        assert stats.calls == 2
+        assert stats.accepted == 3
+        assert stats.rejected == 1  # "Real One", the duplicate and the empty answer aren't checked
+
+    def test_unparseable_response_is_retried(self):
+        responses: list[list[str] | None] = [None, ["a", "b"]]
+        answers = questions.collect_fake_answers(lambda n, accepted: responses.pop(0), n_fake_answers=2, site="test.none")
+        assert answers == ["a", "b"]
+
+    def test_gives_up_after_max_rounds(self):
+        requests = []
+
+        def request_answers(n_missing: int, accepted: list[str]) -> list[str] | None:
+            requests.append(n_missing)
+            return ["Real One", "Real One"]
+
+        with pytest.raises(api_call.LLMError):
+            questions.collect_fake_answers(
+                request_answers,
+                n_fake_answers=2,
+                site="test.invalid",
+                is_valid=lambda answer: answer != "Real One",
+                max_rounds=3,
+            )
+        assert requests == [2, 2, 2]
+        stats = questions.get_fake_answer_stats()["test.invalid"]
+        assert (stats.calls, stats.accepted, stats.rejected) == (3, 0, 6)
@@ -0,0 +1,70 @@
+import multiprocessing
+import threading
+import time
+
+from who_knew_it import rate_limit
+
+
+def _acquire_in_other_process(state_file, n: int) -> None:
+    limiter = rate_limit.TokenBucketLimiter(state_file=state_file, requests_per_minute=6, tokens_per_minute=10_000)
+    for _ in range(n):
+        limiter.acquire(tokens=1)
+
+
+class TestTokenBucketLimiter:
+    def test_burst_up_to_capacity_then_waits(self, tmp_path):
+        limiter = rate_limit.TokenBucketLimiter(
+            state_file=tmp_path / "state.bin", requests_per_minute=60, tokens_per_minute=100_000
+        )
+        start = time.perf_counter()
+        for _ in range(60):
+            assert limiter.acquire(tokens=1, timeout=0)
+        assert time.perf_counter() - start < 1.0
+
+        assert not limiter.acquire(tokens=1, timeout=0)
+        assert limiter.acquire(tokens=1, timeout=1.5)  # refills at 1 request per second
+        assert limiter.stats[rate_limit.Priority.live].timed_out == 1
+
+    def test_token_bucket_limits_large_prompts(self, tmp_path):
+        limiter = rate_limit.TokenBucketLimiter(
+            state_file=tmp_path / "state.bin", requests_per_minute=1000, tokens_per_minute=6000
+        )
+        assert limiter.acquire(tokens=5000, timeout=0)
+        assert not limiter.acquire(tokens=5000, timeout=0)
+
+    def test_prefetch_leaves_reserve_for_live(self, tmp_path):
+        limiter = rate_limit.TokenBucketLimiter(
+            state_file=tmp_path / "state.bin", requests_per_minute=8, tokens_per_minute=100_000
+        )
+        prefetched = 0
+        while limiter.acquire(tokens=1, priority=rate_limit.Priority.prefetch, timeout=0):
+            prefetched += 1
+        assert prefetched == 6
+
+        assert limiter.acquire(tokens=1, priority=rate_limit.Priority.live, timeout=0)
+
+    def test_shared_across_threads(self, tmp_path):
+        limiter = rate_limit.TokenBucketLimiter(
+            state_file=tmp_path / "state.bin", requests_per_minute=20, tokens_per_minute=100_000
+        )
+        acquired = []
+
+        def worker() -> None:
+            while limiter.acquire(tokens=1, timeout=0):
+                acquired.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(acquired) == 20
+
+    def test_shared_across_processes(self, tmp_path):
+        state_file = tmp_path / "state.bin"
+        process = multiprocessing.get_context("spawn").Process(target=_acquire_in_other_process, args=(state_file, 6))
+        process.start()
+        process.join()
+
+        limiter = rate_limit.TokenBucketLimiter(state_file=state_file, requests_per_minute=6, tokens_per_minute=10_000)
+        assert not limiter.acquire(tokens=1, timeout=0)
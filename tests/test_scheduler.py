@@ -0,0 +1,83 @@
+import pytest
+
+from who_knew_it import question_types, scheduler
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(scheduler, "_stats", {})
+
+
+def _latency_aware(**weights: float) -> scheduler.LatencyAwareScheduler:
+    return scheduler.LatencyAwareScheduler(weights=weights, live_budget=20.0, round_duration=90.0)
+
+
+class TestStats:
+    def test_moving_averages(self):
+        scheduler.record("movie", 10.0, succeeded=True)
+        scheduler.record("movie", 20.0, succeeded=True)
+        scheduler.record("movie", 100.0, succeeded=False)
+        stats = scheduler.get_stats()["movie"]
+        assert stats.latency == pytest.approx(12.0)  # failures don't count towards the latency
+        assert stats.failure_rate == pytest.approx(0.2)
+        assert stats.expected_latency == pytest.approx(15.0)
+        assert stats.generations == 3
+
+    def test_measure_records_failures(self):
+        with pytest.raises(RuntimeError):
+            with scheduler.measure("arxiv"):
+                raise RuntimeError("arxiv is down")
+        assert scheduler.get_stats()["arxiv"].failure_rate == pytest.approx(scheduler.SMOOTHING)
+
+
+class TestLatencyAwareScheduler:
+    def test_picks_types_that_are_ready_in_time(self):
+        scheduler.record("movie", 60.0, succeeded=True)
+        scheduler.record("animal", 5.0, succeeded=True)
+        chooser = _latency_aware(movie=1, animal=1)
+        assert {chooser.choose(6, chooser.budget(0), {}, []) for _ in range(50)} == {"animal"}
+        assert {chooser.choose(6, chooser.budget(1), {}, []) for _ in range(50)} == {"animal", "movie"}
+
+    def test_inventory_makes_slow_types_ready(self):
+        scheduler.record("movie", 60.0, succeeded=True)
+        scheduler.record("animal", 5.0, succeeded=True)
+        chooser = _latency_aware(movie=1, animal=1)
+        assert {chooser.choose(6, chooser.budget(0), {"movie": 1}, []) for _ in range(50)} == {"animal", "movie"}
+
+    def test_prefers_unused_types_and_falls_back_to_fastest(self):
+        scheduler.record("movie", 60.0, succeeded=True)
+        scheduler.record("animal", 30.0, succeeded=True)
+        chooser = _latency_aware(movie=1, animal=1, pokemon=0)
+        assert chooser.choose(6, 1.0, {}, ["movie"]) == "animal"
+        assert chooser.choose(6, 1000.0, {}, ["animal"]) == "movie"
+        assert chooser.choose(6, 1.0, {}, ["movie", "animal"]) == "animal"  # nothing fits, fastest
+
+
+class TestLoad:
+    def test_defaults_without_config(self, tmp_path):
+        chooser = scheduler.load(tmp_path / "missing.yaml")
+        assert isinstance(chooser, scheduler.LatencyAwareScheduler)
+        assert set(chooser.weights) == set(question_types.QuestionType)
+
+    def test_rotation_without_turned_off_types(self, tmp_path):
+        path = tmp_path / "scheduler.yaml"
+        path.write_text("strategy: rotation\nweights:\n  movie: 0\n  arxiv: 0\n")
+        chooser = scheduler.load(path)
+        assert [chooser.choose(n, 0.0, {}, []) for n in range(1, 5)] == [
+            "word_definition",
+            "pokemon",
+            "podcast",
+            "animal",
+        ]
+
+    def test_rejects_unknown_types_and_strategies(self, tmp_path):
+        path = tmp_path / "scheduler.yaml"
+        path.write_text("weights:\n  dinosaur: 1\n")
+        with pytest.raises(ValueError):
+            scheduler.load(path)
+        path.write_text("strategy: fastest\n")
+        with pytest.raises(ValueError):
+            scheduler.load(path)
+
+    def test_shipped_config(self):
+        assert isinstance(scheduler.load(scheduler.CONFIG_FILE), scheduler.LatencyAwareScheduler)
@@ -0,0 +1,51 @@
+import array
+import collections
+
+import pytest
+
+from who_knew_it import scoring
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(scoring, "SCORES_FOLDER", tmp_path / "scores")
+    source = tmp_path / "animals.csv"
+    source.write_text('Purple Frog\n"Hacha, Hachita"\nKea\nKakapo\nTakahe\n')
+    return scoring.Dataset(name="test-animals", source=source, criteria="how funny it is.")
+
+
+class TestScoring:
+    def test_rows_handle_quoted_csv(self, dataset):
+        assert scoring.rows(dataset)[1] == "Hacha, Hachita"
+
+    def test_scores_in_batches_and_resumes(self, dataset, monkeypatch):
+        batches = []
+
+        def score_batch(dataset, batch):
+            batches.append(batch)
+            return None if batch == ["Takahe"] else [len(row) % 10 for row in batch]
+
+        monkeypatch.setattr(scoring, "score_batch", score_batch)
+        scores = scoring.score_dataset(dataset, batch_size=2)
+        assert list(scores) == [1, 4, 3, 6, scoring.UNSCORED]
+        assert scoring.load_scores(dataset) == scores
+
+        batches.clear()
+        scoring.score_dataset(dataset, batch_size=2)
+        assert batches == [["Takahe"]]  # only the failed batch again
+
+    def test_changed_source_invalidates_scores(self, dataset):
+        scoring.save_scores(dataset, array.array("B", [9] * 5))
+        assert scoring.load_scores(dataset) is not None
+        dataset.source.write_text(dataset.source.read_text() + "Tuatara\n")
+        assert scoring.load_scores(dataset) is None
+
+    def test_weighted_sample_skips_low_scores(self, dataset):
+        assert scoring.weighted_sample(dataset) is None
+        scoring._cumulative_weights.cache_clear()
+
+        scoring.save_scores(dataset, array.array("B", [0, scoring.MIN_SCORE, scoring.MAX_SCORE, 4, scoring.UNSCORED]))
+        counts = collections.Counter(scoring.weighted_sample(dataset) for _ in range(2000))
+        assert set(counts) == {1, 2}
+        assert counts[2] > counts[1]  # the better score is drawn more often
+        scoring._cumulative_weights.cache_clear()
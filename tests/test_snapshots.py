@@ -0,0 +1,39 @@
+from who_knew_it import game_events, snapshots
+
+
+class TestSnapshotCache:
+    def test_loads_once_per_version(self):
+        loaded = []
+
+        def load(game_id: int, question_number: int) -> tuple[int, int, int]:
+            loaded.append((game_id, question_number))
+            return game_id, question_number, len(loaded)
+
+        cache = snapshots.SnapshotCache(load)
+        first = cache.get(2001, 1)
+        assert cache.get(2001, 1) is first  # every browser of the game gets the same one
+        assert cache.get(2001, 2) is not first
+        assert cache.loads == 2
+
+        game_events.bump(2001)
+        assert cache.get(2001, 1) is not first
+        assert cache.get(2001, 1)[2] == 3
+        assert cache.loads == 3
+
+    def test_write_during_load_is_loaded_again(self):
+        def load(game_id: int, question_number: int) -> int:
+            game_events.bump(game_id)  # another session writes while this one reads
+            return cache.loads
+
+        cache = snapshots.SnapshotCache(load)
+        cache.get(2002, 1)
+        cache.get(2002, 1)
+        assert cache.loads == 2
+
+    def test_forget(self):
+        cache = snapshots.SnapshotCache(lambda game_id, question_number: object())
+        first = cache.get(2003, 1)
+        other_game = cache.get(2004, 1)
+        cache.forget(2003)
+        assert cache.get(2003, 1) is not first
+        assert cache.get(2004, 1) is other_game
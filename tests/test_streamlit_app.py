@@ -0,0 +1,108 @@
+import pytest
+
+from who_knew_it import (
+    game_events,
+    generation,
+    question_types,
+    questions,
+    rate_limit,
+    streamlit_app,
+)
+
+
+class _JobWorkers:
+    def notify(self) -> None:
+        pass
+
+
+class _Refiller:
+    def demand(self, question_type: str) -> None:
+        pass
+
+
+class _Question(questions.Question):
+    def question_text(self) -> str:
+        return "What is a quokka?"
+
+    def get_correct_answer(self) -> str:
+        return "A small wallaby."
+
+
+class _Generator(questions.QuestionGenerator):
+    def generate_question_and_correct_answer(self) -> questions.Question:
+        return _Question()
+
+    def write_fake_answers(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
+        return [f"Fake answer {i}." for i in range(n_fake_answers)]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The app on a temporary database, whose jobs are only queued and never run."""
+    resources = (streamlit_app.get_db_connection, streamlit_app.get_game_store, streamlit_app.create_tables_if_not_exist)
+    for resource in resources:
+        resource.clear()
+    monkeypatch.setattr(streamlit_app, "DB_FILE", tmp_path / "database" / "file.db")
+    monkeypatch.setattr(streamlit_app, "get_job_workers", _JobWorkers)
+    monkeypatch.setattr(streamlit_app, "get_refiller", _Refiller)
+    monkeypatch.setattr(streamlit_app, "get_question_generator", lambda game_id, question_number: _Generator())
+    monkeypatch.setattr(question_types, "get_generator", lambda question_type: _Generator())
+    streamlit_app.create_tables_if_not_exist()
+    yield streamlit_app
+    for resource in resources:
+        resource.clear()
+
+
+class TestPrefetch:
+    def test_repeated_prefetch_leaves_the_version(self, app):
+        game_id = app.initialize_new_game_in_db()
+        app.prefetch_question(game_id, 1)
+        version = game_events.version(game_id)
+
+        app.prefetch_question(game_id, 1)  # every rerun of the host
+        app.prefetch_question(game_id, 2)
+        assert game_events.version(game_id) == version
+
+    def test_prefetch_queues_the_question(self, app):
+        game_id = app.initialize_new_game_in_db()
+        app.prefetch_question(game_id, 2)
+        app.prefetch_question(game_id, app.N_QUESTIONS + 1)  # after the last question
+
+        assert len(app.get_generation_progress(game_id)) == app.N_QUESTIONS  # in the lobby already
+        assert app.claim_next_job() == generation.Job(
+            game_id=game_id, question_number=2, kind=generation.JobKind.question, priority=rate_limit.Priority.prefetch
+        )
+        assert app.claim_next_job() is None
+
+    def test_question_job_writes_the_fake_answers_in_the_background(self, app):
+        game_id = app.initialize_new_game_in_db()
+        app.start_game(game_id, n_questions=app.N_QUESTIONS)
+        app.prefetch_question(game_id, 1)
+
+        job = app.claim_next_job()
+        app.run_job(job)
+        app.finish_job(job, generation.JobStatus.done, None)
+        assert app.get_question(game_id, 1) == "What is a quokka?"
+
+        fake_answers_job = app.claim_next_job()
+        assert fake_answers_job == generation.Job(
+            game_id=game_id,
+            question_number=1,
+            kind=generation.JobKind.fake_answers,
+            priority=rate_limit.Priority.prefetch,  # the priority of the question it belongs to
+        )
+        app.run_job(fake_answers_job)
+        assert app.get_all_fake_answers(game_id, 1) == ["Fake answer 0.", "Fake answer 1."]
+        assert app.get_generation_progress(game_id)[1]
+
+    def test_eager_start_raises_the_priority_of_the_lobby_prefetch(self, app):
+        game_id = app.initialize_new_game_in_db()
+        app.prefetch_question(game_id, 1)  # the host is in the lobby
+        app.start_game(game_id, n_questions=app.N_QUESTIONS, eager_generation=True)
+
+        claimed = [app.claim_next_job() for _ in range(app.N_QUESTIONS + 1)]
+        assert claimed[-1] is None
+        assert [(job.question_number, job.priority) for job in claimed[:-1]] == [
+            (1, rate_limit.Priority.live),
+            *((n, rate_limit.Priority.prefetch) for n in range(2, app.N_QUESTIONS + 1)),
+        ]
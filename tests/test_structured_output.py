@@ -0,0 +1,83 @@
+import dataclasses
+import json
+
+import pytest
+
+from benchmarks.stub_server import StubLLMServer
+from who_knew_it import api_call, structured_output
+
+
+@dataclasses.dataclass
+class _Pair:
+    first: str
+    second: str
+
+
+class TestResponseFormats:
+    def test_string_list(self):
+        response_format = structured_output.string_list(2)
+        assert response_format.parse(["a ", "2 * 3 is *six*"]) == ["a", "2 * 3 is *six*"]
+        for invalid in [["a"], ["a", "a"], ["a", 1], {"a": "b"}]:
+            with pytest.raises(structured_output.ParseError):
+                response_format.parse(invalid)
+
+    def test_string_list_of_names(self):
+        response_format = structured_output.string_list(2, names=True)
+        assert response_format.parse(["a ", " **B*y** "]) == ["a", "B*y"]
+        with pytest.raises(structured_output.ParseError):
+            response_format.parse(["a", "**"])
+        assert structured_output.string_list(2, exact=False, names=True).parse(["**", "a"]) == ["a"]
+
+    def test_score_list(self):
+        response_format = structured_output.score_list(3, max_score=9)
+        assert response_format.parse([0, 9, 4]) == [0, 9, 4]
+        for invalid in [[1, 2], [1, 2, 10], [1, 2, -1], [1, 2, "3"], [1, 2, True]]:
+            with pytest.raises(structured_output.ParseError):
+                response_format.parse(invalid)
+
+    def test_choice(self):
+        response_format = structured_output.choice(["Aardvark", "Bonobo", "Aardvark"])
+        assert response_format.schema["enum"] == ["Aardvark", "Bonobo"]
+        assert response_format.parse("Bonobo") == "Bonobo"
+        with pytest.raises(structured_output.ParseError):
+            response_format.parse("bonobo")
+
+    def test_choice_index(self):
+        response_format = structured_output.choice_index(3)
+        assert response_format.parse({"index": 2}) == 2
+        for invalid in [{"index": 3}, {"index": "1"}, 1]:
+            with pytest.raises(structured_output.ParseError):
+                response_format.parse(invalid)
+
+    def test_record(self):
+        response_format = structured_output.record(_Pair)
+        assert response_format.schema["required"] == ["first", "second"]
+        assert response_format.parse({"first": "a", "second": " b "}) == _Pair(first="a", second="b")
+        with pytest.raises(structured_output.ParseError):
+            response_format.parse({"first": "a", "second": ""})
+
+
+def test_parse_structured_tracks_retry_rate():
+    site = "test.parse_structured"
+    response_format = structured_output.boolean("ok")
+    assert structured_output.parse_structured('{"ok": true}', response_format, site=site) is True
+    assert structured_output.parse_structured("yes", response_format, site=site) is None
+
+    stats = structured_output.get_stats()[site]
+    assert stats.responses == 2
+    assert stats.retry_rate == 0.5
+
+
+def test_prompt_structured_requests_json_mode(monkeypatch):
+    with StubLLMServer(respond=lambda prompt: json.dumps(["x", "y"])) as server:
+        client = api_call.LLMClient(url=server.url, key="stub")
+        monkeypatch.setattr(api_call, "get_client", lambda: client)
+
+        answers = structured_output.prompt_structured(
+            "two things please", structured_output.string_list(2), site="test.prompt_structured"
+        )
+        assert answers == ["x", "y"]
+
+        generation_config = server.request_bodies[0]["generationConfig"]
+        assert generation_config["responseMimeType"] == "application/json"
+        assert generation_config["responseSchema"]["type"] == "ARRAY"
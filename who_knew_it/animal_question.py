@@ -1,9 +1,14 @@
 import pathlib
 import random
 
-import pandas as pd
-
-from who_knew_it import api_call, questions, random_word
+from who_knew_it import (
+    api_call,
+    datasets,
+    questions,
+    random_word,
+    scoring,
+    structured_output,
+)
 
 ANIMALS_FOLDER = pathlib.Path(__file__).parent / "animals"
 
@@ -23,20 +28,34 @@ class AnimalQuestion(questions.Question):
 class AnimalQuestionGenerator(questions.QuestionGenerator):
 
     @staticmethod
-    def _random_animal_group_and_species() -> tuple[str, list[str]]:
-        group_file = random.choice([f for f in ANIMALS_FOLDER.iterdir() if f.suffix == ".csv"])
+    def _random_animal_group_file() -> pathlib.Path:
+        """Weighted by the number of species, so every species is equally likely overall."""
+        group_files = sorted(f for f in ANIMALS_FOLDER.iterdir() if f.suffix == ".csv")
+        return random.choices(group_files, weights=[len(datasets.line_index(f)) for f in group_files])[0]
 
-        every_nth = 5
-        residual = random.randint(0, every_nth - 1)
-        df = pd.read_csv(group_file, skiprows=lambda x: x % every_nth != residual, names=["species"])
+    @staticmethod
+    def _random_animal_group_and_species() -> tuple[str, list[str]]:
+        group_file = AnimalQuestionGenerator._random_animal_group_file()
         how_many = 50
 
-        selected_animals = df.sample(how_many).reset_index(drop=True)
-        return group_file.stem.replace("-", " "), selected_animals["species"].tolist()
+        return group_file.stem.replace("-", " "), datasets.sample_csv_column(group_file, how_many)
 
+    @staticmethod
+    def _scored_animal() -> AnimalQuestion | None:
+        group_file = AnimalQuestionGenerator._random_animal_group_file()
+        dataset = scoring.animal_dataset(group_file)
+        row_index = scoring.weighted_sample(dataset)
+        if row_index is None:
+            return None
+        return AnimalQuestion(species=scoring.rows(dataset)[row_index], group=group_file.stem.replace("-", " "))
 
     def generate_question_and_correct_answer(self):
+        scored = self._scored_animal()
+        if scored is not None:
+            return scored
+
         while True:
+            api_call.check_deadline()
             group, candidates = self._random_animal_group_and_species()
 
             prompt = f"""
@@ -48,42 +67,34 @@ class AnimalQuestionGenerator(questions.QuestionGenerator):
             Please answer only with the animal's name as written above and nothing else.
             """
 
-            answer = api_call.prompt_model(prompt=prompt)
+            answer = structured_output.prompt_structured(
+                prompt, structured_output.choice(candidates), site="animal.select"
+            )
+            if answer is not None:
+                return AnimalQuestion(species=answer, group=group)
 
-            fitting_answers = [a for a in candidates if a.lower().strip() == answer.lower().strip()]
-            if len(fitting_answers) == 1:
-                return AnimalQuestion(species=fitting_answers[0], group=group)
-            
-            print("No fitting candidate found for response: ", answer)
             print("Candidates: ", candidates)
 
     
     def write_fake_answers(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
-        del correct_answer  # not needed here
-        
-        while True:
-            starting_letter_clause = f"The first species should start with an '{random_word.random_letter()}'."  # to add more randomness
-            if n_fake_answers > 1:
-                starting_letter_clause += f" The second species should start with an '{random_word.random_letter()}'."
-            
-            for i in range(2, n_fake_answers):
-                starting_letter_clause += f" The {i + 1}. species should start with an '{random_word.random_letter()}'."
-
+        def request_answers(n_missing: int, accepted: list[str]) -> list[str] | None:
             prompt = f"""
             You are playing a game where you have to write convincing and fun fake answers, that could trick people into picking it. Please invent fitting fake animal names
             for the following question: "{question}"
             Please write convincing fake animal names that are of the required group of animals but which don't exist but are completely made up. 
-            Please write {n_fake_answers} animal names and nothing else in a list separated by newlines. Don't start the names with 'The'.
-            {starting_letter_clause}
+            Please write {n_missing} animal names and nothing else in a list. Don't start the names with 'The'.
+            {random_word.starting_letter_clause("species", n_missing)}
+            {questions.avoid_clause(accepted)}
             Please answer only with that list and nothing else.
             """
             print(prompt)
-            response = api_call.prompt_model(prompt=prompt)
-
-            split_response = response.split("\n")
-
-            fake_answers = [r.replace("*", "").strip() for r in split_response if r.strip()]
-
-            if len(fake_answers) == n_fake_answers:
-                return fake_answers
-        
+            return structured_output.prompt_structured(
+                prompt, structured_output.string_list(n_missing, exact=False, names=True), site="animal.fake_answers"
+            )
+
+        return questions.collect_fake_answers(
+            request_answers,
+            n_fake_answers=n_fake_answers,
+            site="animal.fake_answers",
+            is_valid=lambda answer: answer.lower() != correct_answer.lower(),
+        )
@@ -1,24 +1,321 @@
+import asyncio
+import contextlib
+import contextvars
+import enum
+import functools
+import json
+import random
+import threading
+import time
+from collections.abc import Iterator
+
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+
+from who_knew_it import llm_cache, rate_limit
+
+MODEL = "gemini-2.0-flash"
+GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL}:generateContent"
+
+POOL_SIZE = 10  # a question round fires a handful of prompts, possibly from several games at once
+KEEP_ALIVE = True
+
+# Cache lifetimes for prompts whose answer doesn't need to change, e.g. rewrites and verifications.
+# Creative prompts don't pass a ttl, so they are never cached.
+CACHE_TTL_LONG = 30 * 24 * 60 * 60
+CACHE_TTL_SHORT = 24 * 60 * 60
+
+REQUEST_TIMEOUT = 30.0  # per attempt, shortened further by an enclosing deadline
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 30.0
+
+
+class LLMError(Exception):
+    pass
+
+
+class DeadlineExceeded(LLMError):
+    pass
+
+
+class CircuitOpenError(LLMError):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds: float) -> None:
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_current_deadline: contextvars.ContextVar[Deadline | None] = contextvars.ContextVar("deadline", default=None)
+_current_priority: contextvars.ContextVar[rate_limit.Priority] = contextvars.ContextVar(
+    "priority", default=rate_limit.Priority.live
+)
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[Deadline]:
+    """
+    Bounds every prompt_model call made inside the block, including the ones in generator retry loops.
+    A nested deadline can only shorten the enclosing one.
+    """
+    new_deadline = Deadline(seconds)
+    enclosing = _current_deadline.get()
+    if enclosing is not None and enclosing.expires_at < new_deadline.expires_at:
+        new_deadline = enclosing
+
+    token = _current_deadline.set(new_deadline)
+    try:
+        yield new_deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def check_deadline() -> None:
+    current = _current_deadline.get()
+    if current is not None and current.expired():
+        raise DeadlineExceeded("Deadline exceeded.")
+
+
+def timeout_within_deadline(timeout: float) -> float:
+    current = _current_deadline.get()
+    if current is None:
+        return timeout
+
+    remaining = current.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded("Deadline exceeded.")
+    return min(timeout, remaining)
+
+
+@contextlib.contextmanager
+def priority(value: rate_limit.Priority) -> Iterator[None]:
+    """Sets the rate limiter priority class of every prompt_model call made inside the block."""
+    token = _current_priority.set(value)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class CircuitState(enum.StrEnum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
 
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.closed
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
 
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == CircuitState.closed:
+                return
+
+            if self.state == CircuitState.open:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("The model API is failing, not sending requests for now.")
+                self.state = CircuitState.half_open  # let one trial request through
+                return
+
+            raise CircuitOpenError("A trial request to the model API is already in flight.")
+
+    def release(self) -> None:
+        """Ends a call that got no answer from the model API either way, e.g. its deadline passed before sending."""
+        with self._lock:
+            if self.state == CircuitState.half_open:
+                self.state = CircuitState.open  # the reset timeout has passed, the next call is the trial
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CircuitState.closed
+            self._consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self.state == CircuitState.half_open or self._consecutive_failures >= self.failure_threshold:
+                self.state = CircuitState.open
+                self._opened_at = time.monotonic()
+
+
+def _backoff(attempt: int) -> float:
+    # "full jitter": spreads out the retries of concurrent games hitting the same quota
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+@functools.cache
 def _get_key() -> str:
     return st.secrets["google_ai_studio"]
 
-def prompt_model(prompt: str) -> str:
-    key = _get_key()
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={key}"
+class LLMClient:
+    def __init__(
+        self,
+        url: str = GEMINI_URL,
+        key: str | None = None,
+        pool_size: int = POOL_SIZE,
+        keep_alive: bool = KEEP_ALIVE,
+        timeout: float = REQUEST_TIMEOUT,
+        max_attempts: int = MAX_ATTEMPTS,
+        circuit_breaker: CircuitBreaker | None = None,
+        rate_limiter: rate_limit.TokenBucketLimiter | None = None,
+    ) -> None:
+        if pool_size < 1:
+            raise ValueError(f"pool_size must be >= 1, found {pool_size}")
+
+        self.url = url
+        self._key = key
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            self._key = _get_key()
+        return self._key
+
+    def prompt(self, prompt: str, response_schema: dict | None = None) -> str:
+        request_json: dict = {"contents": [{"parts": [{"text": prompt}]}]}
+        if response_schema is not None:
+            request_json["generationConfig"] = {
+                "responseMimeType": "application/json",
+                "responseSchema": response_schema,
+            }
+
+        for attempt in range(self.max_attempts):
+            # waiting for a token can take until the deadline, the breaker's only trial is taken right before sending
+            self._wait_for_rate_limit(prompt)
+            self.circuit_breaker.before_call()
+            try:
+                response = self.session.post(
+                    url=self.url,
+                    params={"key": self.key},
+                    json=request_json,
+                    timeout=timeout_within_deadline(self.timeout),
+                )
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self.circuit_breaker.record_failure()
+                print(f"Model request failed on attempt {attempt + 1}: {e}")
+                last_error: Exception = e
+            except requests.RequestException:
+                self.circuit_breaker.record_failure()
+                raise
+            except BaseException:
+                # nothing was sent, every exit has to end a half open trial or the breaker never closes again
+                self.circuit_breaker.release()
+                raise
+
+            else:
+                if response.status_code == 200:
+                    try:
+                        text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
+                    except (ValueError, LookupError, TypeError):
+                        self.circuit_breaker.record_failure()  # a malformed answer is no sign of a healthy api
+                        raise
+                    self.circuit_breaker.record_success()
+                    return text
+
+                if response.status_code not in RETRY_STATUS_CODES:
+                    self.circuit_breaker.record_success()  # the upstream is healthy, the request is wrong
+                    response.raise_for_status()
 
-    response = requests.post(
-        url=url,
-        headers={"Content-Type": "application/json"},
-        json={"contents": [{"parts": [{"text": prompt}]}]},
-    )
+                self.circuit_breaker.record_failure()
+                print(f"Model request failed on attempt {attempt + 1} with status {response.status_code}")
+                last_error = requests.HTTPError(f"Status {response.status_code}", response=response)
 
-    if response.status_code == 200:
-        response_text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
-    else:
-        response.raise_for_status()
+            if attempt + 1 < self.max_attempts:
+                wait = _backoff(attempt)
+                current_deadline = _current_deadline.get()
+                if current_deadline is not None and current_deadline.remaining() <= wait:
+                    raise DeadlineExceeded("Deadline would pass while backing off.") from last_error
+                time.sleep(wait)
 
+        raise LLMError(f"Model request failed after {self.max_attempts} attempts.") from last_error
+
+    def _wait_for_rate_limit(self, prompt: str) -> None:
+        if self.rate_limiter is None:
+            return
+
+        current_deadline = _current_deadline.get()
+        acquired = self.rate_limiter.acquire(
+            tokens=rate_limit.estimate_tokens(prompt),
+            priority=_current_priority.get(),
+            timeout=current_deadline.remaining() if current_deadline is not None else None,
+        )
+        if not acquired:
+            raise DeadlineExceeded("Deadline exceeded while waiting for the rate limiter.")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+@functools.cache
+def get_rate_limiter() -> rate_limit.TokenBucketLimiter:
+    return rate_limit.TokenBucketLimiter()
+
+
+@functools.cache
+def get_client() -> LLMClient:
+    return LLMClient(rate_limiter=get_rate_limiter())
+
+
+@functools.cache
+def get_cache() -> llm_cache.ResponseCache:
+    return llm_cache.ResponseCache()
+
+
+def prompt_model(prompt: str, cache_ttl: float | None = None, response_schema: dict | None = None) -> str:
+    """With a response_schema the model answers with json matching it, see structured_output."""
+    if cache_ttl is None:
+        return get_client().prompt(prompt, response_schema=response_schema)
+
+    cache = get_cache()
+    cache_prompt = prompt if response_schema is None else f"{prompt}\0{json.dumps(response_schema, sort_keys=True)}"
+    cached = cache.get(model=MODEL, prompt=cache_prompt, ttl=cache_ttl)
+    if cached is not None:
+        return cached
+
+    response_text = get_client().prompt(prompt, response_schema=response_schema)
+    cache.put(model=MODEL, prompt=cache_prompt, response=response_text)
     return response_text
+
+
+async def prompt_model_async(
+    prompt: str, cache_ttl: float | None = None, response_schema: dict | None = None
+) -> str:
+    # requests has no asyncio support, so the blocking call runs on a worker thread.
+    # The pooled session is thread-safe, which lets concurrent prompts share connections.
+    return await asyncio.to_thread(prompt_model, prompt, cache_ttl, response_schema)
@@ -2,7 +2,7 @@ import random
 
 import arxiv  # type: ignore
 
-from who_knew_it import api_call, questions, random_word
+from who_knew_it import api_call, questions, random_word, structured_output
 
 
 class ArxivQuestion(questions.Question):
@@ -73,6 +73,7 @@ class ArxivQuestionGenerator(questions.QuestionGenerator):
     def generate_candidates(self) -> list[arxiv.Result]:
         client = arxiv.Client()
         while True:
+            api_call.check_deadline()
             search_word = random_word.get_random_word()
             print("Search word: ", search_word)
 
@@ -87,6 +88,7 @@ class ArxivQuestionGenerator(questions.QuestionGenerator):
 
     def generate_question_and_correct_answer(self) -> ArxivQuestion:
         while True:
+            api_call.check_deadline()
             candidates = self.generate_candidates()
 
             candidates_str ="\n\n".join([f"{i}:{result.title}" for i, result in enumerate(candidates)])
@@ -101,45 +103,35 @@ class ArxivQuestionGenerator(questions.QuestionGenerator):
             """
 
             print(prompt)
-            result = api_call.prompt_model(prompt=prompt)
-
-            try:
-                result_number = int(result.strip())
-                
-            except ValueError:
-                print("No fitting candidate found for response: ", result_number)
+            result_number = structured_output.prompt_structured(
+                prompt, structured_output.choice_index(len(candidates)), site="arxiv.select"
+            )
+            if result_number is None:
                 print("Candidates: ", candidates)
                 continue
 
-            if 0 <= result_number < len(candidates):
-                selected_candidate = candidates[result_number]
-                return ArxivQuestion(title=selected_candidate.title, area=selected_candidate.primary_category)
+            selected_candidate = candidates[result_number]
+            return ArxivQuestion(title=selected_candidate.title, area=selected_candidate.primary_category)
 
         
     def write_fake_answers(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
-        del correct_answer  # not needed here
-
-        while True:
-            starting_letter_clause = f"The first paper should start with an '{random_word.random_letter()}'."  # to add more randomness
-            if n_fake_answers > 1:
-                starting_letter_clause += f" The second paper should start with an '{random_word.random_letter()}'."
-            
-            for i in range(2, n_fake_answers):
-                starting_letter_clause += f" The {i + 1}. paper should start with an '{random_word.random_letter()}'."
-
+        def request_answers(n_missing: int, accepted: list[str]) -> list[str] | None:
             prompt = f"""
             You are playing a game where you have to write convincing and fun fake answers, that could trick people into picking it. Please invent fitting scientific paper titles
             that fit the following question: "{question}".
-            Please write {n_fake_answers} fake titles and nothing else in a list separated by newlines. Ideally, the paper is not too technical and a bit quirky or funny.
-            {starting_letter_clause}
+            Please write {n_missing} fake titles and nothing else in a list. Ideally, the paper is not too technical and a bit quirky or funny.
+            {random_word.starting_letter_clause("paper", n_missing)}
+            {questions.avoid_clause(accepted)}
             Please answer only with that list and nothing else.
             """
             print(prompt)
-            response = api_call.prompt_model(prompt=prompt)
-
-            split_response = response.split("\n")
-
-            fake_answers = [r.replace("*", "").strip() for r in split_response if r.strip()]
+            return structured_output.prompt_structured(
+                prompt, structured_output.string_list(n_missing, exact=False, names=True), site="arxiv.fake_answers"
+            )
 
-            if len(fake_answers) == n_fake_answers:
-                return fake_answers
+        return questions.collect_fake_answers(
+            request_answers,
+            n_fake_answers=n_fake_answers,
+            site="arxiv.fake_answers",
+            is_valid=lambda answer: answer.lower() != correct_answer.lower(),
+        )
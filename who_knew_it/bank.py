@@ -0,0 +1,357 @@
+"""
+Offline question bank, built ahead of time so games don't pay for generation.
+
+    python -m who_knew_it.bank build --type animal,pokemon --count 5000 --workers 8
+    python -m who_knew_it.bank stats
+
+The bank file starts with a version header followed by one entry per line:
+question type, dedupe key and the json encoded bundle, separated by tabs.
+It is only ever appended to, so a build can be interrupted and rerun to resume.
+"""
+import argparse
+import array
+import dataclasses
+import hashlib
+import json
+import mmap
+import os
+import random
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from who_knew_it import api_call, inventory, question_types, rate_limit
+
+BANK_FILE = Path(__file__).parent.parent / "bank" / "questions.bank"
+FORMAT_VERSION = 1
+HEADER = f"who-knew-it question bank v{FORMAT_VERSION}\n".encode()
+
+N_FAKE_ANSWERS = 2
+DEFAULT_WORKERS = 4
+
+# worst case generation latencies, all retries of the generators included
+QUESTION_DEADLINE = 120.0
+FAKE_ANSWERS_DEADLINE = 60.0
+
+MAX_CONSECUTIVE_MISSES = 25  # duplicates or failures in a row before a type counts as exhausted
+REPORT_INTERVAL = 30.0
+
+# For these the question names the item, while the correct answer is a rewrite that differs between runs.
+DEDUPE_ON_QUESTION = frozenset({question_types.QuestionType.movie, question_types.QuestionType.word_definition})
+
+
+class BankFormatError(ValueError):
+    pass
+
+
+def dedupe_key(question_type: str, question: str, correct_answer: str) -> str:
+    identity = question if question_type in DEDUPE_ON_QUESTION else correct_answer
+    normalized = " ".join(identity.lower().split())
+    return hashlib.sha1(f"{question_type}\0{normalized}".encode()).hexdigest()[:16]
+
+
+def _encode(question_type: str, bundle: inventory.QuestionBundle) -> bytes:
+    key = dedupe_key(question_type, bundle.question, bundle.correct_answer)
+    record = json.dumps(dataclasses.asdict(bundle), ensure_ascii=False, separators=(",", ":"))
+    return f"{question_type}\t{key}\t{record}\n".encode()  # json escapes tabs and newlines
+
+
+def _check_header(data: mmap.mmap) -> None:
+    header = data[: len(HEADER)]
+    if header != HEADER:
+        raise BankFormatError(f"Expected a version {FORMAT_VERSION} question bank, found header {header!r}.")
+
+
+def _scan(data: mmap.mmap, start: int) -> tuple[list[tuple[int, str, str]], int]:
+    """(offset, question type, dedupe key) of every complete line from start on, and where the last one ends."""
+    entries: list[tuple[int, str, str]] = []
+    offset = start
+    while True:
+        end = data.find(b"\n", offset)
+        if end == -1:
+            return entries, offset
+        question_type, key, _ = data[offset:end].split(b"\t", 2)
+        entries.append((offset, question_type.decode(), key.decode()))
+        offset = end + 1
+
+
+def _map(path: Path) -> mmap.mmap:
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class QuestionBank:
+    """
+    Read side of a bank file: memory-mapped, with an index of line offsets per question type.
+    Entries appended by a running build are indexed on the next call.
+    """
+
+    def __init__(self, path: Path = BANK_FILE) -> None:
+        self.path = path
+        self._offsets: dict[str, array.array] = {}
+        self._data: mmap.mmap | None = None
+        self._indexed_until = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size <= self._indexed_until:
+            return
+
+        data = _map(self.path)
+        if self._indexed_until == 0:
+            _check_header(data)
+            self._indexed_until = len(HEADER)
+
+        entries, self._indexed_until = _scan(data, self._indexed_until)
+        for offset, question_type, _ in entries:
+            self._offsets.setdefault(question_type, array.array("Q")).append(offset)
+
+        if self._data is not None:
+            self._data.close()
+        self._data = data
+
+    def count(self, question_type: str) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._offsets.get(question_type, []))
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            self._refresh()
+            return {question_type: len(offsets) for question_type, offsets in self._offsets.items()}
+
+    def sample(self, question_type: str, n_fake_answers: int) -> inventory.QuestionBundle | None:
+        """A random entry of the type, None if there is none with enough fake answers."""
+        with self._lock:
+            self._refresh()
+            offsets = self._offsets.get(question_type)
+            if not offsets or self._data is None:
+                return None
+
+            offset = offsets[random.randrange(len(offsets))]
+            line = self._data[offset : self._data.find(b"\n", offset)]
+
+        record = json.loads(line.split(b"\t", 2)[2])
+        if len(record["fake_answers"]) < n_fake_answers:
+            return None
+        return inventory.QuestionBundle(
+            question=record["question"],
+            correct_answer=record["correct_answer"],
+            fake_answers=record["fake_answers"][:n_fake_answers],
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._data is not None:
+                self._data.close()
+                self._data = None
+
+
+class BankWriter:
+    """
+    The only writer of a bank file. Every entry is synced to disk on its own, so an interrupted build
+    loses at most the entry it was writing, and opening the file again is all it takes to resume.
+    """
+
+    def __init__(self, path: Path = BANK_FILE) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.counts: dict[str, int] = {}
+        self.keys: set[str] = set()
+        self._file = open(path, "a+b")
+        self._recover()
+
+    def _recover(self) -> None:
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.write(HEADER)
+            self._sync()
+            return
+
+        data = _map(self.path)
+        try:
+            _check_header(data)
+            entries, end = _scan(data, len(HEADER))
+        finally:
+            data.close()
+
+        for _, question_type, key in entries:
+            self.counts[question_type] = self.counts.get(question_type, 0) + 1
+            self.keys.add(key)
+
+        if end < size:
+            print(f"Dropping {size - end} bytes of an entry that was cut off.")
+            self._file.truncate(end)
+
+    def append(self, question_type: str, bundle: inventory.QuestionBundle) -> bool:
+        """False if an entry for the same question is banked already."""
+        key = dedupe_key(question_type, bundle.question, bundle.correct_answer)
+        if key in self.keys:
+            return False
+
+        self._file.write(_encode(question_type, bundle))
+        self._sync()
+        self.keys.add(key)
+        self.counts[question_type] = self.counts.get(question_type, 0) + 1
+        return True
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+@dataclasses.dataclass
+class BuildStats:
+    banked: int = 0
+    duplicates: int = 0
+    failures: int = 0
+    generation_seconds: float = 0.0  # summed over workers
+
+    @property
+    def attempts(self) -> int:
+        return self.banked + self.duplicates + self.failures
+
+    def per_minute(self, elapsed: float) -> float:
+        return 60 * self.banked / elapsed if elapsed > 0 else 0.0
+
+
+def generate_entry(question_type: str, n_fake_answers: int) -> tuple[inventory.QuestionBundle, float]:
+    """Runs in a worker process. The rate limiter state is a shared file, so all workers draw from one budget."""
+    start = time.perf_counter()
+    with api_call.priority(rate_limit.Priority.prefetch):  # games served from the same quota go first
+        bundle = inventory.generate_bundle(
+            question_type,
+            n_fake_answers=n_fake_answers,
+            question_deadline=QUESTION_DEADLINE,
+            fake_answers_deadline=FAKE_ANSWERS_DEADLINE,
+        )
+    return bundle, time.perf_counter() - start
+
+
+def _report(stats: dict[str, BuildStats], counts: dict[str, int], elapsed: float) -> None:
+    for question_type, type_stats in stats.items():
+        mean_latency = type_stats.generation_seconds / type_stats.attempts if type_stats.attempts else 0.0
+        print(
+            f"{question_type}: {counts.get(question_type, 0)} in bank, +{type_stats.banked} "
+            f"({type_stats.per_minute(elapsed):.1f}/min, {mean_latency:.1f} s each), "
+            f"{type_stats.duplicates} duplicates, {type_stats.failures} failures"
+        )
+
+
+def build(
+    types_to_build: list[str],
+    count: int,
+    workers: int = DEFAULT_WORKERS,
+    path: Path = BANK_FILE,
+    n_fake_answers: int = N_FAKE_ANSWERS,
+    generate: Callable[[str, int], tuple[inventory.QuestionBundle, float]] = generate_entry,
+) -> dict[str, BuildStats]:
+    """Generates entries until the bank holds count of every type, starting from whatever it holds already."""
+    if workers < 1:
+        raise ValueError(f"workers must be >= 1, found {workers}")
+
+    writer = BankWriter(path)
+    stats = {question_type: BuildStats() for question_type in types_to_build}
+    consecutive_misses = dict.fromkeys(types_to_build, 0)
+    in_flight: dict[Future, str] = {}
+
+    def next_type() -> str | None:
+        # spreads the workers over the types that still need entries
+        candidates = [
+            question_type
+            for question_type in types_to_build
+            if consecutive_misses[question_type] < MAX_CONSECUTIVE_MISSES
+            and writer.counts.get(question_type, 0) + list(in_flight.values()).count(question_type) < count
+        ]
+        return min(candidates, key=list(in_flight.values()).count, default=None)
+
+    start = last_report = time.monotonic()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                while len(in_flight) < workers and (question_type := next_type()) is not None:
+                    in_flight[pool.submit(generate, question_type, n_fake_answers)] = question_type
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    question_type = in_flight.pop(future)
+                    type_stats = stats[question_type]
+                    try:
+                        bundle, seconds = future.result()
+                    except Exception as e:
+                        print(f"Generating {question_type} failed: {e!r}")
+                        type_stats.failures += 1
+                        consecutive_misses[question_type] += 1
+                    else:
+                        type_stats.generation_seconds += seconds
+                        if writer.append(question_type, bundle):
+                            type_stats.banked += 1
+                            consecutive_misses[question_type] = 0
+                        else:
+                            type_stats.duplicates += 1
+                            consecutive_misses[question_type] += 1
+
+                    if consecutive_misses[question_type] == MAX_CONSECUTIVE_MISSES:
+                        print(f"Giving up on {question_type} after {MAX_CONSECUTIVE_MISSES} duplicates or failures in a row.")
+
+                if time.monotonic() - last_report > REPORT_INTERVAL:
+                    _report(stats, writer.counts, time.monotonic() - start)
+                    last_report = time.monotonic()
+
+    except KeyboardInterrupt:
+        print("Interrupted, run the same command again to resume.")
+    finally:
+        writer.close()
+
+    _report(stats, writer.counts, time.monotonic() - start)
+    return stats
+
+
+def _parse_types(value: str) -> list[str]:
+    try:
+        return [str(question_types.QuestionType(t.strip())) for t in value.split(",") if t.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Unknown question type in {value!r}, choose from {', '.join(question_types.QuestionType)}."
+        ) from None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m who_knew_it.bank", description="Builds the offline question bank.")
+    parser.add_argument("--bank", type=Path, default=BANK_FILE, help="path of the bank file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="generate entries, resuming from the existing bank")
+    build_parser.add_argument(
+        "--type", type=_parse_types, default=list(question_types.QuestionType), help="comma separated question types"
+    )
+    build_parser.add_argument("--count", type=int, required=True, help="entries per type the bank should hold")
+    build_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="generator processes")
+    build_parser.add_argument("--fake-answers", type=int, default=N_FAKE_ANSWERS, help="fake answers per entry")
+
+    subparsers.add_parser("stats", help="show how many entries of each type are banked")
+
+    args = parser.parse_args(argv)
+    match args.command:
+        case "build":
+            build(args.type, count=args.count, workers=args.workers, path=args.bank, n_fake_answers=args.fake_answers)
+        case "stats":
+            bank = QuestionBank(args.bank)
+            for question_type, n_entries in sorted(bank.counts().items()):
+                print(f"{question_type}: {n_entries}")
+            bank.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,618 @@
+"""
+Every SQL statement of the app, by name. Values are always passed as $parameters instead of being formatted
+into the text, so each statement has one fixed text and names or answers with quotes in them need no escaping.
+run times every execution, see get_stats for the latency per statement.
+
+The python api of duckdb has no prepared statement handles to keep around, and a statement prepared with
+PREPARE only exists in the cursor that prepared it, while the app takes a new cursor per query. So the
+statements are still prepared on every execution, by duckdb, from the same text.
+"""
+import dataclasses
+import enum
+import random
+import textwrap
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import duckdb
+
+from who_knew_it import generation
+
+
+class Tables(enum.StrEnum):
+    players = "players"
+    games = "games"
+    game_player = "game_player"
+    questions = "questions"
+    player_answers = "player_answers"
+    points = "points"
+    jobs = "jobs"
+    question_inventory = "question_inventory"
+
+
+class Var(enum.StrEnum):
+    player_id = "player_id"
+    player_name = "player_name"
+    game_id = "game_id"
+    retrieved = "retrieved"
+    answer_list = "answer_list"
+    points = "points"
+    is_answered = "is_answered"
+    game_stage = "game_stage"
+    is_host = "is_host"
+    question_number = "question_number"
+    question = "question"
+    correct_answer = "correct_answer"
+    answer_text = "answer_text"
+    is_house = "is_house"
+    answer_order = "answer_order"
+    correct_answer_rank = "correct_answer_rank"
+    player_id_of_chosen_answer = "player_id_of_chosen_answer"
+    fooled_players = "fooled_players"
+    dummy_cookie = "dummy_cookie"
+    has_accepted_cookies = "has_accepted_cookies"
+    eager_generation = "eager_generation"
+    job_key = "job_key"
+    job_kind = "job_kind"
+    job_status = "job_status"
+    priority = "priority"
+    created_at = "created_at"
+    started_at = "started_at"
+    finished_at = "finished_at"
+    error = "error"
+    attempts = "attempts"
+    inventory_id = "inventory_id"
+    question_type = "question_type"
+    fake_answers = "fake_answers"
+    name = "name"  # used by streamlit authenticator
+
+
+@dataclasses.dataclass(frozen=True)
+class Statement:
+    name: str
+    sql: str
+
+
+STATEMENTS: dict[str, Statement] = {}
+
+
+def _statement(name: str, sql: str) -> Statement:
+    if name in STATEMENTS:
+        raise ValueError(f"There already is a statement called {name}.")
+    STATEMENTS[name] = Statement(name=name, sql=textwrap.dedent(sql).strip())
+    return STATEMENTS[name]
+
+
+@dataclasses.dataclass
+class StatementStats:
+    executions: int = 0
+    failures: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float | None:
+        return self.total_seconds / self.executions if self.executions else None
+
+
+_stats: dict[str, StatementStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name: str, seconds: float, succeeded: bool) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(name, StatementStats())
+        stats.executions += 1
+        stats.failures += 0 if succeeded else 1
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+
+
+def get_stats() -> dict[str, StatementStats]:
+    with _stats_lock:
+        return {name: dataclasses.replace(stats) for name, stats in _stats.items()}
+
+
+def run(con: duckdb.DuckDBPyConnection, statement: Statement, **params: Any) -> list[tuple]:
+    """Executes the statement with the parameters it names and fetches all rows."""
+    start = time.perf_counter()
+    try:
+        result = con.execute(statement.sql, params).fetchall()
+    except Exception:
+        _record(statement.name, time.perf_counter() - start, succeeded=False)
+        raise
+    _record(statement.name, time.perf_counter() - start, succeeded=True)
+    return result
+
+
+def run_retrying_conflicts(
+    connect: Callable[[], duckdb.DuckDBPyConnection], statement: Statement, attempts: int, /, **params: Any
+) -> list[tuple]:
+    """For rows that several threads write, duckdb rejects concurrent updates of a row instead of waiting."""
+    for attempt in range(attempts):
+        try:
+            with connect() as con:
+                return run(con, statement, **params)
+        except duckdb.TransactionException as e:
+            if attempt + 1 == attempts:
+                raise
+            print(f"{statement.name} conflicted on attempt {attempt + 1}: {e}")
+            time.sleep(random.uniform(0, 0.01 * 2**attempt))
+    raise AssertionError("unreachable")
+
+
+_requeue = f"{Tables.jobs}.{Var.job_status} IN ('{generation.JobStatus.failed}', '{generation.JobStatus.cancelled}')"
+
+
+SCHEMA = [
+    _statement("create_seq_game_id", "CREATE SEQUENCE IF NOT EXISTS seq_game_id START 1;"),
+    _statement("create_seq_inventory_id", "CREATE SEQUENCE IF NOT EXISTS seq_inventory_id START 1;"),
+    _statement(
+        "create_games",
+        f"""
+        CREATE TABLE IF NOT EXISTS {Tables.games} (
+            {Var.game_id} INT PRIMARY KEY DEFAULT NEXTVAL('seq_game_id'),
+            {Var.game_stage} INT NOT NULL,
+        );
+        """,
+    ),
+    _statement(
+        "create_players",
+        f"""
+        CREATE TABLE IF NOT EXISTS {Tables.players} (
+            {Var.player_id} VARCHAR(255) PRIMARY KEY,
+            {Var.player_name} VARCHAR(255) NOT NULL,
+            {Var.is_house} BOOLEAN DEFAULT FALSE
+        );
+        """,
+    ),
+    _statement(
+        "create_game_player",
+        f"""
+        CREATE TABLE IF NOT EXISTS {Tables.game_player} (
+            {Var.game_id} INT,
+            {Var.player_id} VARCHAR(255),
+            {Var.is_host} BOOLEAN,
+            PRIMARY KEY ({Var.game_id}, {Var.player_id}),
+            FOREIGN KEY ({Var.game_id}) REFERENCES {Tables.games}({Var.game_id}),
+            FOREIGN KEY ({Var.player_id}) REFERENCES {Tables.players}({Var.player_id})
+        );
+        """,
+    ),
+    _statement(
+        "create_questions",
+        f"""
+        CREATE TABLE IF NOT EXISTS {Tables.questions} (
+            {Var.game_id} INT,
+            {Var.question_number} INT NOT NULL,
+            {Var.question} VARCHAR,
+            {Var.correct_answer} VARCHAR,
+            {Var.is_answered} BOOLEAN DEFAULT FALSE,
+            {Var.correct_answer_rank} FLOAT DEFAULT random(),
+            {Var.question_type} VARCHAR,
+            PRIMARY KEY ({Var.game_id}, {Var.question_number}),
+            FOREIGN KEY ({Var.game_id}) REFERENCES {Tables.games}({Var.game_id}),
+        );
+        """,
+    ),
+    _statement(
+        "create_player_answers",
+        f"""
+        CREATE TABLE IF NOT EXISTS {Tables.player_answers} (
+            {Var.game_id} INT,
+            {Var.question_number} INT,
+            {Var.player_id} VARCHAR(255),
+            {Var.answer_text} VARCHAR,
+            {Var.answer_order} FLOAT DEFAULT random(),
+            {Var.player_id_of_chosen_answer} VARCHAR(255),
+            PRIMARY KEY ({Var.game_id}, {Var.question_number}, {Var.player_id}),
+            FOREIGN KEY ({Var.game_id}) REFERENCES {Tables.games}({Var.game_id}),
+            FOREIGN KEY ({Var.player_id}) REFERENCES {Tables.players}({Var.player_id}),
+        );
+        """,
+    ),
+    _statement(
+        "create_points",
+        f"""
+        CREATE TABLE IF NOT EXISTS {Tables.points} (
+            {Var.game_id} INT,
+            {Var.question_number} INT,
+            {Var.player_id} VARCHAR(255),
+            {Var.points} INT,
+            PRIMARY KEY ({Var.game_id}, {Var.question_number}, {Var.player_id}),
+            FOREIGN KEY ({Var.game_id}) REFERENCES {Tables.games}({Var.game_id}),
+            FOREIGN KEY ({Var.player_id}) REFERENCES {Tables.players}({Var.player_id}),
+        );
+        """,
+    ),
+    _statement(
+        "create_jobs",
+        f"""
+        CREATE TABLE IF NOT EXISTS {Tables.jobs} (
+            {Var.job_key} VARCHAR PRIMARY KEY,
+            {Var.game_id} INT NOT NULL,
+            {Var.question_number} INT NOT NULL,
+            {Var.job_kind} VARCHAR NOT NULL,
+            {Var.job_status} VARCHAR NOT NULL,
+            {Var.priority} INT NOT NULL,
+            {Var.attempts} INT DEFAULT 0,
+            {Var.created_at} TIMESTAMP NOT NULL,
+            {Var.started_at} TIMESTAMP,
+            {Var.finished_at} TIMESTAMP,
+            {Var.error} VARCHAR,
+        );
+        """,
+    ),
+    _statement(
+        "create_question_inventory",
+        f"""
+        CREATE TABLE IF NOT EXISTS {Tables.question_inventory} (
+            {Var.inventory_id} INT PRIMARY KEY DEFAULT NEXTVAL('seq_inventory_id'),
+            {Var.question_type} VARCHAR NOT NULL,
+            {Var.question} VARCHAR NOT NULL,
+            {Var.correct_answer} VARCHAR NOT NULL,
+            {Var.fake_answers} VARCHAR[] NOT NULL,
+            {Var.created_at} TIMESTAMP NOT NULL,
+        );
+        """,
+    ),
+]
+
+# players
+
+ADD_PLAYER = _statement(
+    "add_player",
+    f"""
+    INSERT INTO {Tables.players} ({Var.player_id}, {Var.player_name}, {Var.is_house})
+    VALUES (${Var.player_id}, ${Var.player_name}, ${Var.is_house});
+    """,
+)
+SET_PLAYER_NAME = _statement(
+    "set_player_name",
+    f"""
+    UPDATE {Tables.players} SET {Var.player_name} = ${Var.player_name} WHERE {Var.player_id} = ${Var.player_id};
+    """,
+)
+GET_PLAYER_NAME = _statement(
+    "get_player_name",
+    f"""
+    SELECT {Var.player_name} FROM {Tables.players} WHERE {Var.player_id} = ${Var.player_id};
+    """,
+)
+
+# games and who plays in them
+
+CREATE_GAME = _statement(
+    "create_game",
+    f"""
+    INSERT INTO {Tables.games} ({Var.game_stage}) VALUES (${Var.game_stage}) RETURNING {Var.game_id};
+    """,
+)
+GET_GAMES_IN_STAGE = _statement(
+    "get_games_in_stage",
+    f"""
+    SELECT {Var.game_id} FROM {Tables.games} WHERE {Var.game_stage} = ${Var.game_stage};
+    """,
+)
+SET_GAME_STAGE = _statement(
+    "set_game_stage",
+    f"""
+    UPDATE {Tables.games} SET {Var.game_stage} = ${Var.game_stage} WHERE {Var.game_id} = ${Var.game_id};
+    """,
+)
+GET_GAME_STAGE = _statement(
+    "get_game_stage",
+    f"""
+    SELECT {Var.game_stage} FROM {Tables.games} WHERE {Var.game_id} = ${Var.game_id};
+    """,
+)
+GET_PLAYERS_IN_GAME = _statement(
+    "get_players_in_game",
+    f"""
+    SELECT {Tables.players}.{Var.player_id}, {Tables.players}.{Var.player_name} FROM {Tables.game_player}
+    JOIN {Tables.players} ON {Tables.players}.{Var.player_id} = {Tables.game_player}.{Var.player_id}
+    WHERE {Tables.game_player}.{Var.game_id} = ${Var.game_id};
+    """,
+)
+GET_GAMES_OF_PLAYER = _statement(
+    "get_games_of_player",
+    f"""
+    SELECT {Var.game_id} FROM {Tables.game_player} WHERE {Var.player_id} = ${Var.player_id};
+    """,
+)
+JOIN_GAME = _statement(
+    "join_game",
+    f"""
+    INSERT INTO {Tables.game_player} ({Var.player_id}, {Var.game_id}, {Var.is_host})
+    SELECT ${Var.player_id}, ${Var.game_id}, ${Var.is_host}
+    WHERE (SELECT COUNT(*) FROM {Tables.game_player} WHERE {Var.game_id} = ${Var.game_id}) < $max_players;
+    """,
+)
+IS_HOST = _statement(
+    "is_host",
+    f"""
+    SELECT {Var.is_host} FROM {Tables.game_player}
+    WHERE {Var.player_id} = ${Var.player_id} AND {Var.game_id} = ${Var.game_id};
+    """,
+)
+GET_HOSTS = _statement(
+    "get_hosts",
+    f"""
+    SELECT {Var.player_id} FROM {Tables.game_player} WHERE {Var.game_id} = ${Var.game_id} AND {Var.is_host} = TRUE;
+    """,
+)
+COUNT_HUMAN_PLAYERS = _statement(
+    "count_human_players",
+    f"""
+    SELECT COUNT(*) FROM {Tables.game_player}
+    JOIN {Tables.players} ON {Tables.game_player}.{Var.player_id} = {Tables.players}.{Var.player_id}
+    WHERE {Tables.game_player}.{Var.game_id} = ${Var.game_id} AND {Tables.players}.{Var.is_house} = FALSE;
+    """,
+)
+
+# leaving a game removes the player's rows, in one transaction
+REMOVE_PLAYER = [
+    _statement(
+        f"remove_player_from_{table}",
+        f"""
+        DELETE FROM {table} WHERE {Var.player_id} = ${Var.player_id} AND {Var.game_id} = ${Var.game_id};
+        """,
+    )
+    for table in (Tables.game_player, Tables.points, Tables.player_answers)
+]
+
+# closing a game removes all of its rows, in this order
+DELETE_GAME = [
+    _statement(f"delete_game_from_{table}", f"DELETE FROM {table} WHERE {Var.game_id} = ${Var.game_id};")
+    for table in (Tables.game_player, Tables.points, Tables.questions, Tables.player_answers, Tables.games)
+]
+
+# questions
+
+ADD_QUESTIONS = _statement(
+    "add_questions",
+    f"""
+    INSERT INTO {Tables.questions} ({Var.game_id}, {Var.question_number})
+    SELECT ${Var.game_id}, range FROM range(1, $n_questions + 1)
+    ON CONFLICT ({Var.game_id}, {Var.question_number}) DO NOTHING;
+    """,
+)
+SET_QUESTION = _statement(
+    "set_question",
+    f"""
+    UPDATE {Tables.questions}
+    SET {Var.question} = ${Var.question}, {Var.correct_answer} = ${Var.correct_answer}
+    WHERE {Var.game_id} = ${Var.game_id} AND {Var.question_number} = ${Var.question_number};
+    """,
+)
+GET_QUESTION = _statement(
+    "get_question",
+    f"""
+    SELECT {Var.question}, {Var.correct_answer}, {Var.correct_answer_rank}, {Var.is_answered}, {Var.question_type}
+    FROM {Tables.questions}
+    WHERE {Var.game_id} = ${Var.game_id} AND {Var.question_number} = ${Var.question_number};
+    """,
+)
+SET_IS_ANSWERED = _statement(
+    "set_is_answered",
+    f"""
+    UPDATE {Tables.questions} SET {Var.is_answered} = TRUE
+    WHERE {Var.game_id} = ${Var.game_id} AND {Var.question_number} = ${Var.question_number};
+    """,
+)
+GET_FIRST_UNANSWERED_QUESTION_NUMBER = _statement(
+    "get_first_unanswered_question_number",
+    f"""
+    SELECT MIN({Var.question_number}) FROM {Tables.questions}
+    WHERE {Var.is_answered} = FALSE AND {Var.game_id} = ${Var.game_id};
+    """,
+)
+GET_GENERATION_PROGRESS = _statement(
+    "get_generation_progress",
+    f"""
+    SELECT {Tables.questions}.{Var.question_number},
+    {Tables.questions}.{Var.question} IS NOT NULL AND COUNT({Tables.player_answers}.{Var.player_id}) = COUNT({Tables.player_answers}.{Var.answer_text})
+    FROM {Tables.questions}
+    LEFT JOIN (
+        {Tables.player_answers} JOIN {Tables.players}
+        ON {Tables.player_answers}.{Var.player_id} = {Tables.players}.{Var.player_id} AND {Tables.players}.{Var.is_house} = TRUE
+    )
+    ON {Tables.questions}.{Var.game_id} = {Tables.player_answers}.{Var.game_id}
+    AND {Tables.questions}.{Var.question_number} = {Tables.player_answers}.{Var.question_number}
+    WHERE {Tables.questions}.{Var.game_id} = ${Var.game_id}
+    GROUP BY {Tables.questions}.{Var.question_number}, {Tables.questions}.{Var.question}
+    ORDER BY {Tables.questions}.{Var.question_number};
+    """,
+)
+GET_QUESTION_TYPES = _statement(
+    "get_question_types",
+    f"""
+    SELECT {Var.question_number}, {Var.question_type} FROM {Tables.questions} WHERE {Var.game_id} = ${Var.game_id};
+    """,
+)
+ASSIGN_QUESTION_TYPE = _statement(
+    "assign_question_type",
+    f"""
+    UPDATE {Tables.questions} SET {Var.question_type} = COALESCE({Var.question_type}, ${Var.question_type})
+    WHERE {Var.game_id} = ${Var.game_id} AND {Var.question_number} = ${Var.question_number}
+    RETURNING {Var.question_type};
+    """,
+)
+
+# answers, the fake ones of the house included, and which answer every player chose
+
+ADD_ANSWERS = _statement(
+    "add_answers",
+    f"""
+    INSERT INTO {Tables.player_answers} ({Var.game_id}, {Var.question_number}, {Var.player_id})
+    SELECT {Tables.questions}.{Var.game_id}, {Tables.questions}.{Var.question_number}, {Tables.game_player}.{Var.player_id}
+    FROM {Tables.questions}
+    JOIN {Tables.game_player} ON {Tables.questions}.{Var.game_id} = {Tables.game_player}.{Var.game_id}
+    WHERE {Tables.questions}.{Var.game_id} = ${Var.game_id}
+    ON CONFLICT ({Var.game_id}, {Var.question_number}, {Var.player_id}) DO NOTHING;
+    """,
+)
+SET_ANSWER = _statement(
+    "set_answer",
+    f"""
+    UPDATE {Tables.player_answers} SET {Var.answer_text} = ${Var.answer_text}
+    WHERE {Var.game_id} = ${Var.game_id} AND {Var.player_id} = ${Var.player_id} AND {Var.question_number} = ${Var.question_number};
+    """,
+)
+SET_FAKE_ANSWERS = _statement(
+    "set_fake_answers",
+    f"""
+    INSERT INTO {Tables.player_answers} ({Var.game_id}, {Var.question_number}, {Var.player_id}, {Var.answer_text})
+    SELECT ${Var.game_id}, ${Var.question_number}, unnest($player_ids), unnest($answer_texts)
+    ON CONFLICT ({Var.game_id}, {Var.question_number}, {Var.player_id})
+    DO UPDATE SET {Var.answer_text} = EXCLUDED.{Var.answer_text};
+    """,
+)
+GET_ANSWERS = _statement(
+    "get_answers",
+    f"""
+    SELECT {Tables.player_answers}.{Var.player_id}, {Var.answer_text}, {Var.answer_order},
+    {Var.player_id_of_chosen_answer}, {Tables.players}.{Var.is_house} FROM {Tables.player_answers}
+    JOIN {Tables.players} ON {Tables.player_answers}.{Var.player_id} = {Tables.players}.{Var.player_id}
+    WHERE {Tables.player_answers}.{Var.game_id} = ${Var.game_id}
+    AND {Tables.player_answers}.{Var.question_number} = ${Var.question_number}
+    ORDER BY {Tables.player_answers}.{Var.player_id};
+    """,
+)
+SET_CHOSEN_ANSWER = _statement(
+    "set_chosen_answer",
+    f"""
+    UPDATE {Tables.player_answers} SET {Var.player_id_of_chosen_answer} = ${Var.player_id_of_chosen_answer}
+    WHERE {Var.game_id} = ${Var.game_id} AND {Var.question_number} = ${Var.question_number} AND {Var.player_id} = ${Var.player_id};
+    """,
+)
+
+# points
+
+SET_POINTS = _statement(
+    "set_points",
+    f"""
+    INSERT INTO {Tables.points} ({Var.game_id}, {Var.question_number}, {Var.player_id}, {Var.points})
+    SELECT ${Var.game_id}, ${Var.question_number}, unnest($player_ids), unnest(${Var.points})
+    ON CONFLICT ({Var.game_id}, {Var.question_number}, {Var.player_id})
+    DO UPDATE SET {Var.points} = EXCLUDED.{Var.points};
+    """,
+)
+GET_TOTAL_POINTS = _statement(
+    "get_total_points",
+    f"""
+    SELECT {Var.player_id}, SUM({Var.points}), BOOL_OR({Var.question_number} = ${Var.question_number})
+    FROM {Tables.points}
+    WHERE {Var.game_id} = ${Var.game_id}
+    GROUP BY {Var.player_id};
+    """,
+)
+
+# generation jobs, see generation
+
+ENQUEUE_JOB = _statement(
+    "enqueue_job",
+    f"""
+    INSERT INTO {Tables.jobs} ({Var.job_key}, {Var.game_id}, {Var.question_number}, {Var.job_kind}, {Var.job_status}, {Var.priority}, {Var.created_at})
+    VALUES (${Var.job_key}, ${Var.game_id}, ${Var.question_number}, ${Var.job_kind}, '{generation.JobStatus.queued}', ${Var.priority}, now())
+    ON CONFLICT ({Var.job_key}) DO UPDATE SET
+    {Var.priority} = LEAST({Tables.jobs}.{Var.priority}, EXCLUDED.{Var.priority}),
+    {Var.job_status} = CASE WHEN {_requeue} THEN EXCLUDED.{Var.job_status} ELSE {Tables.jobs}.{Var.job_status} END,
+    {Var.created_at} = CASE WHEN {_requeue} THEN EXCLUDED.{Var.created_at} ELSE {Tables.jobs}.{Var.created_at} END,
+    {Var.started_at} = CASE WHEN {_requeue} THEN NULL ELSE {Tables.jobs}.{Var.started_at} END,
+    {Var.finished_at} = CASE WHEN {_requeue} THEN NULL ELSE {Tables.jobs}.{Var.finished_at} END,
+    {Var.error} = CASE WHEN {_requeue} THEN NULL ELSE {Tables.jobs}.{Var.error} END;
+    """,
+)
+CLAIM_NEXT_JOB = _statement(
+    "claim_next_job",
+    f"""
+    UPDATE {Tables.jobs}
+    SET {Var.job_status} = '{generation.JobStatus.running}', {Var.started_at} = now(), {Var.attempts} = {Var.attempts} + 1
+    WHERE {Var.job_key} = (
+        SELECT {Var.job_key} FROM {Tables.jobs}
+        WHERE {Var.job_status} = '{generation.JobStatus.queued}'
+        ORDER BY {Var.priority}, {Var.created_at}
+        LIMIT 1
+    )
+    RETURNING {Var.game_id}, {Var.question_number}, {Var.job_kind}, {Var.priority};
+    """,
+)
+FINISH_JOB = _statement(
+    "finish_job",
+    f"""
+    UPDATE {Tables.jobs}
+    SET {Var.job_status} = ${Var.job_status}, {Var.finished_at} = now(), {Var.error} = ${Var.error}
+    WHERE {Var.job_key} = ${Var.job_key} AND {Var.job_status} = '{generation.JobStatus.running}';
+    """,
+)
+REQUEUE_INTERRUPTED_JOBS = _statement(
+    "requeue_interrupted_jobs",
+    f"""
+    UPDATE {Tables.jobs} SET {Var.job_status} = '{generation.JobStatus.queued}', {Var.started_at} = NULL
+    WHERE {Var.job_status} = '{generation.JobStatus.running}';
+    """,
+)
+CANCEL_JOBS = _statement(
+    "cancel_jobs",
+    f"""
+    UPDATE {Tables.jobs} SET {Var.job_status} = '{generation.JobStatus.cancelled}', {Var.finished_at} = now()
+    WHERE {Var.game_id} = ${Var.game_id}
+    AND {Var.job_status} IN ('{generation.JobStatus.queued}', '{generation.JobStatus.running}');
+    """,
+)
+GET_JOB_STATUS = _statement(
+    "get_job_status",
+    f"""
+    SELECT {Var.job_status} FROM {Tables.jobs} WHERE {Var.job_key} = ${Var.job_key};
+    """,
+)
+GET_JOB_METRICS = _statement(
+    "get_job_metrics",
+    f"""
+    SELECT
+    COUNT(*) FILTER (WHERE {Var.job_status} = '{generation.JobStatus.queued}'),
+    COUNT(*) FILTER (WHERE {Var.job_status} = '{generation.JobStatus.running}'),
+    COUNT(*) FILTER (WHERE {Var.job_status} = '{generation.JobStatus.failed}'),
+    AVG(epoch({Var.started_at}) - epoch({Var.created_at})),
+    AVG(epoch({Var.finished_at}) - epoch({Var.created_at})) FILTER (WHERE {Var.job_status} = '{generation.JobStatus.done}')
+    FROM {Tables.jobs};
+    """,
+)
+
+# the question inventory, see inventory
+
+COUNT_INVENTORY = _statement(
+    "count_inventory",
+    f"""
+    SELECT COUNT(*) FROM {Tables.question_inventory} WHERE {Var.question_type} = ${Var.question_type};
+    """,
+)
+GET_INVENTORY_LEVELS = _statement(
+    "get_inventory_levels",
+    f"""
+    SELECT {Var.question_type}, COUNT(*) FROM {Tables.question_inventory} GROUP BY {Var.question_type};
+    """,
+)
+PUT_INTO_INVENTORY = _statement(
+    "put_into_inventory",
+    f"""
+    INSERT INTO {Tables.question_inventory} ({Var.question_type}, {Var.question}, {Var.correct_answer}, {Var.fake_answers}, {Var.created_at})
+    VALUES (${Var.question_type}, ${Var.question}, ${Var.correct_answer}, ${Var.fake_answers}, now());
+    """,
+)
+CLAIM_FROM_INVENTORY = _statement(
+    "claim_from_inventory",
+    f"""
+    DELETE FROM {Tables.question_inventory}
+    WHERE {Var.inventory_id} = (
+        SELECT {Var.inventory_id} FROM {Tables.question_inventory}
+        WHERE {Var.question_type} = ${Var.question_type}
+        ORDER BY {Var.created_at}
+        LIMIT 1
+    )
+    RETURNING {Var.question}, {Var.correct_answer}, {Var.fake_answers};
+    """,
+)
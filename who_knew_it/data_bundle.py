@@ -0,0 +1,218 @@
+"""
+Packed binary bundle of the static datasets, so a new process maps them instead of parsing text.
+
+    python -m who_knew_it.data_bundle
+
+Layout: a header with the format version and where the directory is, then one section per
+dataset, then the json directory. A section is a string table: count + 1 offsets as native
+unsigned 64 bit integers followed by the utf-8 strings back to back, so row i lies between
+offsets i and i + 1. The bundle is a build artifact of the machine that serves it.
+
+Only sources that changed since the last build are parsed again, the others are copied over.
+"""
+import array
+import csv
+import dataclasses
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Callable, Sequence
+from itertools import accumulate
+from pathlib import Path
+from typing import overload
+
+PACKAGE_FOLDER = Path(__file__).parent
+BUNDLE_FILE = PACKAGE_FOLDER.parent / "cache" / "datasets.bundle"
+FORMAT_VERSION = 1
+MAGIC = b"WKBUNDLE"
+HEADER = struct.Struct("<8sQQQ")  # magic, format version, directory offset, directory length
+ALIGNMENT = 8
+
+# glob relative to the package and how each file is read, see datasets
+SOURCES = [
+    ("words.txt", "lines"),
+    ("name-generation/*.txt", "lines"),
+    ("dictionary/nouns.csv", "lines"),
+    ("nicknames/*.csv", "lines"),
+    ("pokemon/pokemon.csv", "csv_column"),
+    ("animals/*.csv", "csv_column"),
+]
+
+
+class BundleFormatError(ValueError):
+    pass
+
+
+def read_lines(path: Path) -> tuple[str, ...]:
+    with open(path) as f:
+        return tuple(line for line in f.read().splitlines() if line)
+
+
+def read_csv_column(path: Path) -> tuple[str, ...]:
+    with open(path, newline="") as f:
+        return tuple(row[0] for row in csv.reader(f) if row)
+
+
+READERS: dict[str, Callable[[Path], tuple[str, ...]]] = {"lines": read_lines, "csv_column": read_csv_column}
+
+
+@dataclasses.dataclass(frozen=True)
+class Entry:
+    path: str  # relative to the package, with forward slashes
+    kind: str
+    sha256: str
+    size: int  # size and mtime of the source tell cheaply whether it changed since
+    mtime_ns: int
+    offset: int
+    length: int
+    count: int
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return (self.size, self.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+class StringTable(Sequence[str]):
+    """Rows of one dataset, decoded from the mapped bundle on access."""
+
+    def __init__(self, section: memoryview, count: int) -> None:
+        self._offsets = section[: (count + 1) * 8].cast("Q")
+        self._strings = section[(count + 1) * 8 :]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[str]: ...
+
+    def __getitem__(self, i: int | slice) -> str | list[str]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self._strings[self._offsets[i] : self._offsets[i + 1]], "utf-8")
+
+
+def _pack(rows: Sequence[str]) -> bytes:
+    encoded = [row.encode() for row in rows]
+    offsets = array.array("Q", [0, *accumulate(len(e) for e in encoded)])
+    return offsets.tobytes() + b"".join(encoded)
+
+
+class Bundle:
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._data) < HEADER.size:
+            raise BundleFormatError(f"{path} is cut off")
+        magic, version, directory_offset, directory_length = HEADER.unpack_from(self._data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise BundleFormatError(f"{path} is not a version {FORMAT_VERSION} dataset bundle")
+
+        directory = json.loads(self._data[directory_offset : directory_offset + directory_length])
+        self.entries = {(e["path"], e["kind"]): Entry(**e) for e in directory}
+
+    def section(self, entry: Entry) -> bytes:
+        return self._data[entry.offset : entry.offset + entry.length]
+
+    def table(self, path: Path, kind: str, root: Path = PACKAGE_FOLDER) -> StringTable | None:
+        """None if the file isn't bundled or changed since the bundle was built."""
+        if not path.is_relative_to(root):
+            return None
+        relative_path = path.relative_to(root).as_posix()
+        entry = self.entries.get((relative_path, kind))
+        if entry is None:
+            return None
+        if not entry.matches(path.stat()):
+            print(f"{relative_path} changed since the dataset bundle was built, reading it as text.")
+            return None
+        return StringTable(memoryview(self._data)[entry.offset : entry.offset + entry.length], entry.count)
+
+    def close(self) -> None:
+        self._data.close()
+
+
+def open_bundle(path: Path = BUNDLE_FILE) -> Bundle | None:
+    try:
+        return Bundle(path)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:  # BundleFormatError, an empty file or a broken directory
+        print(f"Ignoring dataset bundle: {e}")
+        return None
+
+
+def sources(root: Path = PACKAGE_FOLDER) -> list[tuple[Path, str]]:
+    return [(path, kind) for pattern, kind in SOURCES for path in sorted(root.glob(pattern))]
+
+
+def build(path: Path = BUNDLE_FILE, root: Path = PACKAGE_FOLDER) -> list[str]:
+    """Brings the bundle up to date and returns the sources that had to be parsed again."""
+    old = open_bundle(path)
+    rebuilt = []
+    directory = []
+    sections = []
+    offset = HEADER.size
+
+    for source, kind in sources(root):
+        stat = source.stat()
+        relative_path = source.relative_to(root).as_posix()
+        old_entry = old.entries.get((relative_path, kind)) if old is not None else None
+
+        if old is not None and old_entry is not None and old_entry.matches(stat):
+            sha256 = old_entry.sha256
+            section = old.section(old_entry)
+            count = old_entry.count
+        else:
+            data = source.read_bytes()
+            sha256 = hashlib.sha256(data).hexdigest()
+            if old is not None and old_entry is not None and old_entry.sha256 == sha256:  # only touched
+                section = old.section(old_entry)
+                count = old_entry.count
+            else:
+                rows = READERS[kind](source)
+                section = _pack(rows)
+                count = len(rows)
+                rebuilt.append(relative_path)
+
+        padding = -offset % ALIGNMENT
+        sections.append(b"\0" * padding + section)
+        offset += padding
+        directory.append(Entry(relative_path, kind, sha256, stat.st_size, stat.st_mtime_ns, offset, len(section), count))
+        offset += len(section)
+
+    if old is not None:
+        unchanged = sorted(old.entries.values(), key=lambda e: e.offset) == directory
+        old.close()
+        if unchanged:
+            return rebuilt
+
+    encoded_directory = json.dumps([dataclasses.asdict(entry) for entry in directory]).encode()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, offset, len(encoded_directory)))
+        for section in sections:
+            f.write(section)
+        f.write(encoded_directory)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)  # processes that mapped the old bundle keep reading it
+    return rebuilt
+
+
+def main() -> None:
+    rebuilt = build()
+    print(f"Rebuilt {len(rebuilt)} datasets: {', '.join(rebuilt)}" if rebuilt else "Dataset bundle is up to date.")
+    print(f"{BUNDLE_FILE}: {BUNDLE_FILE.stat().st_size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
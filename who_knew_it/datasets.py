@@ -0,0 +1,136 @@
+"""
+Process-wide registry of the static word lists and CSVs. Every file is read once into a tuple,
+which is immutable and safe to share across threads, and gives O(1) random.choice.
+Files too large to parse whole are indexed instead, see LineIndex. When a dataset bundle is built,
+see data_bundle, its tables are used instead of the text files.
+
+Set WHO_KNEW_IT_RELOAD_DATASETS=1 while editing the files, then they are read again once changed.
+"""
+import array
+import csv
+import dataclasses
+import mmap
+import os
+import random
+import threading
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any, TypeVar
+
+from who_knew_it import data_bundle
+
+T = TypeVar("T")
+
+RELOAD_ON_CHANGE = os.environ.get("WHO_KNEW_IT_RELOAD_DATASETS") == "1"
+
+
+@dataclasses.dataclass(frozen=True)
+class _Loaded:
+    mtime_ns: int
+    value: Any
+
+
+class LineIndex:
+    """
+    Start offsets of the non-empty lines of a memory-mapped file, so k random lines cost O(k)
+    instead of a parse of the whole file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._offsets = array.array("Q")
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        start = 0
+        while start < size:
+            end = self._data.find(b"\n", start)
+            if end == -1:
+                end = size
+            if end > start and self._data[start:end].strip():
+                self._offsets.append(start)
+            start = end + 1
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def line(self, i: int) -> str:
+        start = self._offsets[i]
+        end = self._data.find(b"\n", start)
+        return self._data[start : end if end != -1 else len(self._data)].decode().rstrip("\r")
+
+    def sample(self, k: int) -> list[str]:
+        return [self.line(i) for i in random.sample(range(len(self._offsets)), k)]
+
+
+_loaded: dict[tuple[Path, str], _Loaded] = {}
+_lock = threading.Lock()
+_bundle: data_bundle.Bundle | None = None
+_bundle_opened = False
+
+
+def _bundled(path: Path, kind: str) -> data_bundle.StringTable | None:
+    global _bundle, _bundle_opened
+    if not _bundle_opened:
+        _bundle = data_bundle.open_bundle(data_bundle.BUNDLE_FILE)
+        _bundle_opened = True
+    return _bundle.table(path, kind) if _bundle is not None else None
+
+
+def _read(kind: str) -> Callable[[Path], Sequence[str]]:
+    def read(path: Path) -> Sequence[str]:
+        table = _bundled(path, kind)
+        return table if table is not None else data_bundle.READERS[kind](path)
+
+    return read
+
+
+def _get(path: Path, kind: str, read: Callable[[Path], T]) -> T:
+    key = (path, kind)
+    loaded = _loaded.get(key)  # dict reads are atomic, the lock only serializes loading
+    if loaded is not None and not RELOAD_ON_CHANGE:
+        return loaded.value
+
+    with _lock:
+        loaded = _loaded.get(key)
+        mtime_ns = path.stat().st_mtime_ns
+        if loaded is None or loaded.mtime_ns != mtime_ns:
+            if loaded is not None:
+                print(f"Reloading changed dataset {path.name}")
+            loaded = _Loaded(mtime_ns=mtime_ns, value=read(path))
+            _loaded[key] = loaded
+        return loaded.value
+
+
+def lines(path: Path) -> Sequence[str]:
+    """The non-empty lines of a text file."""
+    return _get(path, "lines", _read("lines"))
+
+
+def csv_column(path: Path) -> Sequence[str]:
+    """The first column of a headerless csv file, quoted values included."""
+    return _get(path, "csv_column", _read("csv_column"))
+
+
+def line_index(path: Path) -> LineIndex:
+    return _get(path, "line_index", LineIndex)
+
+
+def random_line(path: Path) -> str:
+    return random.choice(lines(path))
+
+
+def sample_csv_column(path: Path, k: int) -> list[str]:
+    """The first column of k distinct random rows of a headerless csv file, without reading all of it."""
+    table = _get(path, "bundled_csv_column", lambda p: _bundled(p, "csv_column"))
+    if table is not None:
+        return random.sample(table, k)
+    return [row[0] for row in csv.reader(line_index(path).sample(k))]
+
+
+def clear() -> None:
+    global _bundle_opened
+    with _lock:
+        _loaded.clear()
+        _bundle_opened = False  # the old bundle stays mapped, tables handed out may still point into it
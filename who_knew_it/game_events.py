@@ -0,0 +1,100 @@
+"""
+In-memory change counter per game. Every write to the rows of a game bumps it, so the pollers of the
+browsers only query the database once something happened, and waiting screens wake up right away.
+Like the duckdb connection it lives in the server process, which all sessions share.
+"""
+import threading
+import time
+from collections.abc import Callable, MutableMapping
+from typing import Any
+
+_lock = threading.Lock()
+
+
+class _Game:
+    def __init__(self) -> None:
+        self.version = 0
+        self.closed = False
+        self.changed = threading.Condition(_lock)  # all games share the lock, waiters are only woken by their game
+
+
+_games: dict[int, _Game] = {}
+_closed: set[int] = set()  # game ids aren't reused while the process runs, the database is only wiped at start
+
+
+def _get_game(game_id: int) -> _Game | None:
+    """Call with the lock held. None for closed games, writes to them are late jobs that nobody waits for."""
+    if game_id in _closed:
+        return None
+    return _games.setdefault(game_id, _Game())
+
+
+def bump(game_id: int) -> None:
+    """Call after the write is committed, so that a poller seeing the new version also sees the new rows."""
+    with _lock:
+        game = _get_game(game_id)
+        if game is not None:
+            game.version += 1
+            game.changed.notify_all()
+
+
+def bump_all() -> None:
+    """For writes that could have touched any game, like the ones of the sql editor."""
+    with _lock:
+        for game in _games.values():
+            game.version += 1
+            game.changed.notify_all()
+
+
+def version(game_id: int) -> int:
+    game = _games.get(game_id)
+    return game.version if game is not None else 0
+
+
+def forget(game_id: int) -> None:
+    """For closed games. Waiters give up, pollers that saw a version before notice the change once more."""
+    with _lock:
+        _closed.add(game_id)
+        game = _games.pop(game_id, None)
+        if game is not None:
+            game.closed = True
+            game.changed.notify_all()
+
+
+def changed(game_id: int, seen: MutableMapping[Any, Any], poller: str) -> bool:
+    """
+    Whether the game was written to since the poller last looked. The version is read before the poller
+    queries the database, so a write in between is seen again on the next poll instead of being lost.
+    seen is where the versions are remembered, the session state of the browser.
+    """
+    key = f"{poller}_seen_version_{game_id}"
+    current = version(game_id)
+    if seen.get(key) == current:
+        return False
+    seen[key] = current
+    return True
+
+
+def _closed_or_written_since(game: _Game, seen: int) -> Callable[[], bool]:
+    return lambda: game.closed or game.version != seen
+
+
+def wait_until(game_id: int, condition: Callable[[], bool], timeout: float) -> bool:
+    """
+    Checks condition, usually a query, once and then again after every write to the game until it holds.
+    False if it still doesn't after timeout seconds or the game was closed in the meantime.
+    """
+    give_up_at = time.monotonic() + timeout
+    with _lock:
+        game = _get_game(game_id)
+    if game is None:  # closed already, nothing will wake the wait
+        return condition()
+
+    while True:
+        seen = game.version  # read before checking, so a write during the check wakes the wait below
+        if condition():
+            return True
+        with _lock:
+            woken = game.changed.wait_for(_closed_or_written_since(game, seen), timeout=give_up_at - time.monotonic())
+            if not woken or game.closed:
+                return False
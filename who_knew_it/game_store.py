@@ -0,0 +1,655 @@
+"""
+Where the state of the games lives: the players, the games and who plays in them, the questions, the answers
+and the points. The generation jobs and the question inventory stay in duckdb, see dao.
+
+    WHO_KNEW_IT_GAME_STORE=memory streamlit run who_knew_it/streamlit_app.py
+
+duckdb is the default. The memory engine keeps the same rows in dicts indexed the way the app looks them up,
+which suits the many tiny reads and single row writes of a game better than a columnar database. Nothing is
+lost that was kept before, the database file is wiped on every start anyway, but the sql editor of the admin
+doesn't see the games then.
+"""
+import abc
+import dataclasses
+import itertools
+import random
+import threading
+from collections.abc import Callable
+
+import duckdb
+
+from who_knew_it import dao
+
+
+@dataclasses.dataclass(frozen=True)
+class QuestionRow:
+    question: str | None
+    correct_answer: str | None
+    correct_answer_rank: float
+    is_answered: bool
+    question_type: str | None
+
+
+@dataclasses.dataclass(frozen=True)
+class AnswerRow:
+    player_id: str
+    answer_text: str | None
+    answer_order: float
+    player_id_of_chosen_answer: str | None
+    is_house: bool
+
+
+@dataclasses.dataclass(frozen=True)
+class QuestionState:
+    """Everything the screens show of a question, read at once."""
+
+    question: QuestionRow | None  # None once the game is closed
+    players: dict[str, str]  # player id to name, the house players included
+    answers: list[AnswerRow]  # ordered by player id
+    total_points: dict[str, int]
+    points_entered: bool  # for this question
+
+
+class GameStore(abc.ABC):
+    # players
+
+    @abc.abstractmethod
+    def add_player(self, player_id: str, player_name: str, is_house: bool = False) -> None: ...
+
+    @abc.abstractmethod
+    def set_player_name(self, player_id: str, player_name: str) -> None: ...
+
+    @abc.abstractmethod
+    def get_player_name(self, player_id: str) -> str | None:
+        """None if there is no such player."""
+        ...
+
+    # games and who plays in them
+
+    @abc.abstractmethod
+    def create_game(self, game_stage: int) -> int: ...
+
+    @abc.abstractmethod
+    def get_games_in_stage(self, game_stage: int) -> list[int]: ...
+
+    @abc.abstractmethod
+    def set_game_stage(self, game_id: int, game_stage: int) -> None: ...
+
+    @abc.abstractmethod
+    def get_game_stage(self, game_id: int) -> int | None:
+        """None if the game doesn't exist (anymore)."""
+        ...
+
+    @abc.abstractmethod
+    def get_players_in_game(self, game_id: int) -> dict[str, str]: ...
+
+    @abc.abstractmethod
+    def get_games_of_player(self, player_id: str) -> list[int]: ...
+
+    @abc.abstractmethod
+    def join_game(self, player_id: str, game_id: int, is_host: bool, max_players: int) -> None:
+        """Nothing happens if the game is full."""
+        ...
+
+    @abc.abstractmethod
+    def is_host(self, player_id: str, game_id: int) -> bool: ...
+
+    @abc.abstractmethod
+    def get_hosts(self, game_id: int) -> list[str]: ...
+
+    @abc.abstractmethod
+    def count_human_players(self, game_id: int) -> int: ...
+
+    @abc.abstractmethod
+    def remove_player(self, player_id: str, game_id: int) -> None:
+        """Together with their answers and points."""
+        ...
+
+    @abc.abstractmethod
+    def delete_game(self, game_id: int) -> None: ...
+
+    # questions
+
+    @abc.abstractmethod
+    def add_questions(self, game_id: int, n_questions: int) -> int:
+        """Numbered from 1, existing ones are kept. Returns how many were added."""
+        ...
+
+    @abc.abstractmethod
+    def set_question(self, game_id: int, question_number: int, question: str, correct_answer: str) -> None: ...
+
+    @abc.abstractmethod
+    def get_question(self, game_id: int, question_number: int) -> QuestionRow | None: ...
+
+    @abc.abstractmethod
+    def set_is_answered(self, game_id: int, question_number: int) -> None: ...
+
+    @abc.abstractmethod
+    def get_first_unanswered_question_number(self, game_id: int) -> int | None: ...
+
+    @abc.abstractmethod
+    def get_generation_progress(self, game_id: int) -> dict[int, bool]:
+        """Per question number whether the question and all house fake answers are written."""
+        ...
+
+    @abc.abstractmethod
+    def get_question_types(self, game_id: int) -> dict[int, str | None]: ...
+
+    @abc.abstractmethod
+    def assign_question_type(self, game_id: int, question_number: int, question_type: str) -> str | None:
+        """Only the first assignment counts, returns the type the question has. None if it doesn't exist."""
+        ...
+
+    # answers, the fake ones of the house included, and which answer every player chose
+
+    @abc.abstractmethod
+    def add_answers(self, game_id: int) -> None:
+        """An empty answer of every player in the game to every question, existing ones are kept."""
+        ...
+
+    @abc.abstractmethod
+    def set_answer(self, game_id: int, question_number: int, player_id: str, answer_text: str) -> None: ...
+
+    @abc.abstractmethod
+    def set_fake_answers(self, game_id: int, question_number: int, answer_texts: dict[str, str]) -> None:
+        """Per house player id, inserted or overwritten."""
+        ...
+
+    @abc.abstractmethod
+    def set_chosen_answer(self, game_id: int, question_number: int, player_id: str, chosen_player_id: str) -> None: ...
+
+    @abc.abstractmethod
+    def get_answers(self, game_id: int, question_number: int) -> list[AnswerRow]:
+        """Ordered by player id."""
+        ...
+
+    # points
+
+    @abc.abstractmethod
+    def set_points(self, game_id: int, question_number: int, points_per_player_id: dict[str, int]) -> None:
+        """Inserted or overwritten."""
+        ...
+
+    @abc.abstractmethod
+    def read_question_state(self, game_id: int, question_number: int) -> QuestionState: ...
+
+
+class DuckDBGameStore(GameStore):
+    """The tables of dao.SCHEMA, which the app creates."""
+
+    def __init__(self, connect: Callable[[], duckdb.DuckDBPyConnection], write_attempts: int) -> None:
+        self.connect = connect
+        self.write_attempts = write_attempts
+
+    def _run(self, statement: dao.Statement, **params) -> list[tuple]:
+        with self.connect() as con:
+            return dao.run(con, statement, **params)
+
+    def add_player(self, player_id: str, player_name: str, is_house: bool = False) -> None:
+        self._run(dao.ADD_PLAYER, player_id=player_id, player_name=player_name, is_house=is_house)
+
+    def set_player_name(self, player_id: str, player_name: str) -> None:
+        self._run(dao.SET_PLAYER_NAME, player_id=player_id, player_name=player_name)
+
+    def get_player_name(self, player_id: str) -> str | None:
+        result = self._run(dao.GET_PLAYER_NAME, player_id=player_id)
+        return result[0][0] if result else None
+
+    def create_game(self, game_stage: int) -> int:
+        [(game_id,)] = self._run(dao.CREATE_GAME, game_stage=game_stage)
+        return game_id
+
+    def get_games_in_stage(self, game_stage: int) -> list[int]:
+        return [res[0] for res in self._run(dao.GET_GAMES_IN_STAGE, game_stage=game_stage)]
+
+    def set_game_stage(self, game_id: int, game_stage: int) -> None:
+        self._run(dao.SET_GAME_STAGE, game_id=game_id, game_stage=game_stage)
+
+    def get_game_stage(self, game_id: int) -> int | None:
+        result = self._run(dao.GET_GAME_STAGE, game_id=game_id)
+        return result[0][0] if result else None
+
+    def get_players_in_game(self, game_id: int) -> dict[str, str]:
+        return dict(self._run(dao.GET_PLAYERS_IN_GAME, game_id=game_id))
+
+    def get_games_of_player(self, player_id: str) -> list[int]:
+        return [res[0] for res in self._run(dao.GET_GAMES_OF_PLAYER, player_id=player_id)]
+
+    def join_game(self, player_id: str, game_id: int, is_host: bool, max_players: int) -> None:
+        self._run(dao.JOIN_GAME, player_id=player_id, game_id=game_id, is_host=is_host, max_players=max_players)
+
+    def is_host(self, player_id: str, game_id: int) -> bool:
+        result = self._run(dao.IS_HOST, player_id=player_id, game_id=game_id)
+        return bool(result[0][0]) if result else False
+
+    def get_hosts(self, game_id: int) -> list[str]:
+        return [res[0] for res in self._run(dao.GET_HOSTS, game_id=game_id)]
+
+    def count_human_players(self, game_id: int) -> int:
+        [(count,)] = self._run(dao.COUNT_HUMAN_PLAYERS, game_id=game_id)
+        return count
+
+    def remove_player(self, player_id: str, game_id: int) -> None:
+        with self.connect() as con:
+            con.begin()
+            for statement in dao.REMOVE_PLAYER:
+                dao.run(con, statement, player_id=player_id, game_id=game_id)
+            con.commit()
+
+    def delete_game(self, game_id: int) -> None:
+        # job workers may still be writing the questions of the game
+        for statement in dao.DELETE_GAME:
+            dao.run_retrying_conflicts(self.connect, statement, self.write_attempts, game_id=game_id)
+
+    def add_questions(self, game_id: int, n_questions: int) -> int:
+        [(count,)] = self._run(dao.ADD_QUESTIONS, game_id=game_id, n_questions=n_questions)
+        return count
+
+    def set_question(self, game_id: int, question_number: int, question: str, correct_answer: str) -> None:
+        self._run(
+            dao.SET_QUESTION,
+            game_id=game_id,
+            question_number=question_number,
+            question=question,
+            correct_answer=correct_answer,
+        )
+
+    def get_question(self, game_id: int, question_number: int) -> QuestionRow | None:
+        result = self._run(dao.GET_QUESTION, game_id=game_id, question_number=question_number)
+        return QuestionRow(*result[0]) if result else None
+
+    def set_is_answered(self, game_id: int, question_number: int) -> None:
+        self._run(dao.SET_IS_ANSWERED, game_id=game_id, question_number=question_number)
+
+    def get_first_unanswered_question_number(self, game_id: int) -> int | None:
+        [(question_number,)] = self._run(dao.GET_FIRST_UNANSWERED_QUESTION_NUMBER, game_id=game_id)
+        return question_number
+
+    def get_generation_progress(self, game_id: int) -> dict[int, bool]:
+        return {res[0]: bool(res[1]) for res in self._run(dao.GET_GENERATION_PROGRESS, game_id=game_id)}
+
+    def get_question_types(self, game_id: int) -> dict[int, str | None]:
+        return dict(self._run(dao.GET_QUESTION_TYPES, game_id=game_id))
+
+    def assign_question_type(self, game_id: int, question_number: int, question_type: str) -> str | None:
+        # job workers assign the types of the questions they generate while the host assigns the next one
+        result = dao.run_retrying_conflicts(
+            self.connect,
+            dao.ASSIGN_QUESTION_TYPE,
+            self.write_attempts,
+            game_id=game_id,
+            question_number=question_number,
+            question_type=question_type,
+        )
+        return result[0][0] if result else None
+
+    def add_answers(self, game_id: int) -> None:
+        self._run(dao.ADD_ANSWERS, game_id=game_id)
+
+    def set_answer(self, game_id: int, question_number: int, player_id: str, answer_text: str) -> None:
+        self._run(
+            dao.SET_ANSWER,
+            game_id=game_id,
+            question_number=question_number,
+            player_id=player_id,
+            answer_text=answer_text,
+        )
+
+    def set_fake_answers(self, game_id: int, question_number: int, answer_texts: dict[str, str]) -> None:
+        self._run(
+            dao.SET_FAKE_ANSWERS,
+            game_id=game_id,
+            question_number=question_number,
+            player_ids=list(answer_texts.keys()),
+            answer_texts=list(answer_texts.values()),
+        )
+
+    def set_chosen_answer(self, game_id: int, question_number: int, player_id: str, chosen_player_id: str) -> None:
+        self._run(
+            dao.SET_CHOSEN_ANSWER,
+            game_id=game_id,
+            question_number=question_number,
+            player_id=player_id,
+            player_id_of_chosen_answer=chosen_player_id,
+        )
+
+    def get_answers(self, game_id: int, question_number: int) -> list[AnswerRow]:
+        return [
+            AnswerRow(*res) for res in self._run(dao.GET_ANSWERS, game_id=game_id, question_number=question_number)
+        ]
+
+    def set_points(self, game_id: int, question_number: int, points_per_player_id: dict[str, int]) -> None:
+        self._run(
+            dao.SET_POINTS,
+            game_id=game_id,
+            question_number=question_number,
+            player_ids=list(points_per_player_id.keys()),
+            points=list(points_per_player_id.values()),
+        )
+
+    def read_question_state(self, game_id: int, question_number: int) -> QuestionState:
+        with self.connect() as con:
+            con.begin()  # the four reads see the same state of the game
+            question = dao.run(con, dao.GET_QUESTION, game_id=game_id, question_number=question_number)
+            players = dao.run(con, dao.GET_PLAYERS_IN_GAME, game_id=game_id)
+            answers = dao.run(con, dao.GET_ANSWERS, game_id=game_id, question_number=question_number)
+            points = dao.run(con, dao.GET_TOTAL_POINTS, game_id=game_id, question_number=question_number)
+            con.commit()
+
+        return QuestionState(
+            question=QuestionRow(*question[0]) if question else None,
+            players=dict(players),
+            answers=[AnswerRow(*res) for res in answers],
+            total_points={res[0]: res[1] for res in points},
+            points_entered=any(res[2] for res in points),
+        )
+
+
+@dataclasses.dataclass
+class _Player:
+    name: str
+    is_house: bool
+
+
+@dataclasses.dataclass
+class _Question:
+    correct_answer_rank: float = dataclasses.field(default_factory=random.random)
+    question: str | None = None
+    correct_answer: str | None = None
+    is_answered: bool = False
+    question_type: str | None = None
+
+
+@dataclasses.dataclass
+class _Answer:
+    answer_order: float = dataclasses.field(default_factory=random.random)
+    answer_text: str | None = None
+    player_id_of_chosen_answer: str | None = None
+
+
+@dataclasses.dataclass
+class _Game:
+    game_stage: int
+    players: dict[str, bool] = dataclasses.field(default_factory=dict)  # player id to whether they host
+    questions: dict[int, _Question] = dataclasses.field(default_factory=dict)
+    answers: dict[int, dict[str, _Answer]] = dataclasses.field(default_factory=dict)  # per question by player id
+    points: dict[int, dict[str, int]] = dataclasses.field(default_factory=dict)  # per question by player id
+
+
+class MemoryGameStore(GameStore):
+    """
+    The rows of a game are kept together, so every lookup of the app is a dict access or a scan over the
+    few players of one game. One lock serializes everything, each method sees and leaves a consistent state.
+    Writes to games that don't exist (anymore) are ignored, like an update of no rows.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._players: dict[str, _Player] = {}
+        self._games: dict[int, _Game] = {}
+        self._games_of_player: dict[str, set[int]] = {}
+        self._game_ids = itertools.count(1)
+
+    def add_player(self, player_id: str, player_name: str, is_house: bool = False) -> None:
+        with self._lock:
+            if player_id in self._players:
+                raise ValueError(f"Player {player_id} already exists.")
+            self._players[player_id] = _Player(name=player_name, is_house=is_house)
+
+    def set_player_name(self, player_id: str, player_name: str) -> None:
+        with self._lock:
+            if player_id in self._players:
+                self._players[player_id].name = player_name
+
+    def get_player_name(self, player_id: str) -> str | None:
+        with self._lock:
+            player = self._players.get(player_id)
+            return player.name if player is not None else None
+
+    def create_game(self, game_stage: int) -> int:
+        with self._lock:
+            game_id = next(self._game_ids)
+            self._games[game_id] = _Game(game_stage=game_stage)
+            return game_id
+
+    def get_games_in_stage(self, game_stage: int) -> list[int]:
+        with self._lock:
+            return [game_id for game_id, game in self._games.items() if game.game_stage == game_stage]
+
+    def set_game_stage(self, game_id: int, game_stage: int) -> None:
+        with self._lock:
+            if game_id in self._games:
+                self._games[game_id].game_stage = game_stage
+
+    def get_game_stage(self, game_id: int) -> int | None:
+        with self._lock:
+            game = self._games.get(game_id)
+            return game.game_stage if game is not None else None
+
+    def _players_in_game(self, game_id: int) -> dict[str, str]:
+        game = self._games.get(game_id)
+        if game is None:
+            return {}
+        return {player_id: self._players[player_id].name for player_id in game.players}
+
+    def get_players_in_game(self, game_id: int) -> dict[str, str]:
+        with self._lock:
+            return self._players_in_game(game_id)
+
+    def get_games_of_player(self, player_id: str) -> list[int]:
+        with self._lock:
+            return list(self._games_of_player.get(player_id, ()))
+
+    def join_game(self, player_id: str, game_id: int, is_host: bool, max_players: int) -> None:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None or player_id not in self._players:
+                return
+            if player_id not in game.players and len(game.players) < max_players:
+                game.players[player_id] = is_host
+                self._games_of_player.setdefault(player_id, set()).add(game_id)
+
+    def is_host(self, player_id: str, game_id: int) -> bool:
+        with self._lock:
+            game = self._games.get(game_id)
+            return game is not None and game.players.get(player_id, False)
+
+    def get_hosts(self, game_id: int) -> list[str]:
+        with self._lock:
+            game = self._games.get(game_id)
+            return [player_id for player_id, is_host in game.players.items() if is_host] if game is not None else []
+
+    def count_human_players(self, game_id: int) -> int:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return 0
+            return sum(not self._players[player_id].is_house for player_id in game.players)
+
+    def remove_player(self, player_id: str, game_id: int) -> None:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return
+            game.players.pop(player_id, None)
+            for answers in game.answers.values():
+                answers.pop(player_id, None)
+            for points in game.points.values():
+                points.pop(player_id, None)
+            self._games_of_player.get(player_id, set()).discard(game_id)
+
+    def delete_game(self, game_id: int) -> None:
+        with self._lock:
+            game = self._games.pop(game_id, None)
+            if game is None:
+                return
+            for player_id in game.players:
+                self._games_of_player[player_id].discard(game_id)
+
+    def add_questions(self, game_id: int, n_questions: int) -> int:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return 0
+            missing = [n for n in range(1, n_questions + 1) if n not in game.questions]
+            for question_number in missing:
+                game.questions[question_number] = _Question()
+            return len(missing)
+
+    def _question(self, game_id: int, question_number: int) -> _Question | None:
+        game = self._games.get(game_id)
+        return game.questions.get(question_number) if game is not None else None
+
+    def set_question(self, game_id: int, question_number: int, question: str, correct_answer: str) -> None:
+        with self._lock:
+            row = self._question(game_id, question_number)
+            if row is not None:
+                row.question = question
+                row.correct_answer = correct_answer
+
+    def _question_row(self, game_id: int, question_number: int) -> QuestionRow | None:
+        row = self._question(game_id, question_number)
+        if row is None:
+            return None
+        return QuestionRow(
+            question=row.question,
+            correct_answer=row.correct_answer,
+            correct_answer_rank=row.correct_answer_rank,
+            is_answered=row.is_answered,
+            question_type=row.question_type,
+        )
+
+    def get_question(self, game_id: int, question_number: int) -> QuestionRow | None:
+        with self._lock:
+            return self._question_row(game_id, question_number)
+
+    def set_is_answered(self, game_id: int, question_number: int) -> None:
+        with self._lock:
+            row = self._question(game_id, question_number)
+            if row is not None:
+                row.is_answered = True
+
+    def get_first_unanswered_question_number(self, game_id: int) -> int | None:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return None
+            return min((n for n, row in game.questions.items() if not row.is_answered), default=None)
+
+    def get_generation_progress(self, game_id: int) -> dict[int, bool]:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return {}
+            return {
+                question_number: row.question is not None
+                and all(
+                    answer.answer_text is not None
+                    for player_id, answer in game.answers.get(question_number, {}).items()
+                    if self._players[player_id].is_house
+                )
+                for question_number, row in sorted(game.questions.items())
+            }
+
+    def get_question_types(self, game_id: int) -> dict[int, str | None]:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return {}
+            return {question_number: row.question_type for question_number, row in game.questions.items()}
+
+    def assign_question_type(self, game_id: int, question_number: int, question_type: str) -> str | None:
+        with self._lock:
+            row = self._question(game_id, question_number)
+            if row is None:
+                return None
+            if row.question_type is None:
+                row.question_type = question_type
+            return row.question_type
+
+    def add_answers(self, game_id: int) -> None:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return
+            for question_number in game.questions:
+                answers = game.answers.setdefault(question_number, {})
+                for player_id in game.players:
+                    answers.setdefault(player_id, _Answer())
+
+    def _answer(self, game_id: int, question_number: int, player_id: str) -> _Answer | None:
+        game = self._games.get(game_id)
+        return game.answers.get(question_number, {}).get(player_id) if game is not None else None
+
+    def set_answer(self, game_id: int, question_number: int, player_id: str, answer_text: str) -> None:
+        with self._lock:
+            answer = self._answer(game_id, question_number, player_id)
+            if answer is not None:
+                answer.answer_text = answer_text
+
+    def set_fake_answers(self, game_id: int, question_number: int, answer_texts: dict[str, str]) -> None:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return
+            answers = game.answers.setdefault(question_number, {})
+            for player_id, answer_text in answer_texts.items():
+                answers.setdefault(player_id, _Answer()).answer_text = answer_text
+
+    def set_chosen_answer(self, game_id: int, question_number: int, player_id: str, chosen_player_id: str) -> None:
+        with self._lock:
+            answer = self._answer(game_id, question_number, player_id)
+            if answer is not None:
+                answer.player_id_of_chosen_answer = chosen_player_id
+
+    def _answer_rows(self, game_id: int, question_number: int) -> list[AnswerRow]:
+        game = self._games.get(game_id)
+        if game is None:
+            return []
+        return [
+            AnswerRow(
+                player_id=player_id,
+                answer_text=answer.answer_text,
+                answer_order=answer.answer_order,
+                player_id_of_chosen_answer=answer.player_id_of_chosen_answer,
+                is_house=self._players[player_id].is_house,
+            )
+            for player_id, answer in sorted(game.answers.get(question_number, {}).items())
+        ]
+
+    def get_answers(self, game_id: int, question_number: int) -> list[AnswerRow]:
+        with self._lock:
+            return self._answer_rows(game_id, question_number)
+
+    def set_points(self, game_id: int, question_number: int, points_per_player_id: dict[str, int]) -> None:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is not None:
+                game.points.setdefault(question_number, {}).update(points_per_player_id)
+
+    def read_question_state(self, game_id: int, question_number: int) -> QuestionState:
+        with self._lock:
+            game = self._games.get(game_id)
+            total_points: dict[str, int] = {}
+            for points in game.points.values() if game is not None else ():
+                for player_id, point in points.items():
+                    total_points[player_id] = total_points.get(player_id, 0) + point
+
+            return QuestionState(
+                question=self._question_row(game_id, question_number),
+                players=self._players_in_game(game_id),
+                answers=self._answer_rows(game_id, question_number),
+                total_points=total_points,
+                points_entered=bool(game is not None and game.points.get(question_number)),
+            )
+
+
+ENGINES = ("duckdb", "memory")
+
+
+def open_store(engine: str, connect: Callable[[], duckdb.DuckDBPyConnection], write_attempts: int) -> GameStore:
+    if engine == "memory":
+        return MemoryGameStore()
+    if engine == "duckdb":
+        return DuckDBGameStore(connect=connect, write_attempts=write_attempts)
+    raise ValueError(f"Unknown game store engine {engine!r}, choose from {', '.join(ENGINES)}.")
@@ -0,0 +1,157 @@
+import dataclasses
+import enum
+import queue
+import threading
+from collections.abc import Callable
+
+from who_knew_it import api_call, rate_limit
+
+MAX_WORKERS = 8  # generation is I/O bound, the rate limiter decides how much really runs at once
+JOB_POLL_INTERVAL = 30.0  # fallback for jobs enqueued by other processes, enqueueing in this one notifies directly
+
+
+class JobKind(enum.StrEnum):
+    question = "question"
+    fake_answers = "fake_answers"
+
+
+class JobStatus(enum.StrEnum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+UNFINISHED_JOB_STATUSES = (JobStatus.queued, JobStatus.running)
+
+
+@dataclasses.dataclass(frozen=True)
+class Job:
+    game_id: int
+    question_number: int
+    kind: JobKind
+    priority: rate_limit.Priority
+
+    @property
+    def key(self) -> str:
+        """At most one job per key exists, which makes enqueueing idempotent."""
+        return job_key(self.game_id, self.question_number, self.kind)
+
+
+def job_key(game_id: int, question_number: int, kind: JobKind) -> str:
+    return f"{game_id}:{question_number}:{kind}"
+
+
+@dataclasses.dataclass
+class JobMetrics:
+    queue_depth: int
+    running: int
+    failed: int
+    mean_wait: float | None  # seconds from enqueueing to a worker picking the job up
+    mean_latency: float | None  # seconds from enqueueing to the job being done
+
+
+class JobWorkers:
+    """
+    Worker threads of the server process that run the jobs of the queue in the database. The queue itself lives
+    behind the callables, so jobs survive the session that enqueued them. They don't survive the server: the app
+    wipes the database at every start, together with the games the jobs belong to.
+
+    One claimer thread claims a job whenever a worker is free and was notified of a new one, or the poll interval
+    passed, and hands it to the workers. An idle server doesn't write to the queue more than once per interval.
+    """
+
+    def __init__(
+        self,
+        claim: Callable[[], Job | None],
+        run: Callable[[Job], None],
+        finish: Callable[[Job, JobStatus, str | None], None],
+        n_workers: int = MAX_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL,
+    ) -> None:
+        if n_workers < 1:
+            raise ValueError(f"n_workers must be >= 1, found {n_workers}")
+
+        self._claim = claim
+        self._run = run
+        self._finish = finish
+        self.n_workers = n_workers
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Condition()
+        self._n_notifications = 0
+        self._n_idle_workers = n_workers
+        self._stopped = False
+        self._jobs: queue.SimpleQueue[Job | None] = queue.SimpleQueue()  # None stops a worker
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.n_workers):
+            thread = threading.Thread(target=self._work, name=f"generation-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        claimer = threading.Thread(target=self._claim_jobs, name="generation-claimer", daemon=True)
+        claimer.start()
+        self._threads.append(claimer)
+
+    def notify(self) -> None:
+        """Wakes up the claimer after a job was enqueued."""
+        with self._wakeup:
+            self._n_notifications += 1
+            self._wakeup.notify_all()
+
+    def stop(self, timeout: float | None = None) -> None:
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify_all()
+        for _ in range(self.n_workers):
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _claim_jobs(self) -> None:
+        while True:
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._stopped or self._n_idle_workers > 0)
+                if self._stopped:
+                    return
+                n_seen = self._n_notifications
+
+            try:
+                job = self._claim()
+            except Exception as e:  # the claimer must not die on a database hiccup
+                print(f"Claiming a job failed: {e!r}")
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait_for(self._notified_since(n_seen), timeout=self.poll_interval)
+                continue
+
+            with self._wakeup:
+                self._n_idle_workers -= 1
+            self._jobs.put(job)
+
+    def _notified_since(self, n_seen: int) -> Callable[[], bool]:
+        return lambda: self._stopped or self._n_notifications != n_seen
+
+    def _work(self) -> None:
+        while (job := self._jobs.get()) is not None:
+            try:
+                self._run_job(job)
+            except Exception as e:
+                print(f"Finishing job {job.key} failed: {e!r}")
+            with self._wakeup:
+                self._n_idle_workers += 1
+                self._wakeup.notify_all()
+
+    def _run_job(self, job: Job) -> None:
+        try:
+            with api_call.priority(job.priority):
+                self._run(job)
+        except Exception as e:
+            print(f"Job {job.key} failed: {e!r}")
+            self._finish(job, JobStatus.failed, repr(e))
+        else:
+            self._finish(job, JobStatus.done, None)
@@ -0,0 +1,206 @@
+import dataclasses
+import threading
+import time
+from collections.abc import Callable
+
+from who_knew_it import api_call, question_types, rate_limit, scheduler
+
+LOW_WATER_MARK = 2  # bundles kept ready per question type, 0 turns refilling off
+REFILL_POLL_INTERVAL = 5.0
+REFILL_ERROR_BACKOFF = 30.0
+
+
+@dataclasses.dataclass(frozen=True)
+class QuestionBundle:
+    """A fully generated question, ready to be put into a game without calling the model."""
+
+    question: str
+    correct_answer: str
+    fake_answers: list[str]
+
+
+@dataclasses.dataclass
+class InventoryStats:
+    hits: int = 0
+    misses: int = 0
+    refills: int = 0
+    refill_errors: int = 0
+    n_refill_lags: int = 0
+    total_refill_lag: float = 0.0  # seconds from falling below the low-water mark until it is reached again
+    max_refill_lag: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        claims = self.hits + self.misses
+        return self.hits / claims if claims else 0.0
+
+    @property
+    def mean_refill_lag(self) -> float | None:
+        return self.total_refill_lag / self.n_refill_lags if self.n_refill_lags else None
+
+
+def generate_bundle(
+    question_type: str, n_fake_answers: int, question_deadline: float, fake_answers_deadline: float
+) -> QuestionBundle:
+    generator = question_types.get_generator(question_types.QuestionType(question_type))
+    with api_call.deadline(question_deadline), scheduler.measure(question_type):
+        question_object = generator.generate_question_and_correct_answer()
+    with api_call.deadline(fake_answers_deadline):
+        fake_answers = generator.write_fake_answers(
+            question=question_object.question_text(),
+            correct_answer=question_object.get_correct_answer(),
+            n_fake_answers=n_fake_answers,
+        )
+    return QuestionBundle(
+        question=question_object.question_text(),
+        correct_answer=question_object.get_correct_answer(),
+        fake_answers=fake_answers,
+    )
+
+
+_stats: dict[str, InventoryStats] = {}
+_stats_lock = threading.Lock()
+
+
+def record_claim(question_type: str, hit: bool) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(question_type, InventoryStats())
+        if hit:
+            stats.hits += 1
+        else:
+            stats.misses += 1
+
+
+def _record_refill(question_type: str, succeeded: bool) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(question_type, InventoryStats())
+        if succeeded:
+            stats.refills += 1
+        else:
+            stats.refill_errors += 1
+
+
+def _record_refill_lag(question_type: str, lag: float) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(question_type, InventoryStats())
+        stats.n_refill_lags += 1
+        stats.total_refill_lag += lag
+        stats.max_refill_lag = max(stats.max_refill_lag, lag)
+
+
+def get_stats() -> dict[str, InventoryStats]:
+    with _stats_lock:
+        return {question_type: dataclasses.replace(stats) for question_type, stats in _stats.items()}
+
+
+class Refiller:
+    """
+    Keeps at least low_water_mark bundles of every question type in the inventory.
+    There is one thread per question type, so a slow generator doesn't hold up the others.
+
+    With on_demand a type is only refilled once a game asked for it, see demand. The inventory lives in the
+    database that is wiped at every start, so otherwise every start of a server would spend the model quota on
+    bundles of every type right away, with no game in sight.
+    """
+
+    def __init__(
+        self,
+        question_types: list[str],
+        count: Callable[[str], int],
+        generate: Callable[[str], QuestionBundle],
+        put: Callable[[str, QuestionBundle], None],
+        low_water_mark: int = LOW_WATER_MARK,
+        poll_interval: float = REFILL_POLL_INTERVAL,
+        error_backoff: float = REFILL_ERROR_BACKOFF,
+        on_demand: bool = False,
+    ) -> None:
+        self.question_types = question_types
+        self._count = count
+        self._generate = generate
+        self._put = put
+        self.low_water_mark = low_water_mark
+        self.poll_interval = poll_interval
+        self.error_backoff = error_backoff
+        self.on_demand = on_demand
+
+        self._wakeup = threading.Condition()
+        self._n_notifications = 0
+        self._demanded: set[str] = set()
+        self._stopped = False
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self.low_water_mark < 1:
+            return
+        for question_type in self.question_types:
+            thread = threading.Thread(
+                target=self._refill, args=(question_type,), name=f"refill-{question_type}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self) -> None:
+        """Checks the inventory levels right away, e.g. after a bundle was claimed."""
+        with self._wakeup:
+            self._n_notifications += 1
+            self._wakeup.notify_all()
+
+    def demand(self, question_type: str) -> None:
+        """A game claimed a bundle of the type, from now on it is kept filled."""
+        with self._wakeup:
+            self._demanded.add(question_type)
+            self._n_notifications += 1
+            self._wakeup.notify_all()
+
+    def stop(self, timeout: float | None = None) -> None:
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _wait(self, n_seen: int | None, timeout: float) -> None:
+        """With n_seen None only stopping ends the wait early, so failures back off despite claims."""
+        with self._wakeup:
+            self._wakeup.wait_for(
+                lambda: self._stopped or (n_seen is not None and self._n_notifications != n_seen), timeout=timeout
+            )
+
+    def _refill(self, question_type: str) -> None:
+        below_since: float | None = None
+        while True:
+            with self._wakeup:
+                self._wakeup.wait_for(
+                    lambda: self._stopped or not self.on_demand or question_type in self._demanded
+                )
+                if self._stopped:
+                    return
+                n_seen = self._n_notifications
+
+            try:
+                level = self._count(question_type)
+            except Exception as e:
+                print(f"Counting the {question_type} inventory failed: {e!r}")
+                self._wait(None, self.error_backoff)
+                continue
+
+            if level >= self.low_water_mark:
+                if below_since is not None:
+                    _record_refill_lag(question_type, time.monotonic() - below_since)
+                    below_since = None
+                self._wait(n_seen, self.poll_interval)
+                continue
+
+            if below_since is None:
+                below_since = time.monotonic()
+
+            try:
+                with api_call.priority(rate_limit.Priority.prefetch):
+                    bundle = self._generate(question_type)
+                self._put(question_type, bundle)
+            except Exception as e:
+                print(f"Refilling the {question_type} inventory failed: {e!r}")
+                _record_refill(question_type, succeeded=False)
+                self._wait(None, self.error_backoff)
+            else:
+                _record_refill(question_type, succeeded=True)
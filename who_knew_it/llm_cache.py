@@ -0,0 +1,129 @@
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent.parent / "cache" / "llm"
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+EVICT_TO_FRACTION = 0.9  # evict a little more than needed so not every put triggers a directory scan
+
+
+def cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+
+@dataclasses.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of model responses. Each entry is a file named after the hash of
+    model and prompt. The file's mtime is bumped on every hit, so evicting the oldest mtimes first is LRU.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None  # computed lazily on the first put
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, model: str, prompt: str, ttl: float) -> str | None:
+        path = self._path(cache_key(model, prompt))
+        try:
+            entry = json.loads(path.read_text())
+            created, response = float(entry["created"]), entry["response"]
+        except FileNotFoundError:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        except (ValueError, KeyError, TypeError):  # truncated or not written by us, it would miss forever
+            self._remove(path)
+            with self._lock:
+                self.stats.misses += 1
+            return None
+
+        if time.time() - created > ttl:
+            self._remove(path)
+            with self._lock:
+                self.stats.misses += 1
+                self.stats.expired += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # evicted concurrently, the content we read is still valid
+            pass
+        with self._lock:
+            self.stats.hits += 1
+        return response
+
+    def put(self, model: str, prompt: str, response: str) -> None:
+        path = self._path(cache_key(model, prompt))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        encoded = json.dumps({"model": model, "created": time.time(), "response": response}).encode()
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(encoded)
+        os.replace(tmp_path, path)  # atomic, readers never see half written entries
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_total_bytes()
+            else:
+                self._total_bytes += len(encoded)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan_total_bytes(self) -> int:
+        return sum(f.stat().st_size for f in self.directory.glob("*/*.json"))
+
+    def _evict(self) -> None:
+        entries = []
+        for f in self.directory.glob("*/*.json"):
+            try:
+                stat = f.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, f))
+        entries.sort()
+
+        total_bytes = sum(size for _, size, _ in entries)
+        target_bytes = self.max_bytes * EVICT_TO_FRACTION
+        for _, size, f in entries:
+            if total_bytes <= target_bytes:
+                break
+            self._remove(f)
+            total_bytes -= size
+            self.stats.evictions += 1
+        self._total_bytes = total_bytes
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for f in self.directory.glob("*/*.json"):
+                self._remove(f)
+            self._total_bytes = 0
@@ -3,7 +3,7 @@ from pathlib import Path
 
 import imdb  # type: ignore
 
-from who_knew_it import api_call, questions, random_word
+from who_knew_it import api_call, questions, random_word, structured_output
 
 PROMPT_FOLDER_PATH = Path(__file__).parent / "prompts"
 
@@ -32,9 +32,21 @@ class MovieQuestionGenerator(questions.QuestionGenerator):
         if n_fake_answers < 0:
             raise ValueError("n_fake_answers must be >= 0")
 
-        fake_answers = []
+        if n_fake_answers == 0:
+            return []
+
         avoid_examples = self.avoid_examples + [correct_answer]
 
+        fake_answers = create_fake_movie_synopses(
+            info_about_film=question,
+            avoid_examples=avoid_examples,
+            n_synopses=n_fake_answers,
+        )
+        if fake_answers is not None:
+            return fake_answers
+
+        print("Batched synopses failed, writing them one by one.")
+        fake_answers = []
         for _ in range(n_fake_answers):
             fake_answer_text = create_fake_movie_synopsis(
                 info_about_film=question,
@@ -52,7 +64,7 @@ def _combine_synopsises(film_name, synopsis_list: list[str]) -> str:
         prompt += synopsis
         prompt += "\n\n"
 
-    return api_call.prompt_model(prompt=prompt)
+    return api_call.prompt_model(prompt=prompt, cache_ttl=api_call.CACHE_TTL_SHORT)  # imdb plots can get edited
 
 
 
@@ -62,6 +74,7 @@ def random_unknown_movie() -> imdb.Movie:
     ia = imdb.Cinemagoer()
 
     while True:
+        api_call.check_deadline()
         word = random_word.get_random_word()
         print("random word: ", word)
         try:
@@ -70,6 +83,7 @@ def random_unknown_movie() -> imdb.Movie:
             continue
 
         for searched_movie in searched_movie_list:
+            api_call.check_deadline()
             movie = ia.get_movie(searched_movie.movieID)
             if not movie.data.get("plot"):
                 print("unsuitable: ", movie.data["title"], "no plot")
@@ -114,6 +128,34 @@ def select_film_and_generate_synopsis() -> MovieQuestion:
     return MovieQuestion(title=retrieved_title, year=year, correct_answer=combined_synopsis)
 
 
+def _avoid_list_string(avoid_examples: list[str]) -> str:
+    if not avoid_examples:
+        return ""
+
+    avoid_list_string = (
+        "Please make the synopses completely different from the following examples. Don't reuse character names,"
+        " and use a different genre of film:\n"
+    )
+    avoid_list_string += "\n\n".join([" " * 4 + example for example in avoid_examples])
+    avoid_list_string += "\n\n"
+    return avoid_list_string
+
+
+def create_fake_movie_synopses(info_about_film: str, avoid_examples: list[str], n_synopses: int) -> list[str] | None:
+    prompt = f"""
+Please write {n_synopses} fake film synopses for the following film: {info_about_film}.
+Each synopsis should roughly be 3-5 sentences long. Ideally a bit funny or bizarre but still
+somewhat believable. The synopses should be entirely made up, don't use any knowledge you
+might have of the actual film. The synopses must be completely different from each other, each with
+its own characters and a different genre of film.
+{_avoid_list_string(avoid_examples)}
+Please output only a list of the {n_synopses} synopses and nothing else.
+"""
+    return structured_output.prompt_structured(
+        prompt, structured_output.string_list(n_synopses), site="movie.fake_answers"
+    )
+
+
 def create_fake_movie_synopsis(info_about_film: str, avoid_examples: list[str]) -> str:
     if avoid_examples:
         avoid_list_string = (
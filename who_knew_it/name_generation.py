@@ -1,17 +1,18 @@
 import pathlib
 import random
+from collections.abc import Sequence
+
+from who_knew_it import datasets
 
 NAME_FILES_DIR = pathlib.Path(__file__).parent / "name-generation"
 
 
-def big_related_words() -> list[str]:
-    with open(NAME_FILES_DIR / "big-related-words.txt") as f:
-        return f.read().splitlines()
+def big_related_words() -> Sequence[str]:
+    return datasets.lines(NAME_FILES_DIR / "big-related-words.txt")
 
 
-def wet_related_words() -> list[str]:
-    with open(NAME_FILES_DIR / "wet-related-words.txt") as f:
-        return f.read().splitlines()
+def wet_related_words() -> Sequence[str]:
+    return datasets.lines(NAME_FILES_DIR / "wet-related-words.txt")
 
 
 def generate_player_name() -> str:
@@ -2,7 +2,7 @@ import dataclasses
 import pathlib
 import random
 
-from who_knew_it import api_call, questions
+from who_knew_it import api_call, datasets, questions
 
 NICKNAMES_FOLDER = pathlib.Path(__file__).parent / "nicknames"
 
@@ -51,9 +51,7 @@ class NicknameQuestionGenerator(questions.QuestionGenerator):
 
     def generate_question_and_correct_answer(self) -> NicknameQuestion:
         sport = NicknameQuestionGenerator.random_sport()
-        file = NICKNAMES_FOLDER / f"{sport}.csv"
-        with open(file, "r") as f:
-            lines = f.readlines()
+        lines = datasets.lines(NICKNAMES_FOLDER / f"{sport}.csv")
 
         while True:
             random_line = random.choice(lines).strip()
@@ -1,6 +1,8 @@
 import requests
 
-from who_knew_it import api_call, questions, random_word
+from who_knew_it import api_call, questions, random_word, structured_output
+
+ITUNES_TIMEOUT = 10.0
 
 
 class PodcastQuestion(questions.Question):
@@ -26,7 +28,7 @@ class PodcastQuestionGenerator(questions.QuestionGenerator):
             query = f"term={a_word}&limit=30&entity=podcast"
             print(query)
 
-            response = requests.get(itunes_search_url + query)
+            response = requests.get(itunes_search_url + query, timeout=api_call.timeout_within_deadline(ITUNES_TIMEOUT))
             json_response = response.json()
             
             for result in json_response["results"]:
@@ -49,6 +51,7 @@ class PodcastQuestionGenerator(questions.QuestionGenerator):
     def generate_question_and_correct_answer(self) -> PodcastQuestion:
 
         while True:
+            api_call.check_deadline()
             candidate_podcasts = self.get_random_podcasts()
 
             candidates_str ="\n\n".join([f"{i}:'{result.podcast_title}', {result.genre}" for i, result in enumerate(candidate_podcasts)])
@@ -63,44 +66,34 @@ class PodcastQuestionGenerator(questions.QuestionGenerator):
             """
 
             print(prompt)
-            result = api_call.prompt_model(prompt=prompt)
-
-            try:
-                result_number = int(result.strip())
-                
-            except ValueError:
-                print("No fitting candidate found for response: ", result_number)
+            result_number = structured_output.prompt_structured(
+                prompt, structured_output.choice_index(len(candidate_podcasts)), site="podcast.select"
+            )
+            if result_number is None:
                 print("Candidates: ", candidate_podcasts)
                 continue
 
-            if 0 <= result_number < len(candidate_podcasts):
-                return candidate_podcasts[result_number]
+            return candidate_podcasts[result_number]
 
 
     def write_fake_answers(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
-        del correct_answer  # not needed here
-
-        while True:
-            starting_letter_clause = f"The first podcast should start with an '{random_word.random_letter()}'."  # to add more randomness
-            if n_fake_answers > 1:
-                starting_letter_clause += f" The second podcast should start with an '{random_word.random_letter()}'."
-            
-            for i in range(2, n_fake_answers):
-                starting_letter_clause += f" The {i + 1}. podcast should start with an '{random_word.random_letter()}'."
-
+        def request_answers(n_missing: int, accepted: list[str]) -> list[str] | None:
             prompt = f"""
             You are playing a game where you have to write convincing and fun fake answers, that could trick people into picking it. Please invent fitting podcast titles
             that fit the following question: "{question}".
-            Please write {n_fake_answers} fake podcast titles and nothing else in a list separated by newlines. Ideally, the podcast title is a bit quirky or funny.
-            {starting_letter_clause}
+            Please write {n_missing} fake podcast titles and nothing else in a list. Ideally, the podcast title is a bit quirky or funny.
+            {random_word.starting_letter_clause("podcast", n_missing)}
+            {questions.avoid_clause(accepted)}
             Please answer only with that list and nothing else.
             """
             print(prompt)
-            response = api_call.prompt_model(prompt=prompt)
-
-            split_response = response.split("\n")
-
-            fake_answers = [r.replace("*", "").strip() for r in split_response if r.strip()]
-
-            if len(fake_answers) == n_fake_answers:
-                return fake_answers
+            return structured_output.prompt_structured(
+                prompt, structured_output.string_list(n_missing, exact=False, names=True), site="podcast.fake_answers"
+            )
+
+        return questions.collect_fake_answers(
+            request_answers,
+            n_fake_answers=n_fake_answers,
+            site="podcast.fake_answers",
+            is_valid=lambda answer: answer.lower() != correct_answer.lower(),
+        )
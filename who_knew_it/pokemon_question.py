@@ -1,8 +1,14 @@
 import pathlib
+import random
 
-import pandas as pd
-
-from who_knew_it import api_call, questions, random_word
+from who_knew_it import (
+    api_call,
+    datasets,
+    questions,
+    random_word,
+    scoring,
+    structured_output,
+)
 
 POKEMON_FOLDER = pathlib.Path(__file__).parent / "pokemon"
 
@@ -22,16 +28,17 @@ class PokemonQuestionGenerator(questions.QuestionGenerator):
 
     @staticmethod
     def random_pokemon() -> list[str]:
-        file = POKEMON_FOLDER / "pokemon.csv"
-
-        df = pd.read_csv(file, names=["name"])
-
         how_many = 10
 
-        return df.sample(how_many).reset_index(drop=True)["name"].tolist()
+        return random.sample(datasets.csv_column(POKEMON_FOLDER / "pokemon.csv"), how_many)
 
     def generate_question_and_correct_answer(self):
+        row_index = scoring.weighted_sample(scoring.POKEMON)
+        if row_index is not None:
+            return PokemonQuestion(name=scoring.rows(scoring.POKEMON)[row_index])
+
         while True:
+            api_call.check_deadline()
             candidates = self.random_pokemon()
 
             prompt = f"""
@@ -42,49 +49,34 @@ class PokemonQuestionGenerator(questions.QuestionGenerator):
             Please answer only with the exact pokemon name as written above and nothing else.
             """
 
-            answer = api_call.prompt_model(prompt=prompt)
+            answer = structured_output.prompt_structured(
+                prompt, structured_output.choice(candidates), site="pokemon.select"
+            )
+            if answer is not None:
+                return PokemonQuestion(name=answer)
 
-            fitting_answers = [a for a in candidates if a.lower().strip() == answer.lower().strip()]
-            if len(fitting_answers) == 1:
-                return PokemonQuestion(name=fitting_answers[0])
-            
-            print("No fitting candidate found for response: ", answer)
             print("Candidates: ", candidates)
 
     
     def write_fake_answers(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
-        del correct_answer  # not needed here
-
-        file = POKEMON_FOLDER / "pokemon.csv"
-
-        df = pd.read_csv(file, names=["name"])
-        
-        while True:
-            starting_letter_clause = f"The first pokemon should start with an '{random_word.random_letter()}'."  # to add more randomness
-            if n_fake_answers > 1:
-                starting_letter_clause += f" The second pokemon should start with an '{random_word.random_letter()}'."
-            
-            for i in range(2, n_fake_answers):
-                starting_letter_clause += f" The {i + 1}. pokemon should start with an '{random_word.random_letter()}'."
+        real_pokemon = {name.lower() for name in datasets.csv_column(POKEMON_FOLDER / "pokemon.csv")}
 
+        def request_answers(n_missing: int, accepted: list[str]) -> list[str] | None:
             prompt = f"""
             You are playing a game where you have to write convincing and fun fake answers, that could trick people into picking it. Please invent fitting fake Pokemon names.
-            Please write {n_fake_answers} animal names and nothing else in a list separated by newlines. Don't start the names with 'The'.
-            {starting_letter_clause}
+            Please write {n_missing} animal names and nothing else in a list. Don't start the names with 'The'.
+            {random_word.starting_letter_clause("pokemon", n_missing)}
+            {questions.avoid_clause(accepted)}
             Please answer only with that list and nothing else.
             """
             print(prompt)
-            response = api_call.prompt_model(prompt=prompt)
-
-            split_response = response.split("\n")
-
-            fake_answers = [r.replace("*", "").strip() for r in split_response if r.strip()]
-
-            if real_pokemon:=[a for a in df["name"].tolist() if a in fake_answers]:
-                print(f"Some of the fake answers are already in the dataset: {real_pokemon}. Try again.")
-                continue
-
-            if len(fake_answers) == n_fake_answers:
-                return fake_answers
-        
-
+            return structured_output.prompt_structured(
+                prompt, structured_output.string_list(n_missing, exact=False, names=True), site="pokemon.fake_answers"
+            )
+
+        return questions.collect_fake_answers(
+            request_answers,
+            n_fake_answers=n_fake_answers,
+            site="pokemon.fake_answers",
+            is_valid=lambda answer: answer.lower() not in real_pokemon,
+        )
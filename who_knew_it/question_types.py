@@ -0,0 +1,51 @@
+import enum
+import functools
+import importlib
+
+from who_knew_it import questions
+
+
+class QuestionType(enum.StrEnum):
+    movie = "movie"
+    animal = "animal"
+    word_definition = "word_definition"
+    arxiv = "arxiv"
+    pokemon = "pokemon"
+    podcast = "podcast"
+
+
+# indexed by question number modulo its length, question numbers are 1 indexed so the movie comes last
+ROTATION = [
+    QuestionType.movie,
+    QuestionType.animal,
+    QuestionType.word_definition,
+    QuestionType.arxiv,
+    QuestionType.pokemon,
+    QuestionType.podcast,
+]
+
+
+# "module:class", imported on first use so a new server process doesn't load arxiv, imdb and the
+# datasets before a game needs them
+GENERATORS = {
+    QuestionType.movie: "who_knew_it.movie_suggestion:MovieQuestionGenerator",
+    QuestionType.animal: "who_knew_it.animal_question:AnimalQuestionGenerator",
+    QuestionType.word_definition: "who_knew_it.word_definition_question:OldEnglishWordDefinitionQuestionGenerator",
+    QuestionType.arxiv: "who_knew_it.arxiv_question:ArxivQuestionGenerator",
+    QuestionType.pokemon: "who_knew_it.pokemon_question:PokemonQuestionGenerator",
+    QuestionType.podcast: "who_knew_it.podcast_question:PodcastQuestionGenerator",
+}
+
+
+def question_type_for_number(question_number: int) -> QuestionType:
+    return ROTATION[question_number % len(ROTATION)]
+
+
+@functools.cache
+def _generator_class(question_type: QuestionType) -> type[questions.QuestionGenerator]:
+    module_name, class_name = GENERATORS[question_type].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_generator(question_type: QuestionType) -> questions.QuestionGenerator:
+    return _generator_class(question_type)()
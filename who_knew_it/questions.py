@@ -1,4 +1,13 @@
 import abc
+import asyncio
+import dataclasses
+import threading
+from collections.abc import Callable, Coroutine
+from typing import Any, TypeVar
+
+from who_knew_it import api_call
+
+T = TypeVar("T")
 
 
 class Question(abc.ABC):
@@ -19,3 +28,92 @@ class QuestionGenerator(abc.ABC):
     @abc.abstractmethod
     def write_fake_answers(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
         ...
+
+    async def generate_question_and_correct_answer_async(self) -> Question:
+        # Generators can override this with a native implementation on top of api_call.prompt_model_async.
+        return await asyncio.to_thread(self.generate_question_and_correct_answer)
+
+    async def write_fake_answers_async(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
+        return await asyncio.to_thread(
+            self.write_fake_answers,
+            question=question,
+            correct_answer=correct_answer,
+            n_fake_answers=n_fake_answers,
+        )
+
+
+def run_sync(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Runs a coroutine to completion from blocking code such as the Streamlit script thread."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    coroutine.close()
+    raise RuntimeError("run_sync cannot be called from inside a running event loop, await the coroutine instead.")
+
+
+
+MAX_FAKE_ANSWER_ROUNDS = 5  # without a deadline, a model that keeps answering invalid answers must not loop forever
+
+
+@dataclasses.dataclass
+class FakeAnswerStats:
+    calls: int = 0
+    accepted: int = 0
+    rejected: int = 0
+
+
+_fake_answer_stats: dict[str, FakeAnswerStats] = {}
+_fake_answer_stats_lock = threading.Lock()
+
+
+def get_fake_answer_stats() -> dict[str, FakeAnswerStats]:
+    with _fake_answer_stats_lock:
+        return {site: dataclasses.replace(stats) for site, stats in _fake_answer_stats.items()}
+
+
+def avoid_clause(examples: list[str]) -> str:
+    if not examples:
+        return ""
+    return f"They must be different from the following: {'; '.join(examples)}."
+
+
+def collect_fake_answers(
+    request_answers: Callable[[int, list[str]], list[str] | None],
+    n_fake_answers: int,
+    site: str,
+    is_valid: Callable[[str], bool] = lambda answer: True,
+    max_rounds: int = MAX_FAKE_ANSWER_ROUNDS,
+) -> list[str]:
+    """
+    Keeps every valid answer of a response and only asks for the missing ones again.
+    request_answers gets the number of missing answers and the ones accepted so far, which the prompt should exclude.
+    Raises LLMError if there are still answers missing after max_rounds requests.
+    """
+    accepted: list[str] = []
+    for _ in range(max_rounds):
+        api_call.check_deadline()
+        n_missing = n_fake_answers - len(accepted)
+        response = request_answers(n_missing, list(accepted))
+
+        n_accepted_before = len(accepted)
+        n_rejected = 0
+        for answer in response or []:
+            is_new = answer.lower() not in {a.lower() for a in accepted}
+            if len(accepted) < n_fake_answers and answer.strip() and is_new:
+                if is_valid(answer):
+                    accepted.append(answer)
+                else:
+                    n_rejected += 1
+
+        with _fake_answer_stats_lock:
+            stats = _fake_answer_stats.setdefault(site, FakeAnswerStats())
+            stats.calls += 1
+            stats.accepted += len(accepted) - n_accepted_before
+            stats.rejected += n_rejected
+
+        if len(accepted) == n_fake_answers:
+            return accepted
+
+    raise api_call.LLMError(f"Only {len(accepted)} of {n_fake_answers} fake answers after {max_rounds} requests.")
@@ -1,16 +1,25 @@
 import random
 from pathlib import Path
 
+from who_knew_it import datasets
 
-def get_random_word() -> str:
-    word_file = Path(__file__).parent.parent / "who_knew_it" / "words.txt"
+WORDS_FILE = Path(__file__).parent / "words.txt"
 
-    with open(word_file) as f:
-        words = f.read().splitlines()
 
-    return random.choice(words)
+def get_random_word() -> str:
+    return datasets.random_line(WORDS_FILE)
 
 
 def random_letter() -> str:
     letters = ["a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p", "q", "r", "s", "t", "u", "v", "w", "x", "y", "z"]
     return random.choice(letters)
+
+
+def starting_letter_clause(item: str, n_items: int) -> str:
+    clause = f"The first {item} should start with an '{random_letter()}'."  # to add more randomness
+    if n_items > 1:
+        clause += f" The second {item} should start with an '{random_letter()}'."
+
+    for i in range(2, n_items):
+        clause += f" The {i + 1}. {item} should start with an '{random_letter()}'."
+    return clause
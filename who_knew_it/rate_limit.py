@@ -0,0 +1,148 @@
+import dataclasses
+import enum
+import fcntl
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+STATE_FILE = Path(__file__).parent.parent / "cache" / "rate_limit.bin"
+
+# Gemini 2.0 flash free tier quotas
+REQUESTS_PER_MINUTE = 15
+TOKENS_PER_MINUTE = 1_000_000
+
+POLL_INTERVAL = 0.05
+LIVE_WAITER_HEARTBEAT = 0.5  # how long a waiting live request holds back prefetch without renewing
+
+# request level, token level, last refill (wall clock, shared across processes), live waiter heartbeat
+_STATE = struct.Struct("<dddd")
+
+
+class Priority(enum.IntEnum):
+    live = 0  # the question a game is waiting for right now
+    prefetch = 1  # work whose result is only needed later
+
+
+# Share of each bucket that a priority class must leave untouched, so live games never queue behind prefetch.
+RESERVED_FRACTION = {
+    Priority.live: 0.0,
+    Priority.prefetch: 0.25,
+}
+
+
+def estimate_tokens(prompt: str, expected_output_tokens: int = 256) -> int:
+    return len(prompt) // 4 + expected_output_tokens  # ~4 characters per token for English text
+
+
+@dataclasses.dataclass
+class QueueStats:
+    acquired: int = 0
+    timed_out: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+
+class TokenBucketLimiter:
+    """
+    Requests/min and tokens/min buckets whose state lives in a small file guarded by flock,
+    so every thread and every server process on the host draws from the same budget.
+    """
+
+    def __init__(
+        self,
+        state_file: Path = STATE_FILE,
+        requests_per_minute: float = REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = TOKENS_PER_MINUTE,
+    ) -> None:
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("Rates must be positive.")
+
+        self.state_file = state_file
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.stats = {priority: QueueStats() for priority in Priority}
+        self._thread_lock = threading.Lock()  # flock doesn't exclude threads sharing one file descriptor
+        self._stats_lock = threading.Lock()
+
+        state_file.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(state_file, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _read_state(self) -> tuple[float, float, float, float]:
+        data = os.pread(self._fd, _STATE.size, 0)
+        if len(data) != _STATE.size:
+            return self.requests_per_minute, self.tokens_per_minute, time.time(), 0.0
+        return _STATE.unpack(data)
+
+    def _write_state(self, *state: float) -> None:
+        os.pwrite(self._fd, _STATE.pack(*state), 0)
+
+    def _try_acquire(self, tokens: int, priority: Priority) -> float:
+        """Returns 0 if acquired, otherwise an estimate of how long to wait before trying again."""
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                request_level, token_level, updated_at, live_waiting_until = self._read_state()
+
+                now = time.time()
+                elapsed = max(0.0, now - updated_at)
+                request_level = min(self.requests_per_minute, request_level + elapsed * self.requests_per_minute / 60)
+                token_level = min(self.tokens_per_minute, token_level + elapsed * self.tokens_per_minute / 60)
+
+                reserved = RESERVED_FRACTION[priority]
+                request_floor = self.requests_per_minute * reserved
+                token_floor = self.tokens_per_minute * reserved
+                yield_to_live = priority != Priority.live and live_waiting_until > now
+
+                if not yield_to_live and request_level - 1 >= request_floor and token_level - tokens >= token_floor:
+                    self._write_state(request_level - 1, token_level - tokens, now, live_waiting_until)
+                    return 0.0
+
+                if priority == Priority.live:
+                    live_waiting_until = now + LIVE_WAITER_HEARTBEAT
+                self._write_state(request_level, token_level, now, live_waiting_until)
+
+                request_wait = (request_floor + 1 - request_level) * 60 / self.requests_per_minute
+                token_wait = (token_floor + tokens - token_level) * 60 / self.tokens_per_minute
+                return max(POLL_INTERVAL, request_wait, token_wait) if not yield_to_live else POLL_INTERVAL
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def acquire(self, tokens: int, priority: Priority = Priority.live, timeout: float | None = None) -> bool:
+        tokens = min(tokens, int(self.tokens_per_minute * (1 - RESERVED_FRACTION[priority])))  # else it never fits
+        start = time.monotonic()
+
+        while True:
+            wait = self._try_acquire(tokens=tokens, priority=priority)
+            waited = time.monotonic() - start
+            if wait == 0:
+                self._record(priority, waited, acquired=True)
+                return True
+
+            if timeout is not None and waited + POLL_INTERVAL > timeout:
+                self._record(priority, waited, acquired=False)
+                return False
+
+            # live waiters poll frequently to renew their heartbeat, others back off to the estimate
+            sleep = POLL_INTERVAL if priority == Priority.live else wait
+            if timeout is not None:
+                sleep = min(sleep, timeout - waited)
+            time.sleep(max(0.0, min(sleep, LIVE_WAITER_HEARTBEAT)))
+
+    def _record(self, priority: Priority, waited: float, acquired: bool) -> None:
+        with self._stats_lock:
+            stats = self.stats[priority]
+            if acquired:
+                stats.acquired += 1
+                stats.total_wait += waited
+                stats.max_wait = max(stats.max_wait, waited)
+            else:
+                stats.timed_out += 1
+
+    def close(self) -> None:
+        os.close(self._fd)
@@ -1,7 +1,7 @@
 import dataclasses
 import random
 
-from who_knew_it import api_call, questions, random_word
+from who_knew_it import api_call, questions, random_word, structured_output
 
 
 def _random_divider() -> str:
@@ -19,6 +19,23 @@ class Saying:
         return f"{self.literal_translation}" #{self.divider}{self.definition}"
 
 
+@dataclasses.dataclass
+class RealSayingResponse:
+    original_figure_of_speech: str
+    literal_english_translation: str
+    definition: str
+
+
+@dataclasses.dataclass
+class FakeSayingResponse:
+    literal_english_translation: str
+    definition: str
+
+
+REAL_SAYING_FORMAT = structured_output.record(RealSayingResponse)
+FAKE_SAYING_FORMAT = structured_output.record(FakeSayingResponse)
+
+
 @dataclasses.dataclass
 class SayingQuestion(questions.Question):
     language: str
@@ -35,6 +52,7 @@ class SayingQuestion(questions.Question):
 class SayingQuestionGenerator(questions.QuestionGenerator):
     def generate_question_and_correct_answer(self) -> SayingQuestion:
         while True:
+            api_call.check_deadline()
             language = generate_random_languages()
             print(language)
             saying = generate_saying(language)
@@ -127,34 +145,21 @@ def _fake_saying(question: str, avoid_examples: list[str]) -> str:
 
     {avoid_str}
 
-    Please output only the literal English translation of the invented figure of speech and its supposed meaning in the following form.
-
-    literal english translation: ...
-    definition: ... 
+    Please output only the literal English translation of the invented figure of speech and its supposed meaning.
     """
-    return api_call.prompt_model(prompt=prompt)
+    return api_call.prompt_model(prompt=prompt, response_schema=FAKE_SAYING_FORMAT.schema)
 
 
 def extract_fake_saying_if_possible(saying: str) -> Saying | None:
-    answer_lines = saying.split("\n")
-    print(answer_lines)
-    if len(answer_lines) not in [2, 3]:
-        print("wrong number of lines")
-        return None
-    
-    for line in answer_lines[:2]:
-        if ":" not in line:
-            print("No : in line")
-            return None
-    
-    literal_translation = answer_lines[0].split(":", 1)[1].strip()
-    definition = answer_lines[1].split(":", 1)[1].strip()
-    
-    if not literal_translation or not definition:
-        print("wrong format")
+    parsed = structured_output.parse_structured(saying, FAKE_SAYING_FORMAT, site="saying.fake_answers")
+    if parsed is None:
         return None
-    
-    return Saying(literal_translation=literal_translation, definition=definition, divider=_random_divider())
+
+    return Saying(
+        literal_translation=parsed.literal_english_translation,
+        definition=parsed.definition,
+        divider=_random_divider(),
+    )
 
 
 def generate_saying(country: str) -> str:
@@ -167,54 +172,43 @@ def generate_saying(country: str) -> str:
     native English speaker. It should be a unknown to most non {country} people. If you can, the figure of speech 
     should have something to do with one of the following words:
     {", ".join(random_words)}
-    That figure of speech must exist and cannot be invented. Your answer should be in the following form and nothing else:
-    
-    original figure of speech: ...
-    literal english translation: ...
-    definition: ...
+    That figure of speech must exist and cannot be invented. Your answer should contain the original figure of speech,
+    its literal english translation and its definition.
     """
 
-    return api_call.prompt_model(prompt=prompt)
+    return api_call.prompt_model(prompt=prompt, response_schema=REAL_SAYING_FORMAT.schema)
 
 
 def extract_saying_if_possible(answer: str, language: str) -> SayingQuestion | None:
-    answer_lines = answer.split("\n")
-    print(answer_lines)
-    if len(answer_lines) not in [3, 4]:
-        print("wrong number of lines")
-        return None
-    
-    for line in answer_lines[:3]:
-        if ":" not in line:
-            print("No : in line")
-            return None
-    
-    original_figure_of_speech = answer_lines[0].split(":", 1)[1].strip()
-    literal_translation = answer_lines[1].split(":", 1)[1].strip()
-    definition = answer_lines[2].split(":", 1)[1].strip()
-    
-    if not original_figure_of_speech or not literal_translation or not definition:
-        print("wrong format")
+    parsed = structured_output.parse_structured(answer, REAL_SAYING_FORMAT, site="saying.generate")
+    if parsed is None:
         return None
-    
+
     prompt = f"""
     Please check whether the following is an existing figure of speech in {language}. Also check whether the figure of speech
-    is correctly translated and the meaning is correct. If it is, answer "yes", otherwise answer "no".:
-    
-    {answer}
+    is correctly translated and the meaning is correct.
+
+    original figure of speech: {parsed.original_figure_of_speech}
+    literal english translation: {parsed.literal_english_translation}
+    definition: {parsed.definition}
     """
 
-    model_answer = api_call.prompt_model(prompt=prompt)
-    print(model_answer)
+    is_correct = structured_output.prompt_structured(
+        prompt,
+        structured_output.boolean("is_correct"),
+        site="saying.verify",
+        cache_ttl=api_call.CACHE_TTL_LONG,
+    )
+    print("is_correct: ", is_correct)
 
-    if not model_answer.lower().startswith("yes"):
+    if not is_correct:
         return None
 
     return SayingQuestion(
         language=language, 
         saying=Saying(
-            literal_translation=literal_translation,
-            definition=definition,
+            literal_translation=parsed.literal_english_translation,
+            definition=parsed.definition,
             divider=_random_divider(),
         )
     )
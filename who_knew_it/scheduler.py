@@ -0,0 +1,148 @@
+"""
+Picks the question type of every question, so that a slow generator doesn't land on a question that is
+needed soon. The strategy, the weights of the types and the time budgets are read from scheduler.yaml.
+"""
+import abc
+import contextlib
+import dataclasses
+import random
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import yaml
+
+from who_knew_it import question_types
+
+CONFIG_FILE = Path(__file__).parent.parent / "scheduler.yaml"
+
+DEFAULT_LIVE_BUDGET = 20.0
+DEFAULT_ROUND_DURATION = 90.0
+SMOOTHING = 0.2  # weight of the newest measurement in the moving averages
+PRIOR_LATENCY = 10.0  # assumed for types that didn't generate anything in this process yet
+MIN_SUCCESS_RATE = 0.1
+
+
+@dataclasses.dataclass
+class TypeStats:
+    latency: float | None = None  # exponentially weighted moving average of successful generations, in seconds
+    failure_rate: float = 0.0  # exponentially weighted as well
+    generations: int = 0
+
+    @property
+    def expected_latency(self) -> float:
+        """Until a question is there, failed attempts included."""
+        latency = self.latency if self.latency is not None else PRIOR_LATENCY
+        return latency / max(1.0 - self.failure_rate, MIN_SUCCESS_RATE)
+
+
+_stats: dict[str, TypeStats] = {}
+_stats_lock = threading.Lock()
+
+
+def record(question_type: str, latency: float, succeeded: bool) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(question_type, TypeStats())
+        stats.generations += 1
+        stats.failure_rate += SMOOTHING * ((0.0 if succeeded else 1.0) - stats.failure_rate)
+        if succeeded:
+            stats.latency = latency if stats.latency is None else stats.latency + SMOOTHING * (latency - stats.latency)
+
+
+@contextlib.contextmanager
+def measure(question_type: str) -> Iterator[None]:
+    """Records how long generating a question of the type took and whether it worked."""
+    start = time.monotonic()
+    try:
+        yield
+    except Exception:
+        record(question_type, time.monotonic() - start, succeeded=False)
+        raise
+    record(question_type, time.monotonic() - start, succeeded=True)
+
+
+def get_stats() -> dict[str, TypeStats]:
+    with _stats_lock:
+        return {question_type: dataclasses.replace(stats) for question_type, stats in _stats.items()}
+
+
+class Scheduler(abc.ABC):
+    def __init__(
+        self,
+        weights: dict[str, float],
+        live_budget: float = DEFAULT_LIVE_BUDGET,
+        round_duration: float = DEFAULT_ROUND_DURATION,
+    ) -> None:
+        self.weights = {question_type: weight for question_type, weight in weights.items() if weight > 0}
+        if not self.weights:
+            raise ValueError("At least one question type needs a positive weight.")
+        self.live_budget = live_budget
+        self.round_duration = round_duration
+
+    def budget(self, rounds_ahead: int) -> float:
+        """Seconds until a question is needed, when it is played rounds_ahead rounds after the current one."""
+        return self.live_budget + rounds_ahead * self.round_duration
+
+    @abc.abstractmethod
+    def choose(self, question_number: int, budget: float, inventory_levels: dict[str, int], used: list[str]) -> str:
+        """used are the types of the other questions of the same game."""
+        ...
+
+
+class RotationScheduler(Scheduler):
+    """The fixed order of question_types.ROTATION, without the types that are turned off."""
+
+    def choose(self, question_number: int, budget: float, inventory_levels: dict[str, int], used: list[str]) -> str:
+        enabled = [question_type for question_type in question_types.ROTATION if question_type in self.weights]
+        return enabled[question_number % len(enabled)]
+
+
+class LatencyAwareScheduler(Scheduler):
+    """
+    Draws by weight among the types that can be ready within the budget, preferring ones the game didn't have yet.
+    A type with bundles in the inventory is ready right away. If no type fits, the fastest one is taken.
+    """
+
+    def choose(self, question_number: int, budget: float, inventory_levels: dict[str, int], used: list[str]) -> str:
+        stats = get_stats()
+
+        def expected_latency(question_type: str) -> float:
+            if inventory_levels.get(question_type, 0) > 0:
+                return 0.0
+            return stats.get(question_type, TypeStats()).expected_latency
+
+        candidates = [question_type for question_type in self.weights if question_type not in used]
+        if not candidates:
+            candidates = list(self.weights)
+
+        in_time = [question_type for question_type in candidates if expected_latency(question_type) <= budget]
+        if not in_time:
+            return min(candidates, key=expected_latency)
+        return random.choices(in_time, weights=[self.weights[question_type] for question_type in in_time])[0]
+
+
+STRATEGIES: dict[str, type[Scheduler]] = {"rotation": RotationScheduler, "latency_aware": LatencyAwareScheduler}
+
+
+def load(path: Path = CONFIG_FILE) -> Scheduler:
+    """Without a config file every type gets the same weight."""
+    try:
+        with open(path) as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        config = {}
+
+    strategy = config.get("strategy", "latency_aware")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown scheduling strategy {strategy!r}, choose from {', '.join(STRATEGIES)}.")
+
+    weights = {str(question_type): 1.0 for question_type in question_types.QuestionType}
+    for question_type, weight in (config.get("weights") or {}).items():
+        weights[str(question_types.QuestionType(question_type))] = float(weight)
+
+    return STRATEGIES[strategy](
+        weights=weights,
+        live_budget=float(config.get("live_budget", DEFAULT_LIVE_BUDGET)),
+        round_duration=float(config.get("round_duration", DEFAULT_ROUND_DURATION)),
+    )
@@ -0,0 +1,252 @@
+"""
+Offline scoring of the static datasets, so picking a question candidate needs no model call.
+
+    python -m who_knew_it.scoring
+    python -m who_knew_it.scoring --dataset pokemon --batch-size 100
+
+Every row gets a score from 0 to MAX_SCORE, stored one byte per row in scores/<dataset>.scores
+next to a hash of the source file, so an edited dataset is scored again instead of misaligned.
+The old english definitions are also rewritten once, see normalize_definitions.
+"""
+import argparse
+import array
+import dataclasses
+import functools
+import hashlib
+import json
+import os
+import random
+from collections.abc import Sequence
+from itertools import accumulate
+from pathlib import Path
+
+from who_knew_it import datasets, structured_output
+
+PACKAGE_FOLDER = Path(__file__).parent
+SCORES_FOLDER = PACKAGE_FOLDER / "scores"
+MAGIC = b"WKSCORE1"
+HASH_SIZE = 32
+
+MAX_SCORE = 9
+UNSCORED = 255
+MIN_SCORE = 5  # rows scored lower are never picked
+BATCH_SIZE = 50
+DEFINITION_BATCH_SIZE = 20
+
+
+@dataclasses.dataclass(frozen=True)
+class Dataset:
+    name: str
+    source: Path
+    criteria: str  # what makes a row a good question, inserted into the scoring prompt
+    separator: str | None = None  # rows of separated files are shown as "first: rest" to the model
+
+    @property
+    def scores_file(self) -> Path:
+        return SCORES_FOLDER / f"{self.name}.scores"
+
+
+def animal_dataset(group_file: Path) -> Dataset:
+    return Dataset(
+        name=f"animals-{group_file.stem}",
+        source=group_file,
+        criteria="""how funny the name sounds to a native English speaker, how unknown the animal is to most people
+        and whether the name is free of special characters and accents. Names with special characters or accents score 0.""",
+    )
+
+
+ANIMAL_DATASETS = [animal_dataset(f) for f in sorted((PACKAGE_FOLDER / "animals").glob("*.csv"))]
+POKEMON = Dataset(
+    name="pokemon",
+    source=PACKAGE_FOLDER / "pokemon" / "pokemon.csv",
+    criteria="how funny the pokemon name sounds to a native English speaker.",
+)
+NOUNS = Dataset(
+    name="nouns",
+    source=PACKAGE_FOLDER / "dictionary" / "nouns.csv",
+    criteria="""how suitable the old english word is for a game where players write fake definitions and then guess the
+    real one: nobody should be able to guess the definition, the word is ideally a bit funny and there is enough of a
+    definition to make it interesting. Definitions that only refer to another word score 0.""",
+    separator="|",
+)
+DATASETS = {dataset.name: dataset for dataset in [*ANIMAL_DATASETS, POKEMON, NOUNS]}
+
+
+def rows(dataset: Dataset) -> Sequence[str]:
+    if dataset.separator is not None:
+        return datasets.lines(dataset.source)
+    return datasets.csv_column(dataset.source)
+
+
+def _source_hash(dataset: Dataset) -> bytes:
+    return hashlib.sha256(dataset.source.read_bytes()).digest()
+
+
+def load_scores(dataset: Dataset) -> array.array | None:
+    """None if the dataset was never scored or changed since."""
+    try:
+        data = dataset.scores_file.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    header_size = len(MAGIC) + HASH_SIZE
+    if data[: len(MAGIC)] != MAGIC or data[len(MAGIC) : header_size] != _source_hash(dataset):
+        print(f"Ignoring outdated scores of {dataset.name}.")
+        return None
+
+    scores = array.array("B", data[header_size:])
+    if len(scores) != len(rows(dataset)):
+        return None
+    return scores
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def save_scores(dataset: Dataset, scores: array.array) -> None:
+    _write_atomically(dataset.scores_file, MAGIC + _source_hash(dataset) + scores.tobytes())
+
+
+def _display(dataset: Dataset, row: str) -> str:
+    if dataset.separator is None:
+        return row
+    first, rest = row.split(dataset.separator, 1)
+    return f"{first}: {rest}"
+
+
+def score_batch(dataset: Dataset, batch: list[str]) -> list[int] | None:
+    items = "\n".join(f"{i + 1}. {_display(dataset, row)}" for i, row in enumerate(batch))
+    prompt = f"""
+    You are preparing questions for a trivia game where players write convincing fake answers.
+    Rate each of the following {len(batch)} items from 0 (unusable) to {MAX_SCORE} (perfect) by {dataset.criteria}
+
+    {items}
+
+    Please answer only with a list of the {len(batch)} scores in the same order as the items.
+    """
+    return structured_output.prompt_structured(
+        prompt, structured_output.score_list(len(batch), MAX_SCORE), site=f"scoring.{dataset.name}"
+    )
+
+
+def score_dataset(dataset: Dataset, batch_size: int = BATCH_SIZE) -> array.array:
+    """Scores the rows that have no score yet, saving after every batch so an interrupted run resumes."""
+    dataset_rows = rows(dataset)
+    scores = load_scores(dataset) or array.array("B", [UNSCORED] * len(dataset_rows))
+
+    for start in range(0, len(dataset_rows), batch_size):
+        if UNSCORED not in scores[start : start + batch_size]:
+            continue
+
+        batch_scores = score_batch(dataset, list(dataset_rows[start : start + batch_size]))
+        if batch_scores is None:
+            print(f"Scoring rows {start} to {start + batch_size} of {dataset.name} failed, they stay unscored.")
+            continue
+
+        scores[start : start + len(batch_scores)] = array.array("B", batch_scores)
+        save_scores(dataset, scores)
+        print(f"{dataset.name}: {min(start + batch_size, len(dataset_rows))}/{len(dataset_rows)} scored")
+
+    return scores
+
+
+@functools.cache
+def _cumulative_weights(dataset: Dataset) -> list[int] | None:
+    scores = load_scores(dataset)
+    if scores is None:
+        return None
+
+    weights = [score - MIN_SCORE + 1 if MIN_SCORE <= score <= MAX_SCORE else 0 for score in scores]
+    if not any(weights):
+        return None
+    return list(accumulate(weights))
+
+
+def weighted_sample(dataset: Dataset) -> int | None:
+    """Index of a row drawn with probability growing with its score, None if the dataset isn't scored."""
+    cumulative_weights = _cumulative_weights(dataset)
+    if cumulative_weights is None or len(cumulative_weights) != len(rows(dataset)):  # the dataset was reloaded
+        return None
+    [index] = random.choices(range(len(cumulative_weights)), cum_weights=cumulative_weights)
+    return index
+
+
+def _definitions_file() -> Path:
+    return SCORES_FOLDER / f"{NOUNS.name}.definitions.json"
+
+
+@functools.cache
+def _normalized_definitions() -> list[str | None] | None:
+    try:
+        cached = json.loads(_definitions_file().read_text())
+    except FileNotFoundError:
+        return None
+
+    if cached["source_hash"] != _source_hash(NOUNS).hex():
+        print("Ignoring outdated normalized definitions.")
+        return None
+    return cached["definitions"]
+
+
+def normalized_definition(row_index: int) -> str | None:
+    definitions = _normalized_definitions()
+    if definitions is None:
+        return None
+    return definitions[row_index]
+
+
+def normalize_definitions(batch_size: int = DEFINITION_BATCH_SIZE) -> None:
+    """Rewrites every oxford dictionary definition of NOUNS like a human would write it, once."""
+    noun_rows = rows(NOUNS)
+    definitions = _normalized_definitions() or [None] * len(noun_rows)
+
+    for start in range(0, len(noun_rows), batch_size):
+        if None not in definitions[start : start + batch_size]:
+            continue
+
+        batch = noun_rows[start : start + batch_size]
+        items = "\n".join(f"{i + 1}. {_display(NOUNS, row)}" for i, row in enumerate(batch))
+        prompt = f"""
+        You have to rewrite the following {len(batch)} oxford dictionary definitions of old english words, such that
+        they are more natural, like a human would write them. Each definition should be very short and simple.
+        If a definition is already like or almost like how a human would write it, it is fine to just leave it
+        as is or just make minimal changes.
+
+        {items}
+
+        Please answer only with a list of the {len(batch)} rewritten definitions, without the words, in the same order.
+        """
+        rewritten = structured_output.prompt_structured(
+            prompt, structured_output.string_list(len(batch), exact=False), site="scoring.definitions"
+        )
+        if rewritten is None or len(rewritten) != len(batch):
+            print(f"Normalizing definitions {start} to {start + batch_size} failed, they stay as they are.")
+            continue
+
+        definitions[start : start + len(batch)] = rewritten
+        cached = {"source_hash": _source_hash(NOUNS).hex(), "definitions": definitions}
+        _write_atomically(_definitions_file(), json.dumps(cached, ensure_ascii=False, indent=0).encode())
+        print(f"definitions: {min(start + batch_size, len(noun_rows))}/{len(noun_rows)} normalized")
+
+    _normalized_definitions.cache_clear()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m who_knew_it.scoring", description="Scores the static datasets.")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), action="append", help="defaults to all of them")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows scored per model call")
+    args = parser.parse_args(argv)
+
+    for name in args.dataset or sorted(DATASETS):
+        score_dataset(DATASETS[name], batch_size=args.batch_size)
+        _cumulative_weights.cache_clear()
+    if args.dataset is None or NOUNS.name in args.dataset:
+        normalize_definitions()
+
+
+if __name__ == "__main__":
+    main()
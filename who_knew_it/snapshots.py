@@ -0,0 +1,42 @@
+"""
+Read models of a question of a game, shared by all sessions of the process. One is loaded per game, question
+and version of the game, see game_events, so the reruns of every browser in the game share it until the next
+write. They are shared, don't modify them.
+"""
+import threading
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from who_knew_it import game_events
+
+T = TypeVar("T")
+
+
+class SnapshotCache(Generic[T]):
+    def __init__(self, load: Callable[[int, int], T]) -> None:
+        self._load = load
+        self._snapshots: dict[tuple[int, int], tuple[int, T]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, game_id: int, question_number: int) -> T:
+        key = (game_id, question_number)
+        version = game_events.version(game_id)  # read before loading, so a write during the load is loaded next time
+        cached = self._snapshots.get(key)  # dict reads are atomic, the lock only serializes updates
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        # browsers that see the new version at the same time each load it, that is at most the players of the game
+        snapshot = self._load(game_id, question_number)
+        with self._lock:
+            self.loads += 1
+            cached = self._snapshots.get(key)
+            if cached is None or cached[0] <= version:  # a slower load of an older version doesn't win
+                self._snapshots[key] = (version, snapshot)
+        return snapshot
+
+    def forget(self, game_id: int) -> None:
+        """For closed games, whose version starts over."""
+        with self._lock:
+            for key in [key for key in self._snapshots if key[0] == game_id]:
+                del self._snapshots[key]
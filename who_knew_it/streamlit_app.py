@@ -1,26 +1,36 @@
 import dataclasses
 import enum
+import os
 import textwrap
 import time
 import uuid
+from collections.abc import Mapping
 from functools import partial
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any
 
 import duckdb
 import extra_streamlit_components as stx  # type: ignore
 import streamlit as st
 
 from who_knew_it import (
-    animal_question,
-    arxiv_question,
+    api_call,
     authenticator,
-    movie_suggestion,
+    bank,
+    dao,
+    game_events,
+    game_store,
+    generation,
+    inventory,
     name_generation,
-    podcast_question,
-    pokemon_question,
+    question_types,
     questions,
-    word_definition_question,
+    rate_limit,
+    scheduler,
+    snapshots,
 )
+from who_knew_it.dao import Var
 
 DEFAULT_N_FAKE_ANSWERS = 2
 MAX_N_FAKE_ANSWERS = 4
@@ -29,47 +39,23 @@ N_QUESTIONS = 6
 MAX_NAME_LENGTH = 20
 DISPLAY_LENGTH_LIMIT_TO_EXPANDER = 30
 
+# worst case generation latencies, all retries of the generators included
+QUESTION_DEADLINE = 120.0
+FAKE_ANSWERS_DEADLINE = 60.0
+
+POINTS_TIMEOUT = 30.0  # the host writes the points as soon as the reveal is shown
+JOB_WRITE_ATTEMPTS = 8  # workers and hosts write the same rows, duckdb rejects concurrent updates of a row
+
 DB_FILE = Path(__file__).parent.parent / "database" / "file.db"
+GAME_STORE = os.environ.get("WHO_KNEW_IT_GAME_STORE", "duckdb")  # see game_store
 
 HOUSE_PLAYER_ID_PREFIX = "house"
 CORRECT_ANSWER_ID = "correct_answer"
 HOUSE_NAME = "The House"
+N_HOUSE_PLAYERS = 6
 CORRECT_ANSWER_NAME = "Correct Answer"
 
 
-class Tables(enum.StrEnum):
-    players = "players"
-    games = "games"
-    game_player = "game_player"
-    questions = "questions"
-    player_answers = "player_answers"
-    points = "points"
-
-
-class Var(enum.StrEnum):
-    player_id = "player_id"
-    player_name = "player_name"
-    game_id = "game_id"
-    retrieved = "retrieved"
-    answer_list = "answer_list"
-    points = "points"
-    is_answered = "is_answered"
-    game_stage = "game_stage"
-    is_host = "is_host"
-    question_number = "question_number"
-    question = "question"
-    correct_answer = "correct_answer"
-    answer_text = "answer_text"
-    is_house = "is_house"
-    answer_order = "answer_order"
-    correct_answer_rank = "correct_answer_rank"
-    player_id_of_chosen_answer = "player_id_of_chosen_answer"
-    fooled_players = "fooled_players"
-    dummy_cookie = "dummy_cookie"
-    has_accepted_cookies = "has_accepted_cookies"
-    name = "name"  # used by streamlit authenticator
-
-
 class GameStage(enum.IntEnum):
     no_game_selected = 0
     game_open = 1
@@ -92,6 +78,44 @@ def get_cursor() -> duckdb.DuckDBPyConnection:
     return get_db_connection().cursor()
 
 
+@st.cache_resource
+def get_job_workers() -> generation.JobWorkers:
+    create_tables_if_not_exist()
+    requeue_interrupted_jobs()
+    workers = generation.JobWorkers(claim=claim_next_job, run=run_job, finish=finish_job)
+    workers.start()
+    return workers
+
+
+@st.cache_resource
+def get_question_bank() -> bank.QuestionBank:
+    return bank.QuestionBank(bank.BANK_FILE)
+
+
+@st.cache_resource
+def get_scheduler() -> scheduler.Scheduler:
+    return scheduler.load(scheduler.CONFIG_FILE)
+
+
+@st.cache_resource
+def get_refiller() -> inventory.Refiller:
+    create_tables_if_not_exist()
+    refiller = inventory.Refiller(
+        question_types=list(question_types.QuestionType),
+        count=count_inventory,
+        generate=generate_bundle,
+        put=put_into_inventory,
+        on_demand=True,
+    )
+    refiller.start()
+    return refiller
+
+
+@st.cache_resource
+def get_game_store() -> game_store.GameStore:
+    return game_store.open_store(GAME_STORE, connect=get_cursor, write_attempts=JOB_WRITE_ATTEMPTS)
+
+
 @st.cache_resource
 def create_tables_if_not_exist() -> None:
 
@@ -100,94 +124,18 @@ def create_tables_if_not_exist() -> None:
     for f in DB_FILE.parent.glob("*"):
         f.unlink()
 
-    queries = [
-        """
-                BEGIN TRANSACTION;
-        """,
-        """
-                CREATE SEQUENCE IF NOT EXISTS seq_game_id START 1;
-                """,
-        f"""
-                CREATE TABLE IF NOT EXISTS {Tables.games} (
-                    {Var.game_id} INT PRIMARY KEY DEFAULT NEXTVAL('seq_game_id'),
-                    {Var.game_stage} INT NOT NULL,
-                );
-                """,
-        f"""
-                CREATE TABLE IF NOT EXISTS {Tables.players} (
-                    {Var.player_id} VARCHAR(255) PRIMARY KEY,
-                    {Var.player_name} VARCHAR(255) NOT NULL,
-                    {Var.is_house} BOOLEAN DEFAULT FALSE
-                );
-                """,
-        f"""
-                INSERT INTO {Tables.players} ({Var.player_id}, {Var.player_name}, {Var.is_house}) 
-                VALUES 
-                ('{get_house_player_id(0)}', '{HOUSE_NAME}', TRUE),
-                ('{get_house_player_id(1)}', '{HOUSE_NAME}', TRUE),
-                ('{get_house_player_id(2)}', '{HOUSE_NAME}', TRUE),
-                ('{get_house_player_id(3)}', '{HOUSE_NAME}', TRUE),
-                ('{get_house_player_id(4)}', '{HOUSE_NAME}', TRUE),
-                ('{get_house_player_id(5)}', '{HOUSE_NAME}', TRUE)
-                ;
-        """,
-        f"""
-                CREATE TABLE IF NOT EXISTS {Tables.game_player} (
-                    {Var.game_id} INT,
-                    {Var.player_id} VARCHAR(255),
-                    {Var.is_host} BOOLEAN,
-                    PRIMARY KEY ({Var.game_id}, {Var.player_id}),
-                    FOREIGN KEY ({Var.game_id}) REFERENCES {Tables.games}({Var.game_id}),
-                    FOREIGN KEY ({Var.player_id}) REFERENCES {Tables.players}({Var.player_id})
-                );
-                """,
-        f"""
-        CREATE TABLE IF NOT EXISTS {Tables.questions} (
-            {Var.game_id} INT,
-            {Var.question_number} INT NOT NULL,
-            {Var.question} VARCHAR,
-            {Var.correct_answer} VARCHAR,
-            {Var.is_answered} BOOLEAN DEFAULT FALSE,
-            {Var.correct_answer_rank} FLOAT DEFAULT random(),
-            PRIMARY KEY ({Var.game_id}, {Var.question_number}),
-            FOREIGN KEY ({Var.game_id}) REFERENCES {Tables.games}({Var.game_id}),
-        );
-        """,
-        f"""
-        CREATE TABLE IF NOT EXISTS {Tables.player_answers} (
-            {Var.game_id} INT,
-            {Var.question_number} INT,
-            {Var.player_id} VARCHAR(255),
-            {Var.answer_text} VARCHAR,
-            {Var.answer_order} FLOAT DEFAULT random(),
-            {Var.player_id_of_chosen_answer} VARCHAR(255),
-            PRIMARY KEY ({Var.game_id}, {Var.question_number}, {Var.player_id}),
-            FOREIGN KEY ({Var.game_id}) REFERENCES {Tables.games}({Var.game_id}),
-            FOREIGN KEY ({Var.player_id}) REFERENCES {Tables.players}({Var.player_id}),
-        );
-        """,
-        f"""
-        CREATE TABLE IF NOT EXISTS {Tables.points} (
-            {Var.game_id} INT,
-            {Var.question_number} INT,
-            {Var.player_id} VARCHAR(255),
-            {Var.points} INT,
-            PRIMARY KEY ({Var.game_id}, {Var.question_number}, {Var.player_id}),
-            FOREIGN KEY ({Var.game_id}) REFERENCES {Tables.games}({Var.game_id}),
-            FOREIGN KEY ({Var.player_id}) REFERENCES {Tables.players}({Var.player_id}),
-        );
-        """,
-        """
-        COMMIT;
-        """,
-    ]
-
     with get_cursor() as con:
-        for query in queries:
+        con.begin()
+        for statement in dao.SCHEMA:
             try:
-                con.execute(query)
+                dao.run(con, statement)
             except duckdb.TransactionException as e:
                 print(f"{e}")
+        con.commit()
+
+    store = get_game_store()
+    for i in range(N_HOUSE_PLAYERS):
+        store.add_player(get_house_player_id(i), HOUSE_NAME, is_house=True)
 
 
 def get_alphabet_letter(n: int) -> str:
@@ -207,49 +155,21 @@ def get_button_labels(length_of_labels: int) -> list[str]:
 
 
 def set_is_answered(game_id: int, question_number: int) -> None:
-    query = f"""
-    UPDATE {Tables.questions} SET {Var.is_answered} = TRUE
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number};
-    """
-    print("set_is_answered: ", query)
-    with get_cursor() as con:
-        con.execute(query)
+    print(f"set_is_answered: game {game_id}, question {question_number}")
+    get_game_store().set_is_answered(game_id, question_number)
+    game_events.bump(game_id)
 
 
 def initialize_new_game_in_db() -> int:
-    with get_cursor() as con:
-        [game_id] = con.execute(
-            f"""
-                INSERT INTO {Tables.games} ({Var.game_stage}) VALUES ({GameStage.game_open}) RETURNING {Var.game_id};
-                """
-        ).fetchall()
-
-    return game_id[0]  # otherwise returns tuple
+    return get_game_store().create_game(GameStage.game_open)
 
 
 def get_all_opened_games() -> list[int]:
-    query = f"""
-    SELECT {Var.game_id} FROM {Tables.games}
-    WHERE {Var.game_stage} = {GameStage.game_open};
-    """
-
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-
-    return [res[0] for res in result]
+    return get_game_store().get_games_in_stage(GameStage.game_open)
 
 
 def get_all_players_in_game(game_id: int) -> dict[str, str]:
-    query = f"""
-    SELECT {Tables.players}.{Var.player_id}, {Tables.players}.{Var.player_name} FROM {Tables.game_player}
-    JOIN {Tables.players} ON  {Tables.players}.{Var.player_id} = {Tables.game_player}.{Var.player_id}
-    WHERE {Tables.game_player}.{Var.game_id} = {game_id};
-    """
-    print("get_all_players_in_game: ", query)
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-
-    return {res[0]: res[1] for res in result}
+    return get_game_store().get_players_in_game(game_id)
 
 
 def create_and_join_new_game(player_id: str) -> None:
@@ -258,26 +178,13 @@ def create_and_join_new_game(player_id: str) -> None:
 
 
 def set_game_state(game_id: int, game_stage: GameStage) -> None:
-    query = f"""
-    UPDATE {Tables.games}
-    SET {Var.game_stage} = {game_stage}
-    WHERE {Var.game_id} = {game_id};
-    """
-    with get_cursor() as con:
-        con.execute(query)
+    get_game_store().set_game_stage(game_id, game_stage)
+    game_events.bump(game_id)
 
 
 def get_game_stage_from_db(game_id: int) -> GameStage | None:
-    query = (
-        f"SELECT {Var.game_stage} FROM {Tables.games} WHERE {Var.game_id} = {game_id}"
-    )
-
-    with get_cursor() as con:
-        results = con.execute(query).fetchall()
-
-    if len(results) != 1:
-        return None
-    return results[0][0]  # don't return tuple
+    game_stage = get_game_store().get_game_stage(game_id)
+    return GameStage(game_stage) if game_stage is not None else None
 
 
 def determine_game_stage(game_id: int | None) -> GameStage | None:
@@ -292,11 +199,7 @@ def generate_player_id() -> str:
 
 
 def register_player_id_and_name(player_id: str, player_name: str) -> None:
-    query = f"""
-            INSERT INTO {Tables.players} ({Var.player_id}, {Var.player_name}) VALUES ('{player_id}', '{player_name}');
-            """
-    with get_cursor() as con:
-        con.execute(query)
+    get_game_store().add_player(player_id, player_name)
 
 
 def set_player_name(player_id: str, player_name: str) -> None:
@@ -324,42 +227,22 @@ def _set_player_name(player_id: str, player_name: str) -> None:
     if not player_name:
         raise ValueError("Player name cannot be empty.")
 
-    query = f"""
-    UPDATE {Tables.players} SET {Var.player_name} = '{player_name}'
-    WHERE {Var.player_id} = '{player_id}';
-    """
-
-    print("set_player_name: ", query)
-    with get_cursor() as con:
-        con.execute(query)
+    print(f"set_player_name: {player_id} is now {player_name}")
+    store = get_game_store()
+    store.set_player_name(player_id, player_name)
+    for game_id in store.get_games_of_player(player_id):  # the names are part of the game snapshots
+        game_events.bump(game_id)
 
 
 def get_player_name(player_id: str) -> str:
-    query = f"""
-    SELECT {Var.player_name} FROM {Tables.players} WHERE {Var.player_id} = '{player_id}'
-    """
-    print("get_player_name: ", query)
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-
-    return result[0][0]
+    player_name = get_game_store().get_player_name(player_id)
+    if player_name is None:
+        raise ValueError(f"There is no player {player_id}.")
+    return player_name
 
 
 def player_id_is_in_db(player_id: str) -> bool:
-    query = f"""
-    SELECT {Var.player_id} FROM {Tables.players} WHERE {Var.player_id} = '{player_id}'
-    """
-    print("player_id_is_in_db: ", query)
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-
-    if len(result) > 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-
-    return len(result) == 1
+    return get_game_store().get_player_name(player_id) is not None
 
 
 def determine_player_id() -> str:
@@ -400,28 +283,12 @@ def determine_game_id() -> int | None:
     return int(game_id)
 
 
-def _n_players_in_game_query(game_id: int) -> str:
-    return f"""
-    SELECT COUNT(*) FROM {Tables.game_player} WHERE {Var.game_id} = {game_id}
-    """
-
-
 def add_points(
     game_id: int, question_number: int, points_per_player_id: dict[str, int]
 ) -> None:
-    item_rows = ", ".join(
-        f"({game_id}, {question_number}, '{player_id}', {point})"
-        for player_id, point in points_per_player_id.items()
-    )
-    query = f"""
-    INSERT INTO {Tables.points} ({Var.game_id}, {Var.question_number}, {Var.player_id}, {Var.points}) VALUES
-    {item_rows}
-    ON CONFLICT ({Var.game_id}, {Var.question_number}, {Var.player_id}) 
-    DO UPDATE SET {Var.points} = EXCLUDED.{Var.points};
-    """
-    print("add_points: ", query)
-    with get_cursor() as con:
-        con.execute(query)
+    print("add_points: ", points_per_player_id)
+    get_game_store().set_points(game_id, question_number, points_per_player_id)
+    game_events.bump(game_id)
 
 
 def join_game(player_id: str, game_id: int, is_host: bool) -> None:
@@ -430,15 +297,8 @@ def join_game(player_id: str, game_id: int, is_host: bool) -> None:
     joined_succesfully = player_id in get_all_players_in_game(game_id=game_id)
 
     if not joined_succesfully:
-        subquery = _n_players_in_game_query(game_id=game_id)
-        query = f"""
-        INSERT INTO {Tables.game_player} ({Var.player_id}, {Var.game_id}, {Var.is_host}) 
-        SELECT '{player_id}', {game_id}, {is_host}
-        WHERE ({subquery}) < {N_MAX_PLAYERS};
-        """
-        print("join_game: query: ", query)
-        with get_cursor() as con:
-            con.execute(query)
+        get_game_store().join_game(player_id, game_id, is_host=is_host, max_players=N_MAX_PLAYERS)
+        game_events.bump(game_id)
         joined_succesfully = player_id in get_all_players_in_game(game_id=game_id)
 
     if joined_succesfully:
@@ -447,67 +307,25 @@ def join_game(player_id: str, game_id: int, is_host: bool) -> None:
 
 
 def remove_from_game(player_id: str, game_id: int) -> None:
-    query = f"""
-    BEGIN TRANSACTION;
-    DELETE FROM {Tables.game_player} WHERE {Var.player_id} = '{player_id}' AND {Var.game_id} = {game_id};
-    DELETE FROM {Tables.points} WHERE {Var.player_id} = '{player_id}' AND {Var.game_id} = {game_id};
-    DELETE FROM {Tables.player_answers} WHERE {Var.player_id} = '{player_id}' AND {Var.game_id} = {game_id};
-    COMMIT;
-    """
-    print("remove_from_game: ", query)
-    with get_cursor() as con:
-        con.execute(query)
+    print(f"remove_from_game: {player_id} leaves game {game_id}")
+    get_game_store().remove_player(player_id, game_id)
+    game_events.bump(game_id)
     
     close_game_if_no_host(game_id=game_id)
 
 
 def close_game_if_no_host(game_id: int) -> None:
-    query = f"""
-    SELECT {Var.player_id} FROM {Tables.game_player} WHERE {Var.game_id} = {game_id} AND {Var.is_host} = TRUE;
-    """
-    print("close_game_if_no_host: ", query)
-    with get_cursor() as con:
-        hosts = con.execute(query).fetchall()
-    if len(hosts) == 0:
+    if not get_game_store().get_hosts(game_id):
         close_game(game_id=game_id)
 
 
 def close_game(game_id: int) -> None:
-    
-    query = f"""
-    DELETE FROM {Tables.game_player} WHERE {Var.game_id} = {game_id};
-    """
-    print("close_game_if_no_host: ", query)
-    with get_cursor() as con:
-        con.execute(query)
-
-    query = f"""
-    DELETE FROM {Tables.points} WHERE {Var.game_id} = {game_id};
-    """
-    print("close_game_if_no_host: ", query)
-    with get_cursor() as con:
-        con.execute(query)
-
-    query = f"""
-    DELETE FROM {Tables.questions} WHERE {Var.game_id} = {game_id};
-    """
-    print("close_game_if_no_host: ", query)
-    with get_cursor() as con:
-        con.execute(query)
+    cancel_jobs(game_id=game_id)
 
-    query = f"""
-    DELETE FROM {Tables.player_answers} WHERE {Var.game_id} = {game_id};
-    """
-    print("close_game_if_no_host: ", query)
-    with get_cursor() as con:
-        con.execute(query)
-
-    query = f"""
-    DELETE FROM {Tables.games} WHERE {Var.game_id} = {game_id};
-    """
-    print("close_game_if_no_host: ", query)
-    with get_cursor() as con:
-        con.execute(query)
+    print(f"close_game: {game_id}")
+    get_game_store().delete_game(game_id)
+    game_events.forget(game_id)
+    get_snapshots().forget(game_id)
 
 
 def kick_from_game(player_id: str, game_id: int) -> None:
@@ -524,19 +342,7 @@ def leave_game(player_id: str, game_id: int) -> None:
 
 
 def is_player_host(player_id: str, game_id: int) -> bool:
-    query = f"""
-    SELECT {Var.is_host} FROM {Tables.game_player} 
-    WHERE {Var.player_id} = '{player_id}' AND {Var.game_id} = {game_id}; 
-    """
-    with get_cursor() as con:
-        con.execute(query)
-        result = con.fetchall()
-
-    if len(result) > 1:
-        raise ValueError(f"Found multiple entries, expected at most 1: {result}.")
-    if not result:
-        return False
-    return bool(result[0][0])
+    return get_game_store().is_host(player_id, game_id)
 
 
 def initialize_questions(game_id: int, n_questions: int) -> None:
@@ -545,150 +351,83 @@ def initialize_questions(game_id: int, n_questions: int) -> None:
             f"Number of questions must be at least 1, received {n_questions}."
         )
 
-    item_rows = ",\n".join([f"({game_id}, {i})" for i in range(1, n_questions + 1)])
-    query = f"""
-    INSERT INTO {Tables.questions} ({Var.game_id}, {Var.question_number}) VALUES
-    {item_rows}
-    ON CONFLICT ({Var.game_id}, {Var.question_number}) DO NOTHING;
-    """
-    print("initialize_questions: ", query)
-    with get_cursor() as con:
-        con.execute(query)
+    # the host's prefetches call this on every rerun, only a new row is a change the pollers have to see
+    if get_game_store().add_questions(game_id, n_questions):
+        print(f"initialize_questions: {n_questions} for game {game_id}")
+        game_events.bump(game_id)
 
 
 def initialize_answers(game_id: int) -> None:
-    query = f"""
-    INSERT INTO {Tables.player_answers} ({Var.game_id}, {Var.question_number}, {Var.player_id}) 
-    SELECT {Tables.questions}.{Var.game_id}, {Tables.questions}.{Var.question_number}, {Tables.game_player}.{Var.player_id}
-    FROM {Tables.questions} 
-    JOIN {Tables.game_player}
-    ON {Tables.questions}.{Var.game_id} = {Tables.game_player}.{Var.game_id}
-    WHERE {Tables.questions}.{Var.game_id} = {game_id};
-    """
-    print("initialize_answers: ", query)
-    with get_cursor() as con:
-        con.execute(query)
+    print(f"initialize_answers: game {game_id}")
+    get_game_store().add_answers(game_id)
+    game_events.bump(game_id)
 
 
 def get_all_fake_answers(game_id: int, question_number: int) -> list[str | None]:
-    query = f"""
-    SELECT {Var.answer_text} FROM {Tables.player_answers}
-    JOIN {Tables.players} ON {Tables.player_answers}.{Var.player_id} = {Tables.players}.{Var.player_id}
-    WHERE {Tables.player_answers}.{Var.game_id} = {game_id} 
-    AND {Tables.player_answers}.{Var.question_number} = {question_number}
-    AND {Tables.players}.{Var.is_house} = TRUE;
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    return [res[0] for res in result]
+    return [answer.answer_text for answer in get_game_store().get_answers(game_id, question_number) if answer.is_house]
 
 
-def start_game(game_id: int, n_questions: int) -> None:
+def start_game(game_id: int, n_questions: int, eager_generation: bool = False) -> None:
     for i in range(DEFAULT_N_FAKE_ANSWERS):
         join_game(player_id=get_house_player_id(i), game_id=game_id, is_host=False)
 
     initialize_questions(game_id=game_id, n_questions=n_questions)
     initialize_answers(game_id=game_id)
 
+    if eager_generation:
+        # All questions are generated concurrently, so a whole game costs about one question's latency.
+        # Only the first one is needed right away.
+        for question_number in range(1, n_questions + 1):
+            prefetch_question(
+                game_id=game_id,
+                question_number=question_number,
+                priority=rate_limit.Priority.live if question_number == 1 else rate_limit.Priority.prefetch,
+            )
+
     set_game_state(game_id=game_id, game_stage=GameStage.answer_writing)
 
 
+def get_generation_progress(game_id: int) -> dict[int, bool]:
+    """Per question number whether the question and all house fake answers are written."""
+    return get_game_store().get_generation_progress(game_id)
+
+
 def determine_first_unanswered_question_number(game_id: int) -> int | None:
-    query = f"""
-    SELECT MIN({Var.question_number}) FROM {Tables.questions}
-    WHERE {Var.is_answered} = FALSE AND {Var.game_id} = {game_id};
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
+    return get_game_store().get_first_unanswered_question_number(game_id)
 
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-    return result[0][0]
 
+def _get_question_row(game_id: int, question_number: int) -> game_store.QuestionRow:
+    row = get_game_store().get_question(game_id, question_number)
+    if row is None:
+        raise ValueError(f"There is no question {question_number} in game {game_id}.")
+    return row
 
-def get_question(game_id: int, question_number: int) -> str | None:
-    query = f"""
-    SELECT ({Var.question}) FROM {Tables.questions}
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number};
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
 
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-    return result[0][0]
+def get_question(game_id: int, question_number: int) -> str | None:
+    return _get_question_row(game_id, question_number).question
 
 
 def get_correct_answer(game_id: int, question_number: int) -> str | None:
-    query = f"""
-    SELECT ({Var.correct_answer}) FROM {Tables.questions}
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number};
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-    return result[0][0]
+    return _get_question_row(game_id, question_number).correct_answer
 
 
 def add_question_and_correct_answer(
     game_id: int, question_number: int, question: str, correct_answer: str
 ) -> None:
-    query = f"""
-    UPDATE {Tables.questions}
-    SET {Var.question} = ${Var.question},
-    {Var.correct_answer} = ${Var.correct_answer}
-    WHERE {Var.game_id} = ${Var.game_id} AND {Var.question_number} = ${Var.question_number};
-    """
-
-    variables = {
-        str(Var.question): question,
-        str(Var.correct_answer): correct_answer,
-        str(Var.game_id): game_id,
-        str(Var.question_number): question_number,
-    }
-    print("Query: ", query)
-    print("Variables: ", variables)
-
-    with get_cursor() as con:
-        con.execute(query, variables)
+    print(f"add_question_and_correct_answer: game {game_id}, question {question_number}: {question}")
+    get_game_store().set_question(game_id, question_number, question=question, correct_answer=correct_answer)
+    game_events.bump(game_id)
 
 
 def determine_n_human_players(game_id: int) -> int:
-    query = f"""
-    SELECT COUNT(*) FROM {Tables.game_player} 
-    JOIN {Tables.players}
-    ON {Tables.game_player}.{Var.player_id} = {Tables.players}.{Var.player_id}
-    WHERE {Tables.game_player}.{Var.game_id} = {game_id} 
-    AND {Tables.players}.{Var.is_house} = FALSE;
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-    return result[0][0]
+    return get_game_store().count_human_players(game_id)
 
 
 def determine_whether_all_answers_in(game_id: int, question_number: int) -> bool:
-    query = f"""
-    SELECT 
-    COUNT(*) FROM {Tables.player_answers}
-    JOIN {Tables.players} ON {Tables.player_answers}.{Var.player_id} = {Tables.players}.{Var.player_id}
-    WHERE {Tables.player_answers}.{Var.game_id} = {game_id} 
-    AND {Tables.player_answers}.{Var.question_number} = {question_number} 
-    AND {Tables.players}.{Var.is_house} = FALSE 
-    AND {Tables.player_answers}.{Var.answer_text} IS NULL;
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-
-    print("result of determine_whether_all_answers_in: ", result)
-    return result[0][0] == 0
+    answers = get_game_store().get_answers(game_id, question_number)
+    n_missing = sum(answer.answer_text is None for answer in answers if not answer.is_house)
+    print("missing answers: ", n_missing)
+    return n_missing == 0
 
 
 def next_question(game_id: int, question_number: int) -> None:
@@ -703,16 +442,70 @@ class PlayerAnswerTuple:
     answer_order: float
 
 
-def get_player_answer_tuples(
-    game_id: int, question_number: int
-) -> list[PlayerAnswerTuple]:
-    query = f"""
-    SELECT {Var.player_id}, {Var.answer_text}, {Var.answer_order} FROM {Tables.player_answers}
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number};
+@dataclasses.dataclass(frozen=True)
+class GameSnapshot:
     """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    return [PlayerAnswerTuple(*res) for res in result if res[1] is not None]
+    Everything the guessing, reveal and finished screens show of a question, read in one transaction.
+    Shared by the sessions of all players, see get_game_snapshot, so don't modify it.
+    """
+    game_id: int
+    question_number: int
+    question: str | None
+    correct_answer: str | None
+    correct_answer_rank: float
+    player_names: Mapping[str, str]  # everyone in the game, the house players included
+    answers: tuple[PlayerAnswerTuple, ...]  # the written ones
+    fake_answers: tuple[str | None, ...]  # of the house players, None until generated
+    chosen_answers: Mapping[str, str]  # player id to the author of the answer they chose
+    total_points: Mapping[str, int]
+    points_entered: bool  # for this question
+
+    def players_who_chose_answers(self) -> dict[str, list[str]]:
+        players_who_chose: dict[str, list[str]] = {}
+        for player_id, chosen_player_id in self.chosen_answers.items():
+            players_who_chose.setdefault(chosen_player_id, []).append(player_id)
+        return players_who_chose
+
+
+def load_game_snapshot(game_id: int, question_number: int) -> GameSnapshot:
+    print(f"load_game_snapshot: game {game_id}, question {question_number}")
+    state = get_game_store().read_question_state(game_id, question_number)
+
+    # the questions are gone once the game is closed
+    question = state.question or game_store.QuestionRow(None, None, 0.0, False, None)
+    return GameSnapshot(
+        game_id=game_id,
+        question_number=question_number,
+        question=question.question,
+        correct_answer=question.correct_answer,
+        correct_answer_rank=question.correct_answer_rank,
+        player_names=MappingProxyType(state.players),
+        answers=tuple(
+            PlayerAnswerTuple(answer.player_id, answer.answer_text, answer.answer_order)
+            for answer in state.answers
+            if answer.answer_text is not None
+        ),
+        fake_answers=tuple(answer.answer_text for answer in state.answers if answer.is_house),
+        chosen_answers=MappingProxyType(
+            {
+                answer.player_id: answer.player_id_of_chosen_answer
+                for answer in state.answers
+                if answer.player_id_of_chosen_answer is not None
+            }
+        ),
+        total_points=MappingProxyType(state.total_points),
+        points_entered=state.points_entered,
+    )
+
+
+@st.cache_resource
+def get_snapshots() -> snapshots.SnapshotCache[GameSnapshot]:
+    return snapshots.SnapshotCache(load_game_snapshot)
+
+
+def get_game_snapshot(game_id: int, question_number: int) -> GameSnapshot:
+    """Loaded once per write to the game, however many browsers rerun."""
+    return get_snapshots().get(game_id, question_number)
 
 
 def set_player_answer(
@@ -727,20 +520,8 @@ def set_player_answer(
     if player_answer == "":
         st.error("Answer cannot be empty. Please write your answer.")
 
-    query = f"""
-    UPDATE {Tables.player_answers} SET {Var.answer_text} = ${Var.answer_text}
-    WHERE {Var.game_id} = ${Var.game_id} AND {Var.player_id} = ${Var.player_id} AND {Var.question_number} = ${Var.question_number};
-    """
-
-    variables = {
-        str(Var.answer_text): player_answer,
-        str(Var.game_id): game_id,
-        str(Var.player_id): player_id,
-        str(Var.question_number): question_number,
-    }
-
-    with get_cursor() as con:
-        con.execute(query, variables)
+    get_game_store().set_answer(game_id, question_number, player_id, answer_text=player_answer)
+    game_events.bump(game_id)
 
 
 def add_fake_answers(
@@ -751,54 +532,13 @@ def add_fake_answers(
             "Fake answers are still None. This should not have happened. Something is wrong."
         )
 
-    variables = {}
-    items = []
-    for i, f_answer in enumerate(fake_answers):
-        variable_name = f"fake_answer_{i}"
-        variables[variable_name] = f_answer
-        items.append(
-            f"({game_id}, {question_number}, '{get_house_player_id(i)}', ${variable_name})"
-        )
-
-    item_rows = ",\n".join(items)
-    query = f"""
-    INSERT INTO {Tables.player_answers} ({Var.game_id}, {Var.question_number}, {Var.player_id}, {Var.answer_text}) VALUES
-    {item_rows}
-    ON CONFLICT ({Var.game_id}, {Var.question_number}, {Var.player_id}) 
-    DO UPDATE SET {Var.answer_text} = EXCLUDED.{Var.answer_text};
-    """
-    print("add_fake_answers: ", query)
-    print("variables: ", variables)
-    with get_cursor() as con:
-        con.execute(query, variables)
-
-
-def get_correct_answer_rank(game_id: int, question_number: int) -> float:
-    query = f"""
-    SELECT {Var.correct_answer_rank} FROM {Tables.questions}
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number};
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-
-    return result[0][0]
-
-
-def get_player_id_who_wrote_chosen_answer(
-    game_id: int, question_number: int, player_id: str
-) -> str | None:
-    query = f"""
-    SELECT {Var.player_id_of_chosen_answer} FROM {Tables.player_answers}
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number} AND {Var.player_id} = '{player_id}';
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-
-    return result[0][0]
+    print("add_fake_answers: ", fake_answers)
+    get_game_store().set_fake_answers(
+        game_id,
+        question_number,
+        {get_house_player_id(i): answer for i, answer in enumerate(fake_answers) if answer is not None},
+    )
+    game_events.bump(game_id)
 
 
 def set_players_chosen_answers_player_id(
@@ -811,20 +551,29 @@ def set_players_chosen_answers_player_id(
         st.toast("You cannot choose your own answer.")
 
     else:
-        query = f"""
-        UPDATE {Tables.player_answers}
-        SET {Var.player_id_of_chosen_answer} = '{chosen_player_id}'
-        WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number} AND {Var.player_id} = '{player_id}';
-        """
-        print("set_players_chosen_answers_player_id: ", query)
-        with get_cursor() as con:
-            con.execute(query)
+        print(f"set_players_chosen_answers_player_id: {player_id} chose the answer of {chosen_player_id}")
+        get_game_store().set_chosen_answer(game_id, question_number, player_id, chosen_player_id)
+        game_events.bump(game_id)
+
+
+def game_stage_changed(game_id: int, current_stage: GameStage) -> bool:
+    return determine_game_stage(game_id) != current_stage
+
+
+def players_changed(game_id: int, current_players: list[str]) -> bool:
+    return set(get_all_players_in_game(game_id)) != set(current_players)
+
+
+def game_changed_since_last_poll(game_id: int, poller: str) -> bool:
+    """The pollers only query the database once the game was written to."""
+    return game_events.changed(game_id, seen=st.session_state, poller=poller)
 
 
 @st.fragment(run_every=1)
 def rerun_if_game_stage_changed(game_id: int, current_stage: GameStage) -> None:
-    actual_stage = determine_game_stage(game_id)
-    if actual_stage != current_stage:
+    if not game_changed_since_last_poll(game_id, poller="game_stage"):
+        return
+    if game_stage_changed(game_id, current_stage):
         st.rerun()
 
 
@@ -835,8 +584,9 @@ def rerun_if_game_stage_changed_or_all_answers_in(
     question_number: int,
     all_answers_in_already_before: bool,
 ) -> None:
-    actual_stage = determine_game_stage(game_id)
-    if actual_stage != current_stage:
+    if not game_changed_since_last_poll(game_id, poller="game_stage_or_answers"):
+        return
+    if game_stage_changed(game_id, current_stage):
         st.rerun()
 
     if not all_answers_in_already_before:
@@ -851,12 +601,12 @@ def rerun_if_game_stage_changed_or_all_answers_in(
 def rerun_if_game_stage_or_players_changed(
     game_id: int, current_players: list[str], current_stage: GameStage
 ) -> None:
-    actual_stage = determine_game_stage(game_id)
-    if actual_stage != current_stage:
+    if not game_changed_since_last_poll(game_id, poller="game_stage_or_players"):
+        return
+    if game_stage_changed(game_id, current_stage):
         st.rerun()
 
-    actual_players = get_all_players_in_game(game_id)
-    if set(actual_players) != set(current_players):
+    if players_changed(game_id, current_players):
         st.rerun()
 
 
@@ -874,6 +624,8 @@ def auto_refresh(count_down: list[int] = [10]) -> None:
 def rerun_if_all_players_have_chosen_an_answer(
     game_id: int, question_number: int, is_host: bool
 ) -> None:
+    if not game_changed_since_last_poll(game_id, poller="all_chosen"):
+        return
     have_chosen = all_players_have_chosen_an_answer(
         game_id=game_id, question_number=question_number
     )
@@ -887,37 +639,21 @@ def rerun_if_all_players_have_chosen_an_answer(
 
 
 def question_is_answered(game_id: int, question_number: int) -> bool:
-    query = f"""
-    SELECT {Var.is_answered} FROM {Tables.questions}
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number};
-    """
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    if len(result) != 1:
-        raise ValueError(f"Expected result of length 1, found {result}")
-
-    return result[0][0]
+    return _get_question_row(game_id, question_number).is_answered
 
 
 @st.fragment(run_every=1)
 def rerun_if_question_is_answered(game_id: int, question_number: int) -> None:
+    if not game_changed_since_last_poll(game_id, poller="question_answered"):
+        return
     is_answered = question_is_answered(game_id=game_id, question_number=question_number)
     if is_answered:
         st.rerun()
 
 
 def all_players_have_chosen_an_answer(game_id: int, question_number: int) -> bool:
-    query = f"""
-    SELECT {Var.player_id_of_chosen_answer} FROM {Tables.player_answers}
-    JOIN {Tables.players} ON {Tables.player_answers}.{Var.player_id} = {Tables.players}.{Var.player_id}
-    WHERE {Tables.player_answers}.{Var.game_id} = {game_id} AND {Tables.player_answers}.{Var.question_number} = {question_number} 
-    AND {Tables.players}.{Var.is_house} = FALSE;
-    """
-    print("rerun_if_question_is_answered, query:", query)
-
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    return not any(res[0] is None for res in result)
+    answers = get_game_store().get_answers(game_id, question_number)
+    return not any(answer.player_id_of_chosen_answer is None for answer in answers if not answer.is_house)
 
 
 def change_name_field(player_id: str, player_name: str) -> None:
@@ -955,6 +691,7 @@ def sql_editor_sidebar() -> None:
         if execute_sql_button and unsafe_sql:
             with get_cursor() as con:
                 result = con.execute(unsafe_sql).fetchall()
+            game_events.bump_all()
             st.write(result)
 
 
@@ -985,10 +722,13 @@ def main():
     
     else:
 
+        create_tables_if_not_exist()
+        get_job_workers()  # picks up jobs that are still queued
+        get_refiller()
+
         if st.session_state.get(Var.name) == "Admin":
             sql_editor_sidebar()
-
-        create_tables_if_not_exist()
+            generation_metrics_display()
 
         player_id = determine_player_id()
         game_id = determine_game_id()
@@ -1149,16 +889,30 @@ def open_game_screen(player_id: str, game_id: int, is_host: bool) -> None:
                     on_click=partial(kick_from_game, game_id=game_id, player_id=p_id),
                 )
 
+    if is_host:
+        prefetch_question(game_id=game_id, question_number=1)
+
     cols = st.columns(3)
     with cols[0]:
         st.button(
             "Leave Game",
             on_click=partial(leave_game, game_id=game_id, player_id=player_id),
         )
+    with cols[1]:
+        if is_host:
+            st.checkbox(
+                "Generate all questions at the start",
+                key=Var.eager_generation,
+                help="Prepares every question of the game in parallel, so there is less waiting between questions.",
+            )
     with cols[2]:
         st.button(
             "Start Game" if is_host else "Wait for host to start game",
-            on_click=partial(start_game, game_id=game_id, n_questions=N_QUESTIONS),
+            on_click=lambda: start_game(
+                game_id=game_id,
+                n_questions=N_QUESTIONS,
+                eager_generation=st.session_state.get(Var.eager_generation, False),
+            ),
             disabled=not is_host,
             type="primary",
         )
@@ -1170,27 +924,319 @@ def open_game_screen(player_id: str, game_id: int, is_host: bool) -> None:
 
 
 
-def get_question_generator(question_number: int) -> questions.QuestionGenerator:
-    rest = question_number % 6
+def get_question_types(game_id: int) -> dict[int, question_types.QuestionType | None]:
+    return {
+        question_number: question_types.QuestionType(question_type) if question_type is not None else None
+        for question_number, question_type in get_game_store().get_question_types(game_id).items()
+    }
 
-    if rest == 0:  # question number is 1 indexed so should be last
-        return movie_suggestion.MovieQuestionGenerator()
-    
-    elif rest == 1:
-        return animal_question.AnimalQuestionGenerator()
-    elif rest == 2:
-        return word_definition_question.OldEnglishWordDefinitionQuestionGenerator()
-    elif rest == 3:
-        return arxiv_question.ArxivQuestionGenerator()
-    elif rest == 4:
-        return pokemon_question.PokemonQuestionGenerator()
-
-    elif rest == 5:
-        return podcast_question.PodcastQuestionGenerator()
 
-    else:
-        raise ValueError(f"Found {rest}")
+def assign_question_type(game_id: int, question_number: int) -> question_types.QuestionType:
+    """The scheduler picks the type the first time, afterwards it stays the same."""
+    assigned = get_question_types(game_id)
+    already_assigned = assigned.get(question_number)
+    if already_assigned is not None:
+        return already_assigned
+
+    current_question_number = determine_first_unanswered_question_number(game_id) or question_number
+    question_scheduler = get_scheduler()
+    chosen = question_scheduler.choose(
+        question_number=question_number,
+        budget=question_scheduler.budget(rounds_ahead=max(question_number - current_question_number, 0)),
+        inventory_levels=inventory_levels(),
+        used=[str(t) for n, t in assigned.items() if t is not None and n != question_number],
+    )
+
+    question_type = get_game_store().assign_question_type(game_id, question_number, chosen)
+    if question_type is None:
+        raise ValueError(f"There is no question {question_number} in game {game_id}.")
+    return question_types.QuestionType(question_type)
+
+
+def get_question_generator(game_id: int, question_number: int) -> questions.QuestionGenerator:
+    return question_types.get_generator(assign_question_type(game_id=game_id, question_number=question_number))
+
+
+def execute_retrying_conflicts(statement: dao.Statement, **params: Any) -> list[tuple]:
+    return dao.run_retrying_conflicts(get_cursor, statement, JOB_WRITE_ATTEMPTS, **params)
+
+
+def enqueue_job(
+    game_id: int, question_number: int, kind: generation.JobKind, priority: rate_limit.Priority
+) -> None:
+    """
+    Idempotent, a job that is queued, running or done is kept, at the more urgent of both priorities.
+    A failed or cancelled job is queued again, unless its game was closed in the meantime.
+    """
+    if get_game_stage_from_db(game_id) is None:  # the games may live in another store than the jobs
+        return
+    execute_retrying_conflicts(
+        dao.ENQUEUE_JOB,
+        job_key=generation.job_key(game_id, question_number, kind),
+        game_id=game_id,
+        question_number=question_number,
+        job_kind=str(kind),
+        priority=int(priority),
+    )
+    get_job_workers().notify()
+
+
+def claim_next_job() -> generation.Job | None:
+    result = execute_retrying_conflicts(dao.CLAIM_NEXT_JOB)
+    if not result:
+        return None
+    game_id, question_number, kind, priority = result[0]
+    return generation.Job(
+        game_id=game_id,
+        question_number=question_number,
+        kind=generation.JobKind(kind),
+        priority=rate_limit.Priority(priority),
+    )
+
+
+def finish_job(job: generation.Job, status: generation.JobStatus, error: str | None) -> None:
+    # a job cancelled while it was running stays cancelled
+    execute_retrying_conflicts(dao.FINISH_JOB, job_status=str(status), error=error, job_key=job.key)
+    game_events.bump(job.game_id)  # wakes wait_for_job
+
+
+def requeue_interrupted_jobs() -> None:
+    """
+    Jobs that were running when the previous worker pool of this process went away are picked up again.
+    Nothing is left after a restart, the database is wiped at every start.
+    """
+    execute_retrying_conflicts(dao.REQUEUE_INTERRUPTED_JOBS)
+
+
+def cancel_jobs(game_id: int) -> None:
+    """Queued jobs of the game are never started, running ones can't be interrupted but their result is discarded."""
+    print(f"cancel_jobs: game {game_id}")
+    execute_retrying_conflicts(dao.CANCEL_JOBS, game_id=game_id)
+
+
+def get_job_status(game_id: int, question_number: int, kind: generation.JobKind) -> generation.JobStatus | None:
+    with get_cursor() as con:
+        result = dao.run(con, dao.GET_JOB_STATUS, job_key=generation.job_key(game_id, question_number, kind))
+
+    if not result:
+        return None
+    return generation.JobStatus(result[0][0])
+
+
+def get_job_metrics() -> generation.JobMetrics:
+    with get_cursor() as con:
+        [(queue_depth, running, failed, mean_wait, mean_latency)] = dao.run(con, dao.GET_JOB_METRICS)
+    return generation.JobMetrics(
+        queue_depth=queue_depth, running=running, failed=failed, mean_wait=mean_wait, mean_latency=mean_latency
+    )
+
+
+def wait_for_job(
+    game_id: int, question_number: int, kind: generation.JobKind, timeout: float
+) -> generation.JobStatus | None:
+    """Returns the status once the job is finished, the timeout passed or the game was closed."""
+    game_events.wait_until(
+        game_id,
+        lambda: get_job_status(game_id=game_id, question_number=question_number, kind=kind)
+        not in generation.UNFINISHED_JOB_STATUSES,
+        timeout=timeout,
+    )
+    return get_job_status(game_id=game_id, question_number=question_number, kind=kind)
+
+
+def run_job(job: generation.Job) -> None:
+    match job.kind:
+        case generation.JobKind.question:
+            if get_question(game_id=job.game_id, question_number=job.question_number) is None:
+                if not serve_question_from_inventory(game_id=job.game_id, question_number=job.question_number):
+                    generate_question_into_db(game_id=job.game_id, question_number=job.question_number)
+
+            fake_answers = get_all_fake_answers(game_id=job.game_id, question_number=job.question_number)
+            if not fake_answers or any(a is None for a in fake_answers):
+                enqueue_job(
+                    game_id=job.game_id,
+                    question_number=job.question_number,
+                    kind=generation.JobKind.fake_answers,
+                    priority=job.priority,
+                )
+
+        case generation.JobKind.fake_answers:
+            question = get_question(game_id=job.game_id, question_number=job.question_number)
+            correct_answer = get_correct_answer(game_id=job.game_id, question_number=job.question_number)
+            if question is None or correct_answer is None:
+                raise ValueError("The question has to be written before its fake answers.")
+
+            write_fake_answers_into_db(
+                game_id=job.game_id,
+                question_number=job.question_number,
+                question=question,
+                correct_answer=correct_answer,
+                n_fake_answers=DEFAULT_N_FAKE_ANSWERS,
+            )
+
+        case unreachable:
+            raise ValueError(f"Found {unreachable}")
+
+
+def count_inventory(question_type: str) -> int:
+    with get_cursor() as con:
+        [(count,)] = dao.run(con, dao.COUNT_INVENTORY, question_type=question_type)
+    return count
+
+
+def inventory_levels() -> dict[str, int]:
+    with get_cursor() as con:
+        return dict(dao.run(con, dao.GET_INVENTORY_LEVELS))
+
+
+def put_into_inventory(question_type: str, bundle: inventory.QuestionBundle) -> None:
+    with get_cursor() as con:
+        dao.run(
+            con,
+            dao.PUT_INTO_INVENTORY,
+            question_type=question_type,
+            question=bundle.question,
+            correct_answer=bundle.correct_answer,
+            fake_answers=bundle.fake_answers,
+        )
+
+
+def claim_from_inventory(question_type: str) -> inventory.QuestionBundle | None:
+    """Removes the oldest bundle of the type, the delete makes sure no two games get the same one."""
+    result = execute_retrying_conflicts(dao.CLAIM_FROM_INVENTORY, question_type=question_type)
+    inventory.record_claim(question_type, hit=bool(result))
+    get_refiller().demand(question_type)
+    if not result:
+        return None
+
+    question, correct_answer, fake_answers = result[0]
+    return inventory.QuestionBundle(question=question, correct_answer=correct_answer, fake_answers=fake_answers)
+
+
+def generate_bundle(question_type: str) -> inventory.QuestionBundle:
+    """Draws from the offline question bank if it has the type, the model is only the fallback."""
+    bundle = get_question_bank().sample(question_type, n_fake_answers=DEFAULT_N_FAKE_ANSWERS)
+    if bundle is not None:
+        return bundle
+
+    return inventory.generate_bundle(
+        question_type,
+        n_fake_answers=DEFAULT_N_FAKE_ANSWERS,
+        question_deadline=QUESTION_DEADLINE,
+        fake_answers_deadline=FAKE_ANSWERS_DEADLINE,
+    )
+
+
+def serve_question_from_inventory(game_id: int, question_number: int) -> bool:
+    """Writes a pre-generated question and its fake answers into the game, False if the inventory is empty."""
+    bundle = claim_from_inventory(assign_question_type(game_id=game_id, question_number=question_number))
+    if bundle is None:
+        return False
+
+    add_question_and_correct_answer(
+        game_id=game_id,
+        question_number=question_number,
+        question=bundle.question,
+        correct_answer=bundle.correct_answer,
+    )
+    add_fake_answers(game_id=game_id, question_number=question_number, fake_answers=bundle.fake_answers)  # type: ignore
+    return True
+
 
+def write_fake_answers_into_db(
+    game_id: int, question_number: int, question: str, correct_answer: str, n_fake_answers: int
+) -> None:
+    with api_call.deadline(FAKE_ANSWERS_DEADLINE):
+        fake_answers = get_question_generator(game_id, question_number).write_fake_answers(
+            question=question,
+            correct_answer=correct_answer,
+            n_fake_answers=n_fake_answers,
+        )
+    add_fake_answers(game_id=game_id, question_number=question_number, fake_answers=fake_answers)  # type: ignore
+
+
+def generate_question_into_db(game_id: int, question_number: int) -> None:
+    question_type = assign_question_type(game_id=game_id, question_number=question_number)
+    with api_call.deadline(QUESTION_DEADLINE), scheduler.measure(question_type):
+        question_object = question_types.get_generator(question_type).generate_question_and_correct_answer()
+    add_question_and_correct_answer(
+        game_id=game_id,
+        question_number=question_number,
+        question=question_object.question_text(),
+        correct_answer=question_object.get_correct_answer(),
+    )
+
+
+def prefetch_question(
+    game_id: int, question_number: int, priority: rate_limit.Priority = rate_limit.Priority.prefetch
+) -> None:
+    if question_number > N_QUESTIONS:
+        return
+
+    initialize_questions(game_id=game_id, n_questions=N_QUESTIONS)  # the game might still be in the lobby
+    enqueue_job(
+        game_id=game_id, question_number=question_number, kind=generation.JobKind.question, priority=priority
+    )
+
+
+def generation_metrics_display() -> None:
+    metrics = get_job_metrics()
+    with st.sidebar:
+        st.metric("Queued generation jobs", metrics.queue_depth)
+        st.metric("Running generation jobs", metrics.running)
+        st.metric("Failed generation jobs", metrics.failed)
+        if metrics.mean_latency is not None:
+            st.metric("Mean job latency", f"{metrics.mean_latency:.1f} s")
+        if metrics.mean_wait is not None:
+            st.metric("Mean wait in queue", f"{metrics.mean_wait:.1f} s")
+
+        st.subheader("Question inventory")
+        stats = inventory.get_stats()
+        levels = inventory_levels()
+        for question_type in question_types.QuestionType:
+            type_stats = stats.get(question_type, inventory.InventoryStats())
+            refill_lag = type_stats.mean_refill_lag
+            st.text(
+                f"{question_type}: {levels.get(question_type, 0)} ready, "
+                f"hit rate {type_stats.hit_rate:.0%} ({type_stats.hits + type_stats.misses} claims), "
+                f"refill lag {'-' if refill_lag is None else f'{refill_lag:.0f} s'}"
+            )
+
+        st.subheader("Database statements")
+        statement_stats = dao.get_stats()
+        for name, timing in sorted(statement_stats.items(), key=lambda item: item[1].total_seconds, reverse=True):
+            st.text(
+                f"{name}: {timing.executions} executions, mean {(timing.mean_seconds or 0) * 1e3:.1f} ms, "
+                f"max {timing.max_seconds * 1e3:.1f} ms"
+            )
+
+        st.subheader("Question types")
+        generation_stats = scheduler.get_stats()
+        for question_type in question_types.QuestionType:
+            if question_type not in get_scheduler().weights:
+                st.text(f"{question_type}: turned off")
+                continue
+            type_generation_stats = generation_stats.get(question_type, scheduler.TypeStats())
+            latency = type_generation_stats.latency
+            st.text(
+                f"{question_type}: latency {'-' if latency is None else f'{latency:.1f} s'}, "
+                f"failure rate {type_generation_stats.failure_rate:.0%} ({type_generation_stats.generations} generations)"
+            )
+
+
+def generation_progress_display(game_id: int) -> None:
+    progress = get_generation_progress(game_id=game_id)
+    n_done = sum(progress.values())
+    if not progress or n_done == len(progress):
+        return
+
+    st.progress(n_done / len(progress), text=f"Questions prepared: {n_done}/{len(progress)}")
+    st.caption(
+        " ".join(
+            f":{'green' if done else 'gray'}-badge[{question_number}]"
+            for question_number, done in progress.items()
+        )
+    )
 
 
 def answer_writing_screen(
@@ -1203,32 +1249,41 @@ def answer_writing_screen(
         st.text("I am the titular Chat Stewart and I ask a relatively obscure trivia question and the players have to write a convincing fake answer.")
         st.text("I then show the correct answer as well as the fake answers and the players need to guess which one is correct.")
 
+    generation_progress_display(game_id=game_id)
+
     question = get_question(game_id=game_id, question_number=question_number)
 
 
     if question is None:
         with st.spinner("Generating Question..."):
             if is_host:
-                print("Generating Question since I am host")
-                question_object = (
-                    get_question_generator(question_number).generate_question_and_correct_answer()
-                )
-                add_question_and_correct_answer(
+                # also takes over a prefetch that is still queued, at live priority
+                prefetch_question(game_id=game_id, question_number=question_number, priority=rate_limit.Priority.live)
+                status = wait_for_job(
                     game_id=game_id,
                     question_number=question_number,
-                    question=question_object.question_text(),
-                    correct_answer=question_object.get_correct_answer(),
-                )
-                question = get_question(
-                    game_id=game_id, question_number=question_number
+                    kind=generation.JobKind.question,
+                    timeout=QUESTION_DEADLINE,
                 )
+                question = get_question(game_id=game_id, question_number=question_number)
+                if question is None:
+                    print(f"Generating question ended as {status}")
+                    st.error("Generating the question failed. Please try again.")
+                    st.button("Try again", type="primary")
+                    return
             else:
                 print("Waiting for host to generate question")
-                while question is None:
-                    time.sleep(1)
-                    question = get_question(
-                        game_id=game_id, question_number=question_number
-                    )
+                if not game_events.wait_until(
+                    game_id,
+                    lambda: get_question(game_id=game_id, question_number=question_number) is not None,
+                    timeout=QUESTION_DEADLINE,
+                ):
+                    stop_waiting_for_host(game_id=game_id, what="the question")
+                    return
+                question = get_question(game_id=game_id, question_number=question_number)
+
+    if is_host:
+        prefetch_question(game_id=game_id, question_number=question_number + 1)
 
     if determine_n_human_players(game_id=game_id) > 1:
 
@@ -1272,13 +1327,14 @@ def answer_writing_screen(
 def guessing_screen(
     player_id: str, game_id: int, is_host: bool, question_number: int
 ) -> None:
-    question = get_question(game_id=game_id, question_number=question_number)
+    snapshot = get_game_snapshot(game_id=game_id, question_number=question_number)
+    question = snapshot.question
 
     if question is None:
         raise ValueError(
             "Question is None. This should not have happened. Something is wrong."
         )
-    player_name_display(player_id=player_id)
+    st.badge(snapshot.player_names.get(player_id) or get_player_name(player_id), icon=":material/person:")
 
     with st.popover("Instructions", icon=":material/help:"):
         st.header("Now you need to choose which answer is correct.")
@@ -1289,58 +1345,52 @@ def guessing_screen(
     st.title(question)
     st.header("Here are your options. Which one do you think is correct?")
 
-    combined_synopsis = get_correct_answer(
-        game_id=game_id, question_number=question_number
-    )
+    combined_synopsis = snapshot.correct_answer
     if combined_synopsis is None:
         raise ValueError(
             "combined_synopsis is None. This should not have happened. Something is wrong."
         )
 
-    fake_answers = get_all_fake_answers(
-        game_id=game_id, question_number=question_number
-    )
-
-    if any(a is None for a in fake_answers):
-        n_fake_answers = len(fake_answers)
-
+    if any(a is None for a in snapshot.fake_answers):
         with st.spinner("Writing the wrong answers..."):
             if is_host:
-                fake_answers = get_question_generator(question_number).write_fake_answers(  # type: ignore
-                    question=question,
-                    correct_answer=combined_synopsis,
-                    n_fake_answers=n_fake_answers,
+                enqueue_job(
+                    game_id=game_id,
+                    question_number=question_number,
+                    kind=generation.JobKind.fake_answers,
+                    priority=rate_limit.Priority.live,
                 )
-
-                add_fake_answers(
+                status = wait_for_job(
                     game_id=game_id,
                     question_number=question_number,
-                    fake_answers=fake_answers,
+                    kind=generation.JobKind.fake_answers,
+                    timeout=FAKE_ANSWERS_DEADLINE,
                 )
+                snapshot = get_game_snapshot(game_id=game_id, question_number=question_number)
+                if any(a is None for a in snapshot.fake_answers):
+                    print(f"Writing fake answers ended as {status}")
+                    st.error("Writing the wrong answers failed. Please try again.")
+                    st.button("Try again", type="primary")
+                    return
             else:
-                while any(a is None for a in fake_answers):
-                    time.sleep(1)
-                    fake_answers = get_all_fake_answers(
-                        game_id=game_id, question_number=question_number
-                    )
-
-    player_answer_tuples = get_player_answer_tuples(
-        game_id=game_id, question_number=question_number
-    )
-    correct_answer_rank = get_correct_answer_rank(
-        game_id=game_id, question_number=question_number
-    )
-
-    player_answer_tuples += [
-        PlayerAnswerTuple(CORRECT_ANSWER_ID, combined_synopsis, correct_answer_rank)
+                if not game_events.wait_until(
+                    game_id,
+                    lambda: None not in get_game_snapshot(game_id=game_id, question_number=question_number).fake_answers,
+                    timeout=FAKE_ANSWERS_DEADLINE,
+                ):
+                    stop_waiting_for_host(game_id=game_id, what="the wrong answers")
+                    return
+                snapshot = get_game_snapshot(game_id=game_id, question_number=question_number)
+
+    player_answer_tuples = [
+        *snapshot.answers,
+        PlayerAnswerTuple(CORRECT_ANSWER_ID, combined_synopsis, snapshot.correct_answer_rank),
     ]
     player_answer_tuples = sorted(player_answer_tuples, key=lambda x: x.answer_order)
 
     button_labels = get_button_labels(len(player_answer_tuples))
 
-    player_answer = get_player_id_who_wrote_chosen_answer(
-        player_id=player_id, game_id=game_id, question_number=question_number
-    )
+    player_answer = snapshot.chosen_answers.get(player_id)
     player_has_chosen = player_answer is not None
 
     st.divider()
@@ -1372,21 +1422,6 @@ def guessing_screen(
     )
 
 
-def get_players_who_chose_answers(
-    game_id: int, question_number: int
-) -> dict[str, list[str]]:
-    query = f"""
-    SELECT {Var.player_id_of_chosen_answer}, LIST({Var.player_id}) AS {Var.fooled_players} FROM {Tables.player_answers}
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number} AND {Var.player_id_of_chosen_answer} IS NOT NULL
-    GROUP BY {Var.player_id_of_chosen_answer}
-    """
-    print("get_reveal_info_from_player_answers: ", query)
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    print("get_reveal_info_from_player_answers: ", result)
-    return {res[0]: res[1] for res in result}
-
-
 @dataclasses.dataclass
 class RevealInfo:
     player_id_of_author: str
@@ -1453,27 +1488,12 @@ def calculate_player_points(reveal_infos: list[RevealInfo], triple_points: bool)
     return player_points
 
 
-def get_total_points(game_id: int) -> dict[str, int]:
-    query = f"""
-    SELECT {Var.player_id}, SUM({Var.points}) FROM {Tables.points}
-    WHERE {Var.game_id} = {game_id}
-    GROUP BY {Var.player_id};
-    """
-    print("get_total_points: ", query)
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    return {res[0]: res[1] for res in result}
-
-
-def points_entered(game_id: int, question_number: int) -> bool:
-    query = f"""
-    SELECT COUNT(*) FROM {Tables.points}
-    WHERE {Var.game_id} = {game_id} AND {Var.question_number} = {question_number};
-    """
-    print("points_entered: ", query)
-    with get_cursor() as con:
-        result = con.execute(query).fetchall()
-    return result[0][0] > 0
+def stop_waiting_for_host(game_id: int, what: str) -> None:
+    """After a wait for a write of the host gave up, the game was closed or the host is taking long."""
+    if get_game_stage_from_db(game_id) is None:
+        st.rerun()
+    st.info(f"Still waiting for {what}.")
+    st.button("Wait again", type="primary")
 
 
 def get_display_color(some_player_id: str, current_player_id: str) -> str:
@@ -1500,13 +1520,12 @@ def get_badge_icon(some_player_id: str) -> str:
 def reveal_screen(
     player_id: str, game_id: int, is_host: bool, question_number: int
 ) -> None:
-    player_name_display(player_id=player_id)
+    snapshot = get_game_snapshot(game_id=game_id, question_number=question_number)
+    st.badge(snapshot.player_names.get(player_id) or get_player_name(player_id), icon=":material/person:")
 
-    players_who_chose_answers = get_players_who_chose_answers(
-        game_id=game_id, question_number=question_number
-    )
+    players_who_chose_answers = snapshot.players_who_chose_answers()
 
-    question = get_question(game_id=game_id, question_number=question_number)
+    question = snapshot.question
 
     if question is None:
         raise ValueError(
@@ -1525,12 +1544,7 @@ def reveal_screen(
 
     st.divider()
 
-    player_answer_tuples = get_player_answer_tuples(
-        game_id=game_id, question_number=question_number
-    )
-    correct_answer = get_correct_answer(
-        game_id=game_id, question_number=question_number
-    )
+    correct_answer = snapshot.correct_answer
     if correct_answer is None:
         raise ValueError(
             "Correct answer is None. This should not have happened. Something is wrong."
@@ -1543,7 +1557,7 @@ def reveal_screen(
                 answer_tuple.player_id, []
             ),
         )
-        for answer_tuple in player_answer_tuples
+        for answer_tuple in snapshot.answers
     ]
     reveal_infos = sorted(reveal_infos, key=lambda x: len(x.player_ids_who_chose))
 
@@ -1554,8 +1568,7 @@ def reveal_screen(
             player_ids_who_chose=players_who_chose_answers.get(CORRECT_ANSWER_ID, []),
         )
     ]
-    player_id_to_name = get_all_players_in_game(game_id=game_id)
-    player_id_to_name[CORRECT_ANSWER_ID] = CORRECT_ANSWER_NAME
+    player_id_to_name = {**snapshot.player_names, CORRECT_ANSWER_ID: CORRECT_ANSWER_NAME}
 
     for r_info in reveal_infos:
 
@@ -1594,15 +1607,20 @@ def reveal_screen(
 
     player_points = calculate_player_points(reveal_infos=reveal_infos, triple_points=question_number == N_QUESTIONS)
     if is_host:
-        add_points(
-            game_id=game_id,
-            question_number=question_number,
-            points_per_player_id=player_points,
-        )
-    else:
-        while not points_entered(game_id=game_id, question_number=question_number):
-            time.sleep(1)
-    total_points = get_total_points(game_id=game_id)
+        if not snapshot.points_entered:  # the choices are final in the reveal, the points don't change on reruns
+            add_points(
+                game_id=game_id,
+                question_number=question_number,
+                points_per_player_id=player_points,
+            )
+    elif not game_events.wait_until(
+        game_id,
+        lambda: get_game_snapshot(game_id=game_id, question_number=question_number).points_entered,
+        timeout=POINTS_TIMEOUT,
+    ):
+        stop_waiting_for_host(game_id=game_id, what="the points")
+        return
+    total_points = dict(get_game_snapshot(game_id=game_id, question_number=question_number).total_points)
     player_points = aggregate_house_points(player_points=player_points)
     total_points = aggregate_house_points(player_points=total_points)
     
@@ -1658,8 +1676,9 @@ def get_winner_s(total_points: dict[str, int]) -> list[str]:
 
 def finished_screen(player_id: str, game_id: int, is_host: bool) -> None:
     st.title("Finished!")
-    player_id_to_name = get_all_players_in_game(game_id=game_id)
-    total_points = aggregate_house_points(get_total_points(game_id=game_id))
+    snapshot = get_game_snapshot(game_id=game_id, question_number=N_QUESTIONS)
+    player_id_to_name = snapshot.player_names
+    total_points = aggregate_house_points(dict(snapshot.total_points))
     cols = st.columns(len(total_points))
     sorted_player_points_tuples = sorted(
         total_points.items(), key=lambda x: x[1], reverse=True
@@ -1668,7 +1687,7 @@ def finished_screen(player_id: str, game_id: int, is_host: bool) -> None:
     for col, (player, points) in zip(cols, sorted_player_points_tuples, strict=True):
         with col:
             st.metric(label=player_id_to_name[player], value=points)
-    player_name = get_player_name(player_id=player_id)
+    player_name = player_id_to_name[player_id]
     winners = get_winner_s(total_points=total_points)
 
     if player_id in winners:
@@ -0,0 +1,165 @@
+import dataclasses
+import json
+import threading
+from collections.abc import Callable
+from typing import Any, Generic, TypeVar
+
+from who_knew_it import api_call
+
+T = TypeVar("T")
+
+
+class ParseError(ValueError):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class ResponseFormat(Generic[T]):
+    """A response schema in the Gemini schema dialect together with the parser of the decoded json."""
+
+    schema: dict[str, Any]
+    parse: Callable[[Any], T]
+
+
+def string_list(n_items: int, exact: bool = True, names: bool = False) -> ResponseFormat[list[str]]:
+    """
+    With exact=False any list of strings is accepted, so the caller can keep the usable items.
+    With names=True markdown emphasis around the items is dropped, models like to write **Name**.
+    """
+
+    def parse(value: Any) -> list[str]:
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ParseError(f"Expected a list of strings, found {value!r}")
+
+        items = [v.strip().strip("*").strip() if names else v.strip() for v in value]
+        items = [item for item in items if item]
+        if exact and (len(items) != n_items or len(set(items)) != n_items):
+            raise ParseError(f"Expected {n_items} distinct items, found {items!r}")
+        return items
+
+    schema = {"type": "ARRAY", "items": {"type": "STRING"}, "minItems": n_items, "maxItems": n_items}
+    return ResponseFormat(schema=schema, parse=parse)
+
+
+def score_list(n_items: int, max_score: int) -> ResponseFormat[list[int]]:
+    """One integer score between 0 and max_score per item, in the order of the items."""
+
+    def parse(value: Any) -> list[int]:
+        if not isinstance(value, list) or len(value) != n_items:
+            raise ParseError(f"Expected a list of {n_items} scores, found {value!r}")
+        if not all(isinstance(v, int) and not isinstance(v, bool) and 0 <= v <= max_score for v in value):
+            raise ParseError(f"Expected scores between 0 and {max_score}, found {value!r}")
+        return value
+
+    schema = {"type": "ARRAY", "items": {"type": "INTEGER"}, "minItems": n_items, "maxItems": n_items}
+    return ResponseFormat(schema=schema, parse=parse)
+
+
+def choice(candidates: list[str]) -> ResponseFormat[str]:
+    """Constrains the answer to be exactly one of the candidates."""
+    options = list(dict.fromkeys(candidates))
+
+    def parse(value: Any) -> str:
+        if value not in options:
+            raise ParseError(f"{value!r} is not one of the candidates")
+        return value
+
+    return ResponseFormat(schema={"type": "STRING", "enum": options}, parse=parse)
+
+
+def choice_index(n_candidates: int) -> ResponseFormat[int]:
+    def parse(value: Any) -> int:
+        index = value.get("index") if isinstance(value, dict) else None
+        if not isinstance(index, int) or not 0 <= index < n_candidates:
+            raise ParseError(f"Expected an index between 0 and {n_candidates - 1}, found {value!r}")
+        return index
+
+    schema = {"type": "OBJECT", "properties": {"index": {"type": "INTEGER"}}, "required": ["index"]}
+    return ResponseFormat(schema=schema, parse=parse)
+
+
+def boolean(field: str) -> ResponseFormat[bool]:
+    def parse(value: Any) -> bool:
+        result = value.get(field) if isinstance(value, dict) else None
+        if not isinstance(result, bool):
+            raise ParseError(f"Expected a boolean {field!r}, found {value!r}")
+        return result
+
+    schema = {"type": "OBJECT", "properties": {field: {"type": "BOOLEAN"}}, "required": [field]}
+    return ResponseFormat(schema=schema, parse=parse)
+
+
+def record(cls: type[T]) -> ResponseFormat[T]:
+    """An object with one non-empty string property per field of the dataclass cls."""
+    field_names = [f.name for f in dataclasses.fields(cls)]  # type: ignore[arg-type]
+
+    def parse(value: Any) -> T:
+        if not isinstance(value, dict):
+            raise ParseError(f"Expected an object, found {value!r}")
+
+        kwargs = {}
+        for name in field_names:
+            field_value = value.get(name)
+            if not isinstance(field_value, str) or not field_value.strip():
+                raise ParseError(f"Missing or empty {name!r} in {value!r}")
+            kwargs[name] = field_value.strip()
+        return cls(**kwargs)
+
+    schema = {
+        "type": "OBJECT",
+        "properties": {name: {"type": "STRING"} for name in field_names},
+        "required": field_names,
+        "propertyOrdering": field_names,
+    }
+    return ResponseFormat(schema=schema, parse=parse)
+
+
+@dataclasses.dataclass
+class SiteStats:
+    responses: int = 0
+    rejected: int = 0
+
+    @property
+    def retry_rate(self) -> float:
+        """Share of responses that were thrown away, each of which costs the generator another model call."""
+        return self.rejected / self.responses if self.responses else 0.0
+
+
+_stats: dict[str, SiteStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(site: str, accepted: bool) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(site, SiteStats())
+        stats.responses += 1
+        if not accepted:
+            stats.rejected += 1
+
+
+def get_stats() -> dict[str, SiteStats]:
+    with _stats_lock:
+        return {site: dataclasses.replace(stats) for site, stats in _stats.items()}
+
+
+def parse_structured(response: str, response_format: ResponseFormat[T], site: str) -> T | None:
+    text = response.strip()
+    if text.startswith("```"):  # shouldn't happen in json mode, but costs nothing to tolerate
+        text = text.strip("`").removeprefix("json").strip()
+
+    try:
+        value = response_format.parse(json.loads(text))
+    except (json.JSONDecodeError, ParseError) as e:
+        print(f"Rejected response at {site}: {e}")
+        _record(site, accepted=False)
+        return None
+
+    _record(site, accepted=True)
+    return value
+
+
+def prompt_structured(
+    prompt: str, response_format: ResponseFormat[T], site: str, cache_ttl: float | None = None
+) -> T | None:
+    response = api_call.prompt_model(prompt, cache_ttl=cache_ttl, response_schema=response_format.schema)
+    return parse_structured(response, response_format, site=site)
@@ -1,7 +1,7 @@
 import pathlib
 import random
 
-from who_knew_it import api_call, questions
+from who_knew_it import api_call, datasets, questions, scoring, structured_output
 
 WORDS_CSV = pathlib.Path(__file__).parent / "dictionary"/ "nouns.csv"
 
@@ -20,11 +20,23 @@ class OldEnglishWordDefinitionQuestion(questions.Question):
 
 class OldEnglishWordDefinitionQuestionGenerator(questions.QuestionGenerator):
     def generate_question_and_correct_answer(self) -> OldEnglishWordDefinitionQuestion:
+        scored = _select_scored_old_english_word()
+        if scored is not None:
+            return scored
+
         word, definition = _select_random_old_english_word()
         rewritten_definition = _make_definition_more_natural(word, definition)
         return OldEnglishWordDefinitionQuestion(word=word, definition=rewritten_definition)
     
     def write_fake_answers(self, question: str, correct_answer: str, n_fake_answers: int) -> list[str]:
+        if n_fake_answers == 0:
+            return []
+
+        batched = _create_fake_answers_batch(question=question, definition=correct_answer, n_fake_answers=n_fake_answers)
+        if batched is not None:
+            return batched
+
+        print("Batched definitions failed, writing them one by one.")
         fake_answers: list[str] = []
         for _ in range(n_fake_answers):
             fake_answer = _create_fake_answers(question=question, definition=correct_answer, avoid_examples=fake_answers)
@@ -32,12 +44,22 @@ class OldEnglishWordDefinitionQuestionGenerator(questions.QuestionGenerator):
         return fake_answers
 
 
+def _select_scored_old_english_word() -> OldEnglishWordDefinitionQuestion | None:
+    row_index = scoring.weighted_sample(scoring.NOUNS)
+    if row_index is None:
+        return None
+
+    word, definition = scoring.rows(scoring.NOUNS)[row_index].split("|")[:2]
+    rewritten_definition = scoring.normalized_definition(row_index) or _make_definition_more_natural(word, definition)
+    return OldEnglishWordDefinitionQuestion(word=word, definition=rewritten_definition)
+
+
 def _select_random_old_english_word() -> tuple[str, str]:
-    with open(WORDS_CSV, "r") as f:
-        lines = f.read().splitlines()
-    
+    lines = datasets.lines(WORDS_CSV)
+
     how_many = 20
     while True:
+        api_call.check_deadline()
         selected_lines = [(line.split("|")[0], line.split("|")[1]) for line in random.sample(lines, how_many)]
 
         select_best = _select_best_definition(selected_lines)
@@ -67,11 +89,11 @@ def _select_best_definition(word_definitions: list[tuple[str, str]]) -> tuple[st
     """
     print(prompt)
     
-    best = api_call.prompt_model(
-        prompt
+    best = structured_output.prompt_structured(
+        prompt, structured_output.choice([word for word, _ in word_definitions]), site="word_definition.select"
     )
     print("best: ", best)
-    candidates = [line for line in word_definitions if line[0].lower() == best.strip().lower()]
+    candidates = [line for line in word_definitions if line[0] == best]
     if len(candidates) != 1:
         return None
     return candidates[0]
@@ -88,7 +110,7 @@ def _make_definition_more_natural(word: str, definition: str) -> str:
     Please answer only with the rewritten definition and nothing else.
     """
     print(prompt)
-    return api_call.prompt_model(prompt)
+    return api_call.prompt_model(prompt, cache_ttl=api_call.CACHE_TTL_LONG)
 
 
 def _create_fake_answers(question: str, definition: str, avoid_examples: list[str]) -> str:
@@ -112,4 +134,21 @@ def _create_fake_answers(question: str, definition: str, avoid_examples: list[st
     Please answer only with the fake definition and nothing else.
     """
     print(prompt)
-    return api_call.prompt_model(prompt)
\ No newline at end of file
+    return api_call.prompt_model(prompt)
+
+
+def _create_fake_answers_batch(question: str, definition: str, n_fake_answers: int) -> list[str] | None:
+    prompt = f"""
+    You are hosting a game where players have to write a convincing fake definition of an obscure, 
+    old english word. Each should be very short and simple.
+    You have to write {n_fake_answers} convincing fake definitions for the following question: {question}
+    The definition is: {definition}
+    Please make them similar in style to the definition but with completetly different content.
+    The fake definitions must also be completely different in content from each other.
+
+    Please answer only with a list of the {n_fake_answers} fake definitions and nothing else.
+    """
+    print(prompt)
+    return structured_output.prompt_structured(
+        prompt, structured_output.string_list(n_fake_answers), site="word_definition.fake_answers"
+    )